@@ -2,20 +2,23 @@
 from __future__ import annotations
 
 import asyncio
+import time
 from typing import Optional
 
-from fastapi import FastAPI, WebSocket, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.api.backtest_api import backtest_router
 from backend.config import SETTINGS
-from backend.models.order import Order
+from backend.models.order import CancelRequest, Order, OrderBatch
 from backend.models.metrics import MetricsResponse
+from backend.services.broadcast import Broadcaster, portfolio_delta
+from backend.services.latency import LATENCY
 from backend.services.portfolio import PORTFOLIO
 from backend.services.session import SESSION_STATE
-from backend.services.metrics import compute_metrics
-from backend.api.engine_bridge import EngineBridge, default_engine_path
-from backend.data.binance_ws import run_bookticker_loop
+from backend.api.engine_bridge import AsyncEngineBridge, EngineTimeout, default_engine_path
+from backend.data.binance_ws import BookTickerIngestor, QuoteBatch
+from backend.data.ticks import BackgroundTickRecorder, TickRecorder
 
 app = FastAPI(title=SETTINGS.name, version=SETTINGS.version)
 app.include_router(backtest_router, prefix="/backtest")
@@ -28,57 +31,84 @@ app.add_middleware(
 )
 
 # IMPORTANT: do NOT construct the engine at import time
-bridge: EngineBridge | None = None
+bridge: AsyncEngineBridge | None = None
 ENGINE_ERROR: str | None = None
 
 BINANCE_TASK: Optional[asyncio.Task] = None
+INGESTOR: Optional[BookTickerIngestor] = None
+TICK_RECORDER: Optional[BackgroundTickRecorder] = None
+
+# one publisher for all /ws/metrics clients
+BROADCASTER = Broadcaster(SETTINGS.metrics_ws_interval_sec, max_events=SETTINGS.ws_max_pending_fills)
+BROADCAST_TASK: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
 async def startup():
-    global bridge, ENGINE_ERROR, BINANCE_TASK
+    global bridge, ENGINE_ERROR, BINANCE_TASK, BROADCAST_TASK, INGESTOR, TICK_RECORDER
 
     PORTFOLIO.reset()
     SESSION_STATE.reset()
+    LATENCY.reset()
+    LATENCY.enabled = SETTINGS.latency_enabled
+
+    _register_ws_producers()
+    if BROADCAST_TASK is None or BROADCAST_TASK.done():
+        BROADCAST_TASK = asyncio.create_task(BROADCASTER.run())
 
     # Start engine if present; otherwise keep API alive
     try:
-        bridge = EngineBridge(default_engine_path())
-        bridge.start()
+        bridge = AsyncEngineBridge(default_engine_path(), protocol=SETTINGS.engine_protocol)
+        # reports no request is waiting for (e.g. late fills) still hit the portfolio
+        bridge.on_report = lambda r: _apply_engine_reports([r])
+        bridge.latency = LATENCY
+        await bridge.start()
         ENGINE_ERROR = None
     except Exception as e:
         bridge = None
         ENGINE_ERROR = f"{type(e).__name__}: {e}"
 
-    # Start Binance streaming marks
+    # Start Binance streaming marks (one combined stream, conflated per symbol)
     if BINANCE_TASK is None or BINANCE_TASK.done():
-        BINANCE_TASK = asyncio.create_task(
-            run_bookticker_loop(
-                SETTINGS.binance_symbol,
-                on_tick=lambda mid, bid, ask: _on_market_tick(mid=mid, bid=bid, ask=ask),
-            )
+        if SETTINGS.record_ticks and TICK_RECORDER is None:
+            # disk writes happen on the recorder's thread, never on the event loop
+            TICK_RECORDER = BackgroundTickRecorder(TickRecorder(SETTINGS.tick_dir))
+        INGESTOR = BookTickerIngestor(
+            SETTINGS.binance_symbols or [SETTINGS.binance_symbol],
+            on_batch=_on_market_batch,
+            conflate_sec=SETTINGS.mark_conflate_sec,
+            url=SETTINGS.binance_ws_url,
+            recorder=TICK_RECORDER,
         )
+        BINANCE_TASK = asyncio.create_task(INGESTOR.run())
 
 
 @app.on_event("shutdown")
 async def shutdown():
-    global BINANCE_TASK, bridge
+    global BINANCE_TASK, BROADCAST_TASK, TICK_RECORDER, bridge
 
-    if BINANCE_TASK and not BINANCE_TASK.done():
-        BINANCE_TASK.cancel()
-        try:
-            await BINANCE_TASK
-        except asyncio.CancelledError:
-            pass
+    for task in (BINANCE_TASK, BROADCAST_TASK):
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    if TICK_RECORDER is not None:
+        await asyncio.to_thread(TICK_RECORDER.close)
+        TICK_RECORDER = None
 
     if bridge is not None:
-        bridge.stop()
+        await bridge.stop()
         bridge = None
 
 
-def _on_market_tick(*, mid: float, bid: float, ask: float) -> None:
-    PORTFOLIO.marks[SETTINGS.binance_symbol] = mid
-    SESSION_STATE.equity.append(PORTFOLIO.mark_to_market())
+def _on_market_batch(quotes: QuoteBatch) -> None:
+    # one equity point per conflated batch, not per exchange message
+    for sym, (mid, _bid, _ask) in quotes.items():
+        PORTFOLIO.set_mark(sym, mid)
+    SESSION_STATE.record_equity(PORTFOLIO.mark_to_market())
 
     if SESSION_STATE.drawdown_pct >= SETTINGS.max_session_drawdown_pct:
         SESSION_STATE.halt_trading = True
@@ -102,9 +132,9 @@ def _apply_engine_reports(reports: list[dict]) -> None:
         if r.get("type") == "fill":
             sym = r.get("symbol", "")
             px = float(r.get("px", 0))
-            SESSION_STATE.fills.append(r)
+            SESSION_STATE.record_fill(r)
             
-            PORTFOLIO.marks[sym] = px
+            PORTFOLIO.set_mark(sym, px)
 
             PORTFOLIO.on_fill(
                 sym,
@@ -112,49 +142,199 @@ def _apply_engine_reports(reports: list[dict]) -> None:
                 float(r.get("qty", 0)),
                 px,
             )
-            SESSION_STATE.equity.append(PORTFOLIO.mark_to_market())
+            SESSION_STATE.record_equity(PORTFOLIO.mark_to_market())
 
 
-@app.post("/execute_order")
-async def execute_order(order: Order):
-    _check_risks(order)
-
+def _require_engine() -> AsyncEngineBridge:
     if bridge is None or not bridge.is_alive():
         raise HTTPException(
             status_code=503,
             detail=f"Engine unavailable. {ENGINE_ERROR or ''}".strip(),
         )
+    return bridge
+
+
+async def _engine_call(coro):
+    try:
+        return await coro
+    except EngineTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Engine unavailable. {e}")
+
 
-    # Send order to engine
-    bridge.send(order.model_dump())
+@app.post("/execute_order")
+async def execute_order(order: Order):
+    sym = order.symbol
+    t0 = time.perf_counter_ns()
+    _check_risks(order)
+    engine = _require_engine()
+    t1 = time.perf_counter_ns()
 
-    # Read engine reports (ack/fill/etc)
-    reports = bridge.recv_all(timeout=2.0)
+    # Send order to engine; resolves at this order's own terminal report
+    # (final fill, resting or reject). Later passive fills arrive via on_report.
+    reports = await _engine_call(engine.submit(order.model_dump()))
+    t2 = time.perf_counter_ns()
 
     # Apply fills to portfolio/equity based on engine "fill" reports
     _apply_engine_reports(reports)
+    t3 = time.perf_counter_ns()
+
+    LATENCY.record("risk", t1 - t0, sym)
+    LATENCY.record("submit", t2 - t1, sym)
+    LATENCY.record("apply", t3 - t2, sym)
+    LATENCY.record("total", t3 - t0, sym)
 
     return {"status": "submitted", "reports": reports}
 
 
+@app.post("/execute_orders")
+async def execute_orders(batch: OrderBatch):
+    """Many orders in one engine write; all reports are collected before returning."""
+    t0 = time.perf_counter_ns()
+    for k, order in enumerate(batch.orders):
+        try:
+            _check_risks(order)
+        except HTTPException as e:
+            raise HTTPException(status_code=e.status_code, detail=f"orders[{k}]: {e.detail}")
+    engine = _require_engine()
+
+    # the whole batch may take a while to drain; scale the deadline with its size
+    timeout = engine.timeout + len(batch.orders) * 1e-3
+    t1 = time.perf_counter_ns()
+    results = await _engine_call(engine.submit_many([o.model_dump() for o in batch.orders], timeout=timeout))
+    t2 = time.perf_counter_ns()
+
+    for reports in results:
+        _apply_engine_reports(reports)
+    t3 = time.perf_counter_ns()
+
+    # one sample per batch; per-order timings come from the bridge
+    LATENCY.record("batch_risk", t1 - t0)
+    LATENCY.record("batch_submit", t2 - t1)
+    LATENCY.record("batch_apply", t3 - t2)
+    LATENCY.record("batch_total", t3 - t0)
+
+    return {
+        "status": "submitted",
+        "count": len(results),
+        "results": [{"order_id": o.order_id, "reports": r} for o, r in zip(batch.orders, results)],
+    }
+
+
+@app.post("/cancel_order")
+async def cancel_order(req: CancelRequest):
+    engine = _require_engine()
+    reports = await _engine_call(engine.cancel(req.order_id, req.symbol))
+    _apply_engine_reports(reports)
+    return {"status": "cancelled" if reports[-1].get("type") == "cancelled" else "rejected", "reports": reports}
+
+
 
 @app.get("/metrics", response_model=MetricsResponse)
 def get_metrics() -> MetricsResponse:
-    equity = SESSION_STATE.equity
-    trade_pnls = [equity[i] - equity[i - 1] for i in range(1, len(equity))]
-    return compute_metrics(equity, trade_pnls)
+    # maintained incrementally on every equity point, so this is O(1)
+    return SESSION_STATE.metrics_snapshot()
+
+
+@app.get("/equity")
+def equity(start: Optional[float] = None, end: Optional[float] = None, resolution: str = "1s"):
+    """Session equity between unix timestamps start/end at raw, 1s or 1m resolution."""
+    try:
+        return SESSION_STATE.equity.query(start=start, end=end, resolution=resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _register_ws_producers() -> None:
+    """(Re)bind the broadcaster's producers to the current session state."""
+    last_portfolio: list = [None]
+    fill_seq = [SESSION_STATE.fill_seq]
+
+    def portfolio_frame():
+        snap = PORTFOLIO.snapshot()
+        delta = portfolio_delta(last_portfolio[0], snap)
+        last_portfolio[0] = snap
+        return delta
+
+    def fills_frame():
+        new, missed = SESSION_STATE.fills_since(fill_seq[0])
+        fill_seq[0] = SESSION_STATE.fill_seq
+        BROADCASTER.note_dropped("fills", missed)
+        return new or None
+
+    BROADCASTER.add_producer("metrics", lambda: SESSION_STATE.metrics_snapshot().model_dump())
+    BROADCASTER.add_producer("portfolio", portfolio_frame)
+    BROADCASTER.add_producer("fills", fills_frame)
 
 
 @app.websocket("/ws/metrics")
-async def ws_metrics(ws: WebSocket):
+async def ws_metrics(ws: WebSocket, topics: Optional[str] = None):
+    """
+    Without ?topics: one metrics JSON object per interval (original format).
+    With ?topics=metrics,portfolio,fills: {"topic", "data"} frames, where
+    portfolio is a delta by symbol (first frame full) and fills are
+    {"events": [...], "dropped": n} with only fills since the last frame.
+    """
+    wanted = [t.strip() for t in topics.split(",") if t.strip()] if topics else ["metrics"]
+    enveloped = topics is not None
+    # accept first: a close before the handshake is an HTTP 403 and the reason is lost
     await ws.accept()
+    try:
+        sub = BROADCASTER.subscribe(wanted)
+    except ValueError as e:
+        await ws.close(code=1008, reason=str(e))
+        return
+
+    # current state right away; the publisher's frames follow
+    sub.offer("metrics", SESSION_STATE.metrics_snapshot().model_dump())
+    sub.offer("portfolio", portfolio_delta(None, PORTFOLIO.snapshot()))
     try:
         while True:
-            m = get_metrics()
-            await ws.send_json(m.model_dump())
-            await asyncio.sleep(SETTINGS.metrics_ws_interval_sec)
+            for topic, data in await sub.get():
+                await ws.send_json({"topic": topic, "data": data} if enveloped else data)
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print("WS metrics closed:", repr(e))
+    finally:
+        BROADCASTER.unsubscribe(sub)
+
+
+@app.get("/debug/latency")
+def debug_latency(symbol: Optional[str] = None):
+    """
+    Per-stage latency (us): count, min/mean/max, p50/p99/p999, plus a
+    by_symbol breakdown. Handler stages: risk, submit, apply, total (and
+    batch_* for /execute_orders). Bridge stages: bridge_write, bridge_rtt,
+    and from engine ts_ms stamps (ms resolution): to_engine, engine,
+    from_engine. POST /debug/latency/reset clears the histograms.
+    """
+    return {"enabled": LATENCY.enabled, "stages": LATENCY.snapshot(symbol=symbol)}
+
+
+@app.post("/debug/latency/reset")
+def debug_latency_reset():
+    LATENCY.reset()
+    return {"status": "reset"}
+
+
+@app.get("/debug/ingest")
+def debug_ingest():
+    """Market data counters: messages, messages_per_sec, conflated_ratio, reconnects, ..."""
+    if INGESTOR is None:
+        return {"running": False}
+    return {
+        "running": bool(BINANCE_TASK and not BINANCE_TASK.done()),
+        "symbols": INGESTOR.symbols,
+        "url": INGESTOR.url,
+        "ticks_recorded": INGESTOR.recorder.recorded if INGESTOR.recorder is not None else None,
+        "ticks_dropped": getattr(INGESTOR.recorder, "dropped", None),
+        "tick_error": getattr(INGESTOR.recorder, "error", None),
+        **INGESTOR.stats.snapshot(),
+    }
 
 
 @app.get("/health")
@@ -163,6 +343,7 @@ def health():
         "status": "ok",
         "engine_alive": bool(bridge and bridge.is_alive()),
         "engine_error": ENGINE_ERROR,
+        "ws_subscribers": BROADCASTER.subscribers,
     }
 @app.get("/")
 def root():
@@ -173,10 +354,12 @@ def root():
         "health": "/health",
         "metrics": "/metrics",
         "ws_metrics": "/ws/metrics",
+        "equity": "/equity",
+        "execute_orders": "/execute_orders",
     }
 @app.get("/portfolio")
 def portfolio():
     return PORTFOLIO.snapshot()
 @app.get("/fills")
 def fills():
-    return SESSION_STATE.fills
+    return list(SESSION_STATE.fills)
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from functools import partial
+
+import numpy as np
+
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import Literal, Optional, List, Dict, Any
 
+from backend.config import SETTINGS
 from backend.services.metrics import compute_metrics
 from backend.backtest.engine import BacktestEngine
 from backend.backtest.costs import BpsCostModel
-from backend.backtest.data import Quote, quotes_from_mid_prices, quotes_from_yahoo_df
-from backend.backtest.synthetic.gbm import generate_gbm_prices
-from backend.backtest.synthetic.orderbook_sim import orderbook_sim
+from backend.backtest.data import QuoteFrame, quotes_from_yahoo_df
+from backend.backtest.synthetic.gbm import gbm_quote_frame, gbm_quote_panel
+from backend.backtest.synthetic.orderbook_sim import orderbook_chunks, orderbook_frame
 from backend.backtest.strategies.momentum import MomentumStrategy
-from backend.backtest.walkforward import walk_forward
-from backend.backtest.sweeps import grid_sweep
+from backend.backtest.strategies.cross_sectional import CrossSectionalMomentumStrategy
+from backend.backtest.panel import PanelBacktestEngine, QuotePanel
+from backend.backtest.walkforward import walk_forward, walk_forward_incremental
+from backend.backtest.sweeps import grid_sweep, rank_results
+from backend.backtest.batched import PositionPaths, evaluate_momentum_grid, momentum_target_matrix
+from backend.backtest.cache import QUOTE_CACHE, SIGNAL_CACHE, cache_stats, content_key
+from backend.backtest.shared import SharedQuoteFrame, SharedFrameHandle, attach_quote_frame
 from backend.backtest.stats import bootstrap_mean_ci, permutation_test_mean_gt_zero
-from backend.data.yahoo import load_yahoo
+from backend.backtest.profiling import Profiler, PstatsDump, activate, current_profiler, stage_fn
+from backend.data.yahoo import bar_store, load_yahoo
+from backend.data.ticks import TickStore, to_ns
 
 backtest_router = APIRouter(tags=["backtest"])
 
@@ -22,7 +34,7 @@ backtest_router = APIRouter(tags=["backtest"])
 class BacktestRequest(BaseModel):
     symbol: str = Field(default="BTCUSDT", min_length=1)
 
-    data_source: Literal["gbm", "orderbook", "yahoo"] = "gbm"
+    data_source: Literal["gbm", "orderbook", "yahoo", "ticks"] = "gbm"
 
     # common length / seed
     steps: int = Field(default=500, ge=50, le=20000)
@@ -41,6 +53,11 @@ class BacktestRequest(BaseModel):
     end: str = Field(default="2025-01-01")    # YYYY-MM-DD
     interval: str = Field(default="1d")
 
+    # ticks params (recorded under SETTINGS.tick_dir for `symbol`); ISO date/datetime,
+    # UTC, end exclusive, None = open-ended. At most `steps` ticks are replayed.
+    tick_start: Optional[str] = None
+    tick_end: Optional[str] = None
+
     # strategy params
     strategy: Literal["momentum"] = "momentum"
     lookback: int = Field(default=10, ge=2, le=2000)
@@ -50,6 +67,11 @@ class BacktestRequest(BaseModel):
     fee_bps: float = Field(default=1.0, ge=0)
     slippage_bps: float = Field(default=2.0, ge=0)
 
+    # per-stage calls / time / allocations in the response's "profile";
+    # profile_dump also writes a cProfile file under SETTINGS.profile_dir
+    profile: bool = False
+    profile_dump: bool = False
+
 
 class BacktestResponse(BaseModel):
     symbol: str
@@ -57,126 +79,353 @@ class BacktestResponse(BaseModel):
     trades: List[Dict[str, Any]]
     metrics: Dict[str, Any]
     stats: Dict[str, Any]
+    profile: Optional[Dict[str, Any]] = None
+
+
+# bump when a generator's output for the same params changes
+_QUOTE_VERSION = 1
 
 
-def _make_quotes(req: BacktestRequest) -> List[Quote]:
+def _quote_key(req: BacktestRequest) -> Optional[str]:
+    """Content key of the request's quote series, or None if it is not reproducible."""
     if req.data_source == "gbm":
-        prices = generate_gbm_prices(
+        if req.seed is None:
+            return None
+        params = [req.steps, req.start_price, req.mu, req.sigma, req.spread_bps, req.seed]
+    elif req.data_source == "orderbook":
+        if req.seed is None:
+            return None
+        params = [req.steps, req.start_price, req.spread_bps, req.vol_bps, req.seed]
+    elif req.data_source == "yahoo":
+        # the bar store grows (imports, gap fetches): key on its generation, and
+        # not at all while the range still has gaps a fetch may fill
+        store = bar_store()
+        meta = store.meta(req.yahoo_symbol, req.interval)
+        if meta is None or (
+            SETTINGS.bar_fetch and store.missing(req.yahoo_symbol, req.interval, to_ns(req.start), to_ns(req.end))
+        ):
+            return None
+        params = [req.yahoo_symbol, req.start, req.end, req.interval, req.spread_bps, meta["gen"]]
+    else:
+        # ticks: the store is still being appended to, so a range is not stable
+        return None
+    return content_key("quotes", _QUOTE_VERSION, req.data_source, params)
+
+
+def _make_quotes(req: BacktestRequest) -> QuoteFrame:
+    key = _quote_key(req)
+    if key is None:
+        return _build_quotes(req)
+    return QuoteFrame(QUOTE_CACHE.get_or_compute(key, lambda: _build_quotes(req).data))
+
+
+def _momentum_targets(req: BacktestRequest, strat: MomentumStrategy, quotes: QuoteFrame):
+    key = _quote_key(req)
+    if key is None:
+        return strat.target_positions(quotes)
+    return SIGNAL_CACHE.get_or_compute(
+        content_key("momentum", key, strat.lookback, strat.qty),
+        lambda: strat.target_positions(quotes),
+    )
+
+
+def _build_quotes(req: BacktestRequest) -> QuoteFrame:
+    if req.data_source == "gbm":
+        return gbm_quote_frame(
             steps=req.steps,
             start=req.start_price,
             mu=req.mu,
             sigma=req.sigma,
+            spread_bps=req.spread_bps,
             seed=req.seed,
         )
-        return quotes_from_mid_prices(prices, spread_bps=req.spread_bps)
 
     if req.data_source == "orderbook":
-        stream = list(
-            orderbook_sim(
-                steps=req.steps,
-                mid_start=req.start_price,
-                spread_bps=req.spread_bps,
-                vol_bps=req.vol_bps,
-                seed=req.seed,
-            )
+        return orderbook_frame(
+            steps=req.steps,
+            mid_start=req.start_price,
+            spread_bps=req.spread_bps,
+            vol_bps=req.vol_bps,
+            seed=req.seed,
         )
-        quotes: List[Quote] = []
-        for i, q in enumerate(stream):
-            quotes.append(Quote(i=i, mid=float(q["mid"]), bid=float(q["bid"]), ask=float(q["ask"])))
-        return quotes
 
     if req.data_source == "yahoo":
         df = load_yahoo(req.yahoo_symbol, start=req.start, end=req.end, interval=req.interval)
+        if df.empty:
+            raise HTTPException(status_code=404, detail=f"No bars for {req.yahoo_symbol} in range")
         # treat close as mid and construct bid/ask from spread_bps
         return quotes_from_yahoo_df(df, price_col="close", spread_bps=req.spread_bps)
 
+    if req.data_source == "ticks":
+        frame = TickStore(SETTINGS.tick_dir).load_frame(
+            req.symbol, req.tick_start, req.tick_end, max_rows=req.steps
+        )
+        if not len(frame):
+            raise HTTPException(status_code=404, detail=f"No recorded ticks for {req.symbol} in range")
+        return frame
+
     raise ValueError("Unknown data_source")
 
 
-def _run_once(req: BacktestRequest) -> Dict[str, Any]:
-    quotes = _make_quotes(req)
+def _run_once(req: BacktestRequest, quotes: Optional[QuoteFrame] = None) -> Dict[str, Any]:
+    prof = Profiler() if req.profile else None
+    stage = stage_fn(prof)
+    with activate(prof):
+        if quotes is None:
+            with stage("quotes"):
+                quotes = _make_quotes(req)
 
-    strat = MomentumStrategy(symbol=req.symbol, lookback=req.lookback, qty=req.qty)
-    cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
+        strat = MomentumStrategy(symbol=req.symbol, lookback=req.lookback, qty=req.qty)
+        cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
 
-    engine = BacktestEngine(symbol=req.symbol, strategy=strat, cost_model=cost)
-    out = engine.run(quotes)
+        with stage("signals"):
+            targets = _momentum_targets(req, strat, quotes)
+        engine = BacktestEngine(symbol=req.symbol, strategy=strat, cost_model=cost)
+        out = engine.run(quotes, targets=targets)
 
-    equity = out["equity"]
-    trade_pnls = [equity[i] - equity[i - 1] for i in range(1, len(equity))]
-    metrics = compute_metrics(equity, trade_pnls).model_dump()
+        with stage("metrics"):
+            equity = out["equity"]
+            trade_pnls = [equity[i] - equity[i - 1] for i in range(1, len(equity))]
+            metrics = compute_metrics(equity, trade_pnls).model_dump()
+
+        # stats on trade_pnls (simple but useful)
+        with stage("stats"):
+            stats = {
+                "bootstrap_pnl_mean_ci": bootstrap_mean_ci(trade_pnls, seed=req.seed),
+                "perm_test_mean_gt_zero": permutation_test_mean_gt_zero(trade_pnls, seed=req.seed),
+            }
+
+    res = {"equity": equity, "trades": out["trades"], "metrics": metrics, "stats": stats}
+    if prof is not None:
+        res["profile"] = prof.report()
+    return res
 
-    # stats on trade_pnls (simple but useful)
-    stats = {
-        "bootstrap_pnl_mean_ci": bootstrap_mean_ci(trade_pnls, seed=req.seed),
-        "perm_test_mean_gt_zero": permutation_test_mean_gt_zero(trade_pnls, seed=req.seed),
-    }
 
-    return {"equity": equity, "trades": out["trades"], "metrics": metrics, "stats": stats}
+def _profile_section(prof: Optional[Profiler], dump: PstatsDump) -> Optional[Dict[str, Any]]:
+    """Payload "profile": the stage report plus the pstats path, or None if neither was asked for."""
+    return _profile_payload(prof.report() if prof is not None else None, dump)
+
+
+def _profile_payload(report: Optional[Dict[str, Any]], dump: PstatsDump) -> Optional[Dict[str, Any]]:
+    if report is None and not dump.enabled:
+        return None
+    out = dict(report or {})
+    if dump.enabled:
+        out["pstats"] = dump.path
+        if dump.error:
+            out["pstats_error"] = dump.error
+    return out
+
+
+@backtest_router.get("/cache")
+def get_cache_stats():
+    return cache_stats()
 
 
 @backtest_router.post("/run", response_model=BacktestResponse)
 def run_backtest(req: BacktestRequest) -> BacktestResponse:
-    out = _run_once(req)
+    with PstatsDump(SETTINGS.profile_dir, "run", enabled=req.profile_dump) as dump:
+        out = _run_once(req)
+    out["profile"] = _profile_payload(out.get("profile"), dump)
     return BacktestResponse(symbol=req.symbol, **out)
 
 
+class StreamBacktestRequest(BacktestRequest):
+    # streamed sources only; the quote series is never materialized
+    data_source: Literal["orderbook", "ticks"] = "orderbook"
+    steps: int = Field(default=1_000_000, ge=50, le=1_000_000_000)
+
+    window: Optional[int] = Field(default=None, ge=1, le=100_000)
+    equity_points: int = Field(default=2000, ge=2, le=100_000)
+    max_trades: int = Field(default=1000, ge=0, le=100_000)
+
+
+def _iter_quotes(req: StreamBacktestRequest):
+    if req.data_source == "orderbook":
+        return orderbook_chunks(
+            steps=req.steps,
+            mid_start=req.start_price,
+            spread_bps=req.spread_bps,
+            vol_bps=req.vol_bps,
+            seed=req.seed,
+        )
+
+    if req.data_source == "ticks":
+        # memory-mapped chunks; only one frame of ticks is resident at a time
+        return TickStore(SETTINGS.tick_dir).iter_frames(
+            req.symbol, req.tick_start, req.tick_end, max_rows=req.steps
+        )
+
+    raise ValueError("Unknown data_source")
+
+
+@backtest_router.post("/stream")
+def run_stream_backtest(req: StreamBacktestRequest):
+    strat = MomentumStrategy(symbol=req.symbol, lookback=req.lookback, qty=req.qty)
+    cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
+
+    engine = BacktestEngine(symbol=req.symbol, strategy=strat, cost_model=cost)
+    out = engine.run_stream(
+        _iter_quotes(req),
+        window=req.window,
+        equity_every=max(1, -(-req.steps // req.equity_points)),
+        max_trades=req.max_trades,
+    )
+
+    return {"symbol": req.symbol, **out}
+
+
+class PanelBacktestRequest(BacktestRequest):
+    # gbm: n_symbols independent paths; yahoo: `symbols` from the bar store
+    data_source: Literal["gbm", "yahoo"] = "gbm"
+    symbols: List[str] = Field(default_factory=list, max_length=5000)
+    n_symbols: int = Field(default=100, ge=1, le=5000)
+
+    # xs_momentum: top_k by trailing return, equal weight; momentum: per-symbol qty
+    strategy: Literal["xs_momentum", "momentum"] = "xs_momentum"
+    top_k: int = Field(default=10, ge=1)
+    long_short: bool = False
+    gross: float = Field(default=1.0, gt=0)
+    rebalance_every: int = Field(default=1, ge=1)
+
+    max_trades: int = Field(default=1000, ge=0, le=100_000)
+
+
+def _make_panel(req: PanelBacktestRequest) -> QuotePanel:
+    if req.data_source == "gbm":
+        return gbm_quote_panel(
+            n_symbols=req.n_symbols,
+            steps=req.steps,
+            start=req.start_price,
+            mu=req.mu,
+            sigma=req.sigma,
+            spread_bps=req.spread_bps,
+            seed=req.seed,
+        )
+
+    if req.data_source == "yahoo":
+        if not req.symbols:
+            raise HTTPException(status_code=422, detail="yahoo panel needs symbols")
+        bars = {s: load_yahoo(s, start=req.start, end=req.end, interval=req.interval) for s in req.symbols}
+        missing = [s for s, df in bars.items() if df.empty]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"No bars for {', '.join(missing)} in range")
+        return QuotePanel.from_bars(bars, price_col="close", spread_bps=req.spread_bps)
+
+    raise ValueError("Unknown data_source")
+
+
+@backtest_router.post("/panel")
+def run_panel_backtest(req: PanelBacktestRequest):
+    panel = _make_panel(req)
+
+    if req.strategy == "xs_momentum":
+        strat = CrossSectionalMomentumStrategy(
+            lookback=req.lookback,
+            top_k=req.top_k,
+            long_short=req.long_short,
+            gross=req.gross,
+            rebalance_every=req.rebalance_every,
+        )
+    else:
+        strat = MomentumStrategy(symbol=req.symbol, lookback=req.lookback, qty=req.qty)
+    cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
+
+    out = PanelBacktestEngine(strategy=strat, cost_model=cost).run(panel, max_trades=req.max_trades)
+
+    equity = out["equity"]
+    pnls = [equity[i] - equity[i - 1] for i in range(1, len(equity))]
+    metrics = compute_metrics(equity, pnls).model_dump()
+    return {"symbols": panel.symbols, "bars": len(panel), "metrics": metrics, **out}
+
+
 class WalkForwardRequest(BacktestRequest):
     train_size: int = Field(default=300, ge=50, le=20000)
     test_size: int = Field(default=100, ge=10, le=20000)
+    workers: int = Field(default=1, ge=1, le=64)
+    executor: Literal["thread", "process"] = "process"
+    # score every candidate lookback once over the whole series instead of refitting per fold
+    incremental: bool = False
+
+
+# candidate lookbacks the walk-forward "fit" chooses from
+_WF_LOOKBACKS = [5, 10, 20, 40, 80]
+
+
+# module-level (picklable) so folds can run in a process pool
+def _wf_factory(req: WalkForwardRequest, train_quotes: QuoteFrame):
+    # simple "fit": choose lookback that maximizes momentum win-rate on train (cheap heuristic);
+    # all candidates are scored from one batched signal / equity matrix
+    lookbacks = _WF_LOOKBACKS
+    with stage_fn(current_profiler())("candidates"):
+        paths = PositionPaths(train_quotes, momentum_target_matrix(train_quotes.mid, lookbacks, req.qty))
+        eq = paths.equity(req.slippage_bps)
+    if eq.shape[1] < 2:
+        return MomentumStrategy(symbol=req.symbol, lookback=lookbacks[0], qty=req.qty)
+    win_rate = (np.diff(eq, axis=1) > 0).sum(axis=1) / (eq.shape[1] - 1)
+    # argmax keeps the first best, as the strict ">" scan did
+    return MomentumStrategy(symbol=req.symbol, lookback=lookbacks[int(np.argmax(win_rate))], qty=req.qty)
+
+
+def _wf_runner(req: WalkForwardRequest, strategy, test_quotes: QuoteFrame):
+    cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
+    eng = BacktestEngine(symbol=req.symbol, strategy=strategy, cost_model=cost)
+    return eng.run(test_quotes)
 
 
 @backtest_router.post("/walkforward")
 def run_walkforward(req: WalkForwardRequest):
-    quotes = _make_quotes(req)
-
-    def factory(train_quotes: List[Quote]):
-        # simple "fit": choose lookback that maximizes momentum win-rate on train (cheap heuristic)
-        best_lb = req.lookback
-        best_score = -1.0
-        for lb in [5, 10, 20, 40, 80]:
-            strat = MomentumStrategy(symbol=req.symbol, lookback=lb, qty=req.qty)
-            cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
-            eng = BacktestEngine(symbol=req.symbol, strategy=strat, cost_model=cost)
-            out = eng.run(train_quotes) or {}
-            eq = out.get("equity") or []
-            if len(eq) < 2:
-                score = -1.0
-            else:
-                pnls = [eq[i] - eq[i-1] for i in range(1, len(eq))]
-                wins = sum(1 for p in pnls if p > 0)
-                score = wins / (len(pnls) or 1)
-
-            if score > best_score:
-                best_score = score
-                best_lb = lb
-        return MomentumStrategy(symbol=req.symbol, lookback=best_lb, qty=req.qty)
-
-    def runner(strategy, test_quotes: List[Quote]):
-        cost = BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps)
-        eng = BacktestEngine(symbol=req.symbol, strategy=strategy, cost_model=cost)
-        return eng.run(test_quotes)
-
-    wf = walk_forward(
-        data=quotes,
-        train_size=req.train_size,
-        test_size=req.test_size,
-        strategy_factory=factory,
-        backtest_runner=runner,
-    )
+    prof = Profiler() if req.profile else None
+    stage = stage_fn(prof)
+    with PstatsDump(SETTINGS.profile_dir, "walkforward", enabled=req.profile_dump) as dump, activate(prof):
+        with stage("quotes"):
+            quotes = _make_quotes(req)
+
+        if req.incremental:
+            with stage("candidates"):
+                candidates = momentum_target_matrix(quotes.mid, _WF_LOOKBACKS, req.qty)
+            wf = walk_forward_incremental(
+                data=quotes,
+                train_size=req.train_size,
+                test_size=req.test_size,
+                candidate_targets=candidates,
+                symbol=req.symbol,
+                cost_model=BpsCostModel(fee_bps=req.fee_bps, slippage_bps=req.slippage_bps),
+            )
+            for c in wf["chunks"]:
+                c["lookback"] = _WF_LOOKBACKS[c.pop("candidate")]
+        else:
+            # folds profile themselves (they may run in worker processes)
+            wf = walk_forward(
+                data=quotes,
+                train_size=req.train_size,
+                test_size=req.test_size,
+                strategy_factory=partial(_wf_factory, req),
+                backtest_runner=partial(_wf_runner, req),
+                workers=req.workers,
+                executor=req.executor,
+                profile=req.profile,
+            )
+            if prof is not None:
+                prof.merge(wf.pop("profile", None))
 
-    chunks = wf["chunks"]
+        chunks = wf["chunks"]
 
-    # compute metrics per chunk
-    chunk_metrics = []
-    for c in chunks:
-        eq = c.get("equity") or []
-        eq = [float(x) for x in eq]
-        pnls = [eq[i] - eq[i - 1] for i in range(1, len(eq))] if len(eq) >= 2 else []
-        m = compute_metrics(eq, pnls).model_dump()
-        chunk_metrics.append({"start": c["start"], "end": c["end"], "metrics": m})
+        # compute metrics per chunk
+        chunk_metrics = []
+        with stage("metrics"):
+            for c in chunks:
+                eq = c.get("equity") or []
+                eq = [float(x) for x in eq]
+                pnls = [eq[i] - eq[i - 1] for i in range(1, len(eq))] if len(eq) >= 2 else []
+                m = compute_metrics(eq, pnls).model_dump()
+                chunk_metrics.append({"start": c["start"], "end": c["end"], "metrics": m})
 
-    return {"chunks": chunks, "chunk_metrics": chunk_metrics}
+    out = {"chunks": chunks, "chunk_metrics": chunk_metrics}
+    profile = _profile_section(prof, dump)
+    if profile is not None:
+        out["profile"] = profile
+    return out
 
 
 
@@ -186,6 +435,24 @@ class SweepRequest(BacktestRequest):
     slippage_bps_list: List[float] = Field(default_factory=lambda: [0.0, 2.0, 5.0])
     top_k: int = Field(default=10, ge=1, le=50)
     score_key: Literal["sharpe", "sortino", "max_drawdown_pct", "profit_factor", "win_rate"] = "sharpe"
+    workers: int = Field(default=1, ge=1, le=64)
+    # evaluate the whole grid from one signal matrix (workers unused); False runs one engine per point
+    batched: bool = True
+
+
+# per-process quote series for sweep pool workers (set by _init_sweep_worker)
+_SWEEP_QUOTES: Optional[QuoteFrame] = None
+_SWEEP_SHM = None
+
+
+def _init_sweep_worker(handle: SharedFrameHandle) -> None:
+    global _SWEEP_QUOTES, _SWEEP_SHM
+    _SWEEP_QUOTES, _SWEEP_SHM = attach_quote_frame(handle)
+
+
+def _sweep_worker(base: Dict[str, Any], p: Dict[str, Any]) -> Dict[str, Any]:
+    r = BacktestRequest(**{**base, **p})
+    return _run_once(r, quotes=_SWEEP_QUOTES)
 
 
 @backtest_router.post("/sweep")
@@ -198,21 +465,60 @@ def run_sweep(req: SweepRequest):
         "slippage_bps": req.slippage_bps_list,
     }
 
-    def runner(p: Dict[str, Any]) -> Dict[str, Any]:
-        r = BacktestRequest(**{**base, **p})
-        out = _run_once(r)
-        return out
-
-    top = grid_sweep(param_grid=grid, runner=runner, score_key=req.score_key, top_k=req.top_k)
+    prof = Profiler() if req.profile else None
+    stage = stage_fn(prof)
+    # per-point runners return their own profile (req.profile is in base), merged here
+    on_result = (lambda r: prof.merge(r.get("profile"))) if prof is not None else None
+
+    with PstatsDump(SETTINGS.profile_dir, "sweep", enabled=req.profile_dump) as dump, activate(prof):
+        # grid params never touch the data source, so build the series once
+        with stage("quotes"):
+            quotes = _make_quotes(req)
+
+        if req.batched:
+            with stage("grid"):
+                results = evaluate_momentum_grid(
+                    quotes,
+                    lookbacks=req.lookbacks,
+                    fee_bps_list=req.fee_bps_list,
+                    slippage_bps_list=req.slippage_bps_list,
+                    qty=req.qty,
+                    score_key=req.score_key,
+                )
+            top = rank_results(results, req.top_k)
+        elif req.workers <= 1:
+            def runner(p: Dict[str, Any]) -> Dict[str, Any]:
+                r = BacktestRequest(**{**base, **p})
+                return _run_once(r, quotes=quotes)
+
+            top = grid_sweep(
+                param_grid=grid, runner=runner, score_key=req.score_key, top_k=req.top_k, on_result=on_result
+            )
+        else:
+            with SharedQuoteFrame(quotes) as shared:
+                top = grid_sweep(
+                    param_grid=grid,
+                    runner=partial(_sweep_worker, base),
+                    score_key=req.score_key,
+                    top_k=req.top_k,
+                    workers=req.workers,
+                    initializer=_init_sweep_worker,
+                    initargs=(shared.handle,),
+                    on_result=on_result,
+                )
     # shrink payload a bit
     compact = [
         {
             "params": t["params"],
             "score": t["score"],
             "metrics": t["metrics"],
-            "trades": len(t.get("trades", [])),
-            "final_equity": (t.get("equity") or [None])[-1],
+            "trades": t["trade_count"] if "trade_count" in t else len(t.get("trades", [])),
+            "final_equity": t["final_equity"] if "final_equity" in t else (t.get("equity") or [None])[-1],
         }
         for t in top
     ]
-    return {"top": compact}
+    out: Dict[str, Any] = {"top": compact}
+    profile = _profile_section(prof, dump)
+    if profile is not None:
+        out["profile"] = profile
+    return out
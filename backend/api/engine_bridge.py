@@ -1,13 +1,28 @@
 # backend/api/engine_bridge.py
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import queue
 import subprocess
 import threading
 import time
+from collections import deque
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Sequence, Tuple, Union
+
+from backend.api import engine_protocol as proto
+from backend.services.latency import LatencyRecorder
+
+log = logging.getLogger(__name__)
+
+# an executable path, or a full argv (e.g. [sys.executable, "-m", "backend.bench.stub_engine"])
+EngineCommand = Union[str, Sequence[str]]
+
+
+def _argv(cmd: EngineCommand) -> List[str]:
+    return [cmd] if isinstance(cmd, str) else list(cmd)
 
 
 class EngineBridge:
@@ -19,7 +34,7 @@ class EngineBridge:
       - Engine writes one JSON object per line to stdout
     """
 
-    def __init__(self, exe_path: str):
+    def __init__(self, exe_path: EngineCommand):
         self.exe_path = exe_path
         self.proc: Optional[subprocess.Popen] = None
         self._out_q: "queue.Queue[str]" = queue.Queue()
@@ -32,7 +47,7 @@ class EngineBridge:
             return
 
         self.proc = subprocess.Popen(
-            [self.exe_path],
+            _argv(self.exe_path),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -117,6 +132,353 @@ class EngineBridge:
         return lines
 
 
+class EngineTimeout(Exception):
+    """No terminal report for an order within the timeout."""
+
+
+class AsyncEngineBridge:
+    """
+    asyncio NDJSON bridge with order-id correlation.
+
+    One reader task owns the engine's stdout and routes each report to the
+    pending order with the same order_id; an order resolves as soon as its
+    terminal report arrives (final fill, resting, cancelled or reject), so
+    many orders can be in flight and none waits for the pipe to go quiet.
+    Reports nobody is waiting for (engine_status, passive fills of resting
+    orders) go to on_report; an exception from it is logged and counted in
+    report_errors, and the reader carries on.
+
+    Uses asyncio's non-blocking subprocess pipes; on event loops without
+    subprocess support (SelectorEventLoop on Windows) it falls back to a
+    reader thread feeding the same asyncio stream.
+
+    protocol: "ndjson", "bin1" (length-prefixed binary records, see
+    engine_protocol.py) or "auto" (try bin1, fall back to ndjson). The
+    negotiated protocol is in self.protocol after start().
+
+    latency: optional LatencyRecorder; per order it gets the bridge round
+    trip ("bridge_rtt") and, from the engine's ts_ms stamps, "to_engine"
+    (write -> ack), "engine" (ack -> terminal report) and "from_engine"
+    (terminal report -> read). The engine stamps have ms resolution.
+    """
+
+    TERMINAL_TYPES = frozenset({"resting", "cancelled", "reject"})
+
+    def __init__(
+        self,
+        exe_path: EngineCommand,
+        *,
+        timeout: float = 2.0,
+        protocol: Literal["auto", "ndjson", "bin1"] = "auto",
+        negotiate_timeout: float = 1.0,
+    ):
+        self.exe_path = exe_path
+        self.timeout = timeout
+        self.requested_protocol = protocol
+        self.protocol: str = proto.PROTOCOL_NDJSON
+        self.negotiate_timeout = negotiate_timeout
+        self.on_report: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.report_errors = 0
+        self.latency: Optional[LatencyRecorder] = None
+
+        self._proc: Any = None  # asyncio.subprocess.Process | subprocess.Popen
+        self._stdout: Optional[asyncio.StreamReader] = None
+        self._stdin: Any = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._err_task: Optional[asyncio.Task] = None
+        self._threads: List[threading.Thread] = []
+        self._err_lines: Deque[str] = deque(maxlen=200)
+
+        # order_id -> (future, reports so far, [send perf_counter_ns, send wall ms])
+        self._pending: Dict[str, Tuple[asyncio.Future, List[Dict[str, Any]], List[int]]] = {}
+
+    # ---------- lifecycle ----------
+
+    async def start(self) -> None:
+        if self.is_alive():
+            return
+        if self._proc_running():
+            await self.stop()  # reader gone but the process is still up
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *_argv(self.exe_path),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            self._proc = proc
+            self._stdout = proc.stdout
+            self._stdin = proc.stdin
+            self._err_task = asyncio.create_task(self._err_loop(proc.stderr))
+        except NotImplementedError:
+            self._start_threaded()
+
+        self.protocol = proto.PROTOCOL_NDJSON
+        if self.requested_protocol != proto.PROTOCOL_NDJSON:
+            await self._negotiate()
+
+        self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _negotiate(self) -> None:
+        await self._write([proto.HELLO])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.negotiate_timeout
+        assert self._stdout is not None
+
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                line = await asyncio.wait_for(self._stdout.readline(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            try:
+                msg = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if msg.get("type") == "hello_ack" and msg.get("protocol") == proto.PROTOCOL_BIN1:
+                self.protocol = proto.PROTOCOL_BIN1
+                return
+            # an engine without bin1 treats the hello as an order with no id; drop those
+            if msg.get("order_id", None) == "":
+                continue
+            self._route(msg)
+
+        if self.requested_protocol == proto.PROTOCOL_BIN1:
+            await self.stop()
+            raise RuntimeError("Engine does not support the bin1 protocol")
+
+    def _start_threaded(self) -> None:
+        loop = asyncio.get_running_loop()
+        proc = subprocess.Popen(
+            _argv(self.exe_path),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        reader = asyncio.StreamReader()
+
+        def _pump():
+            # raw chunks: the stream may switch to binary frames after negotiation
+            for chunk in iter(lambda: proc.stdout.read(65536), b""):
+                loop.call_soon_threadsafe(reader.feed_data, chunk)
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+        def _err_pump():
+            for line in proc.stderr:
+                self._err_lines.append(line.decode("utf-8", "replace").rstrip("\n"))
+
+        self._proc = proc
+        self._stdout = reader
+        self._stdin = proc.stdin
+        self._threads = [
+            threading.Thread(target=_pump, daemon=True),
+            threading.Thread(target=_err_pump, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    async def stop(self) -> None:
+        proc = self._proc
+        if proc is not None and self._proc_running():
+            proc.terminate()
+            try:
+                if isinstance(proc, subprocess.Popen):
+                    await asyncio.get_running_loop().run_in_executor(None, proc.wait, 5.0)
+                else:
+                    await asyncio.wait_for(proc.wait(), timeout=5.0)
+            except (asyncio.TimeoutError, subprocess.TimeoutExpired):
+                proc.kill()
+
+        for task in (self._reader_task, self._err_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._reader_task = self._err_task = None
+        self._fail_pending(RuntimeError("Engine stopped"))
+        self._proc = None
+
+    def _proc_running(self) -> bool:
+        proc = self._proc
+        if proc is None:
+            return False
+        if isinstance(proc, subprocess.Popen):
+            return proc.poll() is None
+        return proc.returncode is None
+
+    def is_alive(self) -> bool:
+        """Engine process running and its reports still being read."""
+        task = self._reader_task
+        return self._proc_running() and (task is None or not task.done())
+
+    # ---------- orders ----------
+
+    async def submit(self, order: Dict[str, Any], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Send one order; returns its reports (ack ... terminal) as soon as they arrive."""
+        return (await self.submit_many([order], timeout=timeout))[0]
+
+    async def submit_many(
+        self, orders: List[Dict[str, Any]], timeout: Optional[float] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Send a batch of orders (or {"type": "cancel"} messages) in a single
+        write; returns each one's reports, in input order, once all of them
+        have completed.
+        """
+        ids = [str(o.get("order_id", "")) for o in orders]
+        if not all(ids):
+            raise ValueError("order must have an order_id")
+        if len(set(ids)) != len(ids):
+            raise ValueError("duplicate order_id in batch")
+        busy = [oid for oid in ids if oid in self._pending]
+        if busy:
+            raise ValueError(f"order_id {busy[0]!r} already in flight")
+
+        # encode before registering so a bad record leaves nothing pending
+        payload = self._encode(orders)
+        sent = [0, 0]
+        futs = [self._register(oid, sent) for oid in ids]
+        try:
+            sent[0] = t0 = time.perf_counter_ns()
+            sent[1] = time.time_ns() // 1_000_000
+            await self._write_raw(payload)
+            if self.latency is not None:
+                self.latency.record("bridge_write", time.perf_counter_ns() - t0)
+            done = await asyncio.wait_for(asyncio.gather(*futs), timeout or self.timeout)
+            return list(done)
+        except asyncio.TimeoutError:
+            late = [oid for oid, f in zip(ids, futs) if not f.done()]
+            raise EngineTimeout(f"no terminal report for order(s) {late[:5]!r}") from None
+        finally:
+            for oid in ids:
+                self._pending.pop(oid, None)
+
+    async def cancel(self, order_id: str, symbol: str, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Cancel a resting order; returns its reports up to cancelled / reject."""
+        return (await self.submit_many([{"type": "cancel", "order_id": order_id, "symbol": symbol}], timeout=timeout))[0]
+
+    def _register(self, order_id: str, sent: List[int]) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[order_id] = (fut, [], sent)
+        return fut
+
+    def _encode(self, orders: List[Dict[str, Any]]) -> bytes:
+        if self.protocol == proto.PROTOCOL_BIN1:
+            return proto.encode_orders(orders)
+        return proto.encode_ndjson(orders)
+
+    async def _write(self, messages: List[Dict[str, Any]]) -> None:
+        await self._write_raw(proto.encode_ndjson(messages))
+
+    async def _write_raw(self, payload: bytes) -> None:
+        if not self.is_alive() or self._stdin is None:
+            raise RuntimeError("Engine not running")
+
+        self._stdin.write(payload)
+        if isinstance(self._stdin, asyncio.StreamWriter):
+            await self._stdin.drain()
+        else:
+            self._stdin.flush()
+
+    # ---------- reader ----------
+
+    def _is_terminal(self, msg: Dict[str, Any]) -> bool:
+        kind = msg.get("type")
+        if kind == "fill":
+            # engines without a book send no leaves_qty: every fill is final
+            return float(msg.get("leaves_qty", 0.0)) <= 0.0
+        return kind in self.TERMINAL_TYPES
+
+    def _route(self, msg: Dict[str, Any]) -> None:
+        entry = self._pending.get(str(msg.get("order_id", "")))
+        if entry is None:
+            if self.on_report is not None:
+                try:
+                    self.on_report(msg)
+                except Exception:
+                    # a failing consumer must not stop the reader and strand every later order
+                    self.report_errors += 1
+                    log.exception("engine report handler failed on %s report", msg.get("type"))
+            return
+
+        fut, reports, sent = entry
+        reports.append(msg)
+        if self._is_terminal(msg):
+            del self._pending[str(msg.get("order_id", ""))]
+            if self.latency is not None:
+                self._record_latency(reports, sent)
+            if not fut.done():
+                fut.set_result(reports)
+
+    def _record_latency(self, reports: List[Dict[str, Any]], sent: List[int]) -> None:
+        rec = self.latency
+        assert rec is not None
+        last = reports[-1]
+        symbol = last.get("symbol") or None
+        rec.record("bridge_rtt", time.perf_counter_ns() - sent[0], symbol)
+
+        first = reports[0]
+        ack_ms, end_ms = first.get("ts_ms"), last.get("ts_ms")
+        if first.get("type") != "ack" or ack_ms is None or end_ms is None:
+            return
+        now_ms = time.time_ns() // 1_000_000
+        rec.record("to_engine", (int(ack_ms) - sent[1]) * 1_000_000, symbol)
+        rec.record("engine", (int(end_ms) - int(ack_ms)) * 1_000_000, symbol)
+        rec.record("from_engine", (now_ms - int(end_ms)) * 1_000_000, symbol)
+
+    async def _read_loop(self) -> None:
+        stdout = self._stdout
+        assert stdout is not None
+        header = proto.FRAME_HEADER
+        try:
+            if self.protocol == proto.PROTOCOL_BIN1:
+                while True:
+                    (size,) = header.unpack(await stdout.readexactly(header.size))
+                    payload = await stdout.readexactly(size)
+                    try:
+                        msg = proto.decode_report(payload)
+                    except proto.ProtocolError:
+                        continue
+                    self._route(msg)
+            else:
+                while True:
+                    line = await stdout.readline()
+                    if not line:
+                        break
+                    try:
+                        msg = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    self._route(msg)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            self._fail_pending(RuntimeError("Engine output closed"))
+
+    async def _err_loop(self, stream: asyncio.StreamReader) -> None:
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            self._err_lines.append(line.decode("utf-8", "replace").rstrip("\n"))
+
+    def _fail_pending(self, exc: Exception) -> None:
+        pending, self._pending = self._pending, {}
+        for fut, _, _ in pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+
+    def stderr_drain(self, max_lines: int = 200) -> List[str]:
+        lines: List[str] = []
+        while self._err_lines and len(lines) < max_lines:
+            lines.append(self._err_lines.popleft())
+        return lines
+
+
 def default_engine_path() -> str:
     root = Path(__file__).resolve().parents[2]  # repo root
     candidates = [
@@ -0,0 +1,154 @@
+# backend/api/engine_protocol.py
+"""
+Wire formats between EngineBridge and the C++ engine.
+
+ndjson: one JSON object per line (the original protocol, always available).
+
+bin1: negotiated by sending the NDJSON line {"type":"hello","protocol":"bin1"};
+an engine that supports it answers {"type":"hello_ack","protocol":"bin1"} and
+from then on both directions use frames:
+
+    uint32 length | payload (length bytes)
+
+payload starts with a uint8 record type, followed by a fixed little-endian
+layout (no padding). Strings are NUL-padded fixed-width byte fields.
+
+    to engine
+    ORDER      1  order_id[32] symbol[16] side:u8 qty:f64 px:f64
+    CANCEL     4  order_id[32] symbol[16]
+
+    from engine
+    ACK        2  order_id[32] symbol[16] ts_ms:i64
+    FILL       3  order_id[32] symbol[16] side:u8 qty:f64 px:f64 leaves_qty:f64 ts_ms:i64
+    RESTING    5  order_id[32] symbol[16] side:u8 leaves_qty:f64 px:f64 ts_ms:i64
+    CANCELLED  6  order_id[32] symbol[16] leaves_qty:f64 ts_ms:i64
+    REJECT     7  order_id[32] symbol[16] reason[48] ts_ms:i64
+
+side: 0 = BUY, 1 = SELL. engine-cpp/main.cpp mirrors these layouts.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any, Dict, Iterable
+
+PROTOCOL_NDJSON = "ndjson"
+PROTOCOL_BIN1 = "bin1"
+
+HELLO = {"type": "hello", "protocol": PROTOCOL_BIN1}
+
+# keep in step with backend/models/order.py, which rejects longer ids at the API
+ORDER_ID_LEN = 32
+SYMBOL_LEN = 16
+REASON_LEN = 48
+
+REC_ORDER = 1
+REC_ACK = 2
+REC_FILL = 3
+REC_CANCEL = 4
+REC_RESTING = 5
+REC_CANCELLED = 6
+REC_REJECT = 7
+
+_IDS = f"<B{ORDER_ID_LEN}s{SYMBOL_LEN}s"
+
+FRAME_HEADER = struct.Struct("<I")
+ORDER = struct.Struct(_IDS + "Bdd")
+CANCEL = struct.Struct(_IDS)
+ACK = struct.Struct(_IDS + "q")
+FILL = struct.Struct(_IDS + "Bdddq")
+RESTING = struct.Struct(_IDS + "Bddq")
+CANCELLED = struct.Struct(_IDS + "dq")
+REJECT = struct.Struct(_IDS + f"{REASON_LEN}sq")
+
+_SIDES = ("BUY", "SELL")
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def _fixed(value: Any, width: int, field: str) -> bytes:
+    raw = str(value).encode("utf-8")
+    if len(raw) > width:
+        raise ProtocolError(f"{field} longer than {width} bytes is not supported by {PROTOCOL_BIN1}")
+    return raw
+
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("utf-8", "replace")
+
+
+def _side(value: Any) -> int:
+    side = getattr(value, "value", value)
+    if side not in _SIDES:
+        raise ProtocolError(f"unknown side {side!r}")
+    return _SIDES.index(side)
+
+
+def _side_name(side: int) -> str:
+    return _SIDES[side] if side < len(_SIDES) else str(side)
+
+
+# ---------- ndjson ----------
+
+def encode_ndjson(messages: Iterable[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(m) + "\n" for m in messages).encode("utf-8")
+
+
+# ---------- bin1 ----------
+
+def encode_order(order: Dict[str, Any]) -> bytes:
+    """One ORDER frame, or a CANCEL frame for {"type": "cancel", ...}."""
+    oid = _fixed(order["order_id"], ORDER_ID_LEN, "order_id")
+    sym = _fixed(order["symbol"], SYMBOL_LEN, "symbol")
+    if order.get("type") == "cancel":
+        payload = CANCEL.pack(REC_CANCEL, oid, sym)
+    else:
+        payload = ORDER.pack(REC_ORDER, oid, sym, _side(order["side"]), float(order["qty"]), float(order["px"]))
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+def encode_orders(orders: Iterable[Dict[str, Any]]) -> bytes:
+    return b"".join(encode_order(o) for o in orders)
+
+
+def decode_report(payload: bytes) -> Dict[str, Any]:
+    """Engine frame -> the same dict the NDJSON protocol would have produced."""
+    if not payload:
+        raise ProtocolError("empty frame")
+    kind = payload[0]
+    size = len(payload)
+    if kind == REC_FILL and size == FILL.size:
+        _, oid, sym, side, qty, px, leaves, ts = FILL.unpack(payload)
+        return {
+            "type": "fill",
+            "order_id": _text(oid),
+            "symbol": _text(sym),
+            "side": _side_name(side),
+            "qty": qty,
+            "px": px,
+            "leaves_qty": leaves,
+            "ts_ms": ts,
+        }
+    if kind == REC_ACK and size == ACK.size:
+        _, oid, sym, ts = ACK.unpack(payload)
+        return {"type": "ack", "order_id": _text(oid), "symbol": _text(sym), "ts_ms": ts}
+    if kind == REC_RESTING and size == RESTING.size:
+        _, oid, sym, side, leaves, px, ts = RESTING.unpack(payload)
+        return {
+            "type": "resting",
+            "order_id": _text(oid),
+            "symbol": _text(sym),
+            "side": _side_name(side),
+            "leaves_qty": leaves,
+            "px": px,
+            "ts_ms": ts,
+        }
+    if kind == REC_CANCELLED and size == CANCELLED.size:
+        _, oid, sym, leaves, ts = CANCELLED.unpack(payload)
+        return {"type": "cancelled", "order_id": _text(oid), "symbol": _text(sym), "leaves_qty": leaves, "ts_ms": ts}
+    if kind == REC_REJECT and size == REJECT.size:
+        _, oid, sym, reason, ts = REJECT.unpack(payload)
+        return {"type": "reject", "order_id": _text(oid), "symbol": _text(sym), "reason": _text(reason), "ts_ms": ts}
+    raise ProtocolError(f"unknown record type {kind} (len {size})")
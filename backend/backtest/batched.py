@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.metrics import compute_metrics_batch
+from backend.services.portfolio import PortfolioState
+from backend.backtest.costs import BpsCostModel
+from backend.backtest.data import QuoteFrame
+
+
+def momentum_target_matrix(mids: np.ndarray, lookbacks: Sequence[int], qty: float = 1.0) -> np.ndarray:
+    """(lookbacks, T) MomentumStrategy.target_positions for every lookback in one pass."""
+    mids = np.asarray(mids, dtype=float)
+    out = np.zeros((len(lookbacks), mids.size))
+    for k, lb in enumerate(lookbacks):
+        if lb < mids.size:
+            np.greater(mids[lb:], mids[:-lb], out=out[k, lb:], casting="unsafe")
+    out *= float(qty)
+    return out
+
+
+def held_positions(targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row-wise BacktestEngine dead-band: (positions, deltas, traded mask)
+    for a (K, T) target matrix. Bars trade where the target moved, which
+    matches the engine for targets that step by 0 or by more than 1e-9,
+    such as momentum_target_matrix's 0/qty rows.
+    """
+    K, T = targets.shape
+    moved = np.abs(np.diff(targets, axis=1, prepend=0.0)) > 1e-9
+    last = np.maximum.accumulate(np.where(moved, np.arange(T), -1), axis=1)
+    pos = np.where(last >= 0, np.take_along_axis(targets, np.maximum(last, 0), axis=1), 0.0)
+    delta = np.diff(pos, axis=1, prepend=0.0)
+    return pos, delta, moved
+
+
+class PositionPaths:
+    """
+    Shared (K, T) position paths over one quote series. Cost settings only
+    change fill prices, so each one is applied to the same paths with array
+    ops: equity(slippage) is one cumsum, fees(fee, slippage) one sum.
+    Accounting matches BacktestEngine's vectorized path.
+    """
+
+    def __init__(self, quotes: QuoteFrame, targets: np.ndarray, cash: Optional[float] = None):
+        self.quotes = quotes
+        # same starting cash as BacktestEngine's portfolio
+        self.cash = float(PortfolioState(record_equity=False).cash if cash is None else cash)
+        self.pos, self.delta, self.moved = held_positions(np.atleast_2d(np.asarray(targets, dtype=float)))
+        self.trade_counts = self.moved.sum(axis=1)
+        self._marked = self.pos * quotes.mid
+        self._fills: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _fill(self, slippage_bps: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(K, T) fill prices (0 where no trade) and per-row traded notional."""
+        hit = self._fills.get(slippage_bps)
+        if hit is None:
+            t_row, t_col = np.nonzero(self.moved)
+            d = self.delta[t_row, t_col]
+            px, _ = BpsCostModel(0.0, slippage_bps).fill_from_quotes(
+                delta=d, bid=self.quotes.bid[t_col], ask=self.quotes.ask[t_col]
+            )
+            fill_px = np.zeros(self.delta.shape)
+            fill_px[t_row, t_col] = px
+            notional = np.bincount(t_row, weights=np.abs(d) * px, minlength=self.delta.shape[0])
+            hit = self._fills[slippage_bps] = (fill_px, notional)
+        return hit
+
+    def equity(self, slippage_bps: float) -> np.ndarray:
+        fill_px, _ = self._fill(slippage_bps)
+        return self.cash - np.cumsum(self.delta * fill_px, axis=1) + self._marked
+
+    def fees(self, fee_bps: float, slippage_bps: float) -> np.ndarray:
+        return self._fill(slippage_bps)[1] * (fee_bps / 10_000.0)
+
+
+def evaluate_momentum_grid(
+    quotes: QuoteFrame,
+    *,
+    lookbacks: Sequence[int],
+    fee_bps_list: Sequence[float],
+    slippage_bps_list: Sequence[float],
+    qty: float = 1.0,
+    score_key: str = "sharpe",
+    cash: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Momentum sweep over lookback x fee x slippage in grid_sweep's order
+    (lookback slowest). One signal matrix, one equity matrix per slippage
+    and batched metrics; fees do not enter equity, so every fee setting
+    shares its (lookback, slippage) equity path.
+
+    Each result: seq, params, score, metrics, trade_count, fees, final_equity.
+    """
+    paths = PositionPaths(quotes, momentum_target_matrix(quotes.mid, lookbacks, qty), cash=cash)
+
+    per_slip: Dict[float, Tuple[np.ndarray, List[Dict[str, Any]]]] = {}
+    for slip in dict.fromkeys(slippage_bps_list):
+        eq = paths.equity(slip)
+        per_slip[slip] = (eq, [m.model_dump() for m in compute_metrics_batch(eq)])
+
+    results: List[Dict[str, Any]] = []
+    seq = 0
+    for k, lb in enumerate(lookbacks):
+        for fee in fee_bps_list:
+            for slip in slippage_bps_list:
+                eq, metrics = per_slip[slip]
+                results.append(
+                    {
+                        "seq": seq,
+                        "params": {"lookback": lb, "fee_bps": fee, "slippage_bps": slip},
+                        "score": metrics[k].get(score_key),
+                        "metrics": metrics[k],
+                        "trade_count": int(paths.trade_counts[k]),
+                        "fees": float(paths.fees(fee, slip)[k]),
+                        "final_equity": float(eq[k, -1]) if eq.shape[1] else None,
+                    }
+                )
+                seq += 1
+    return results
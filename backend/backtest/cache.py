@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from backend.config import SETTINGS
+
+
+def content_key(*parts: Any) -> str:
+    """Stable hash of JSON-able parts (dict key order does not matter)."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class ArrayCache:
+    """
+    Content-addressed cache of read-only NumPy arrays.
+
+    Memory tier: LRU evicting by total bytes (max_bytes).
+    Disk tier (optional): one .npy per key under disk_dir, written on put and
+    memory-mapped on a memory miss, so evicted entries come back without
+    recomputation.
+    """
+
+    def __init__(self, name: str, max_bytes: int, disk_dir: Optional[str] = None):
+        self.name = name
+        self.max_bytes = int(max_bytes)
+        self.disk_dir = Path(disk_dir) / name if disk_dir else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            arr = self._items.get(key)
+            if arr is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return arr
+
+        arr = self._load(key)
+        with self._lock:
+            if arr is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._insert(key, arr)
+        return arr
+
+    def put(self, key: str, arr: np.ndarray) -> np.ndarray:
+        arr.flags.writeable = False
+        if self.disk_dir is not None:
+            self._store(key, arr)
+        with self._lock:
+            self._insert(key, arr)
+        return arr
+
+    def get_or_compute(self, key: str, fn: Callable[[], np.ndarray]) -> np.ndarray:
+        arr = self.get(key)
+        if arr is None:
+            arr = self.put(key, np.asarray(fn()))
+        return arr
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": ((self.hits + self.disk_hits) / lookups) if lookups else None,
+            }
+
+    # ---------- internals (caller holds the lock) ----------
+
+    def _insert(self, key: str, arr: np.ndarray) -> None:
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        if arr.nbytes > self.max_bytes:
+            # larger than the whole budget: disk tier only
+            return
+        self._items[key] = arr
+        self._bytes += arr.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f"{key}.npy"
+
+    def _store(self, key: str, arr: np.ndarray) -> None:
+        path = self._path(key)
+        if path.exists():
+            return
+        # unique temp per writer: concurrent misses on one key may both get here
+        fd, tmp = tempfile.mkstemp(prefix=f"{key}.", suffix=".tmp", dir=self.disk_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, arr)
+            # same key, same content: whichever writer lands last is fine
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        if self.disk_dir is None:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            return np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+
+# quote series keyed by data-source params; momentum signals keyed by (data key, strategy params)
+QUOTE_CACHE = ArrayCache("quotes", int(SETTINGS.quote_cache_mb * 1024 * 1024), SETTINGS.cache_dir)
+SIGNAL_CACHE = ArrayCache("signals", int(SETTINGS.signal_cache_mb * 1024 * 1024))
+
+
+def cache_stats() -> Dict[str, Any]:
+    return {"quotes": QUOTE_CACHE.stats(), "signals": SIGNAL_CACHE.stats()}
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Tuple
 
+import numpy as np
+
 
 class BpsCostModel:
     def __init__(self, fee_bps: float = 0.0, slippage_bps: float = 0.0):
@@ -22,3 +24,16 @@ class BpsCostModel:
 
         fee = (qty * fill_px) * (self.fee_bps / 10_000.0)
         return fill_px, fee
+
+    def fill_from_quotes(self, *, delta: np.ndarray, bid: np.ndarray, ask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Array version of fill_from_quote for the vectorized engine.
+        delta > 0 is a BUY of delta, delta < 0 a SELL of |delta|.
+        """
+        buy = delta > 0
+        base = np.where(buy, ask, bid)
+        slip = base * (self.slippage_bps / 10_000.0)
+        fill_px = np.where(buy, base + slip, base - slip)
+
+        fee = (np.abs(delta) * fill_px) * (self.fee_bps / 10_000.0)
+        return fill_px, fee
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Iterable, Dict, Any, Optional
+from itertools import chain
+from typing import List, Iterable, Iterator, Dict, Any, Optional, Sequence, Union, overload
 
-import math
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -18,18 +19,232 @@ class Quote:
         return max(0.0, self.ask - self.bid)
 
 
-def quotes_from_mid_prices(prices: List[float], spread_bps: float = 5.0) -> List[Quote]:
-    out: List[Quote] = []
-    for i, mid in enumerate(prices):
-        spread = mid * (spread_bps / 10_000.0)
-        bid = mid - spread / 2
-        ask = mid + spread / 2
-        out.append(Quote(i=i, mid=mid, bid=bid, ask=ask))
-    return out
+class QuoteFrame:
+    """
+    Columnar quote series backed by one contiguous (5, n) float64 block.
 
+    Rows are i, mid, bid, ask, spread. Slicing returns a zero-copy view, so
+    walk-forward train/test windows share memory with the full series.
+    Integer indexing and iteration hand out Quote objects lazily, so code
+    written against List[Quote] keeps working.
+    """
 
-def quotes_from_yahoo_df(df, price_col: str = "close", spread_bps: float = 5.0) -> List[Quote]:
+    FIELDS = ("i", "mid", "bid", "ask", "spread")
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: np.ndarray):
+        if data.ndim != 2 or data.shape[0] != len(self.FIELDS):
+            raise ValueError(f"QuoteFrame expects a ({len(self.FIELDS)}, n) array, got {data.shape}")
+        self._data = data
+
+    @classmethod
+    def empty(cls, n: int) -> "QuoteFrame":
+        return cls(np.zeros((len(cls.FIELDS), n), dtype=np.float64))
+
+    @classmethod
+    def from_arrays(cls, mid, bid, ask, i=None) -> "QuoteFrame":
+        mid = np.asarray(mid, dtype=np.float64)
+        out = cls.empty(mid.size)
+        d = out._data
+        d[0] = np.arange(mid.size) if i is None else i
+        d[1] = mid
+        d[2] = bid
+        d[3] = ask
+        np.maximum(d[3] - d[2], 0.0, out=d[4])
+        return out
+
+    def fill_from_mid(self, spread_bps: float) -> "QuoteFrame":
+        """Set i = 0..n-1 and bid/ask/spread from the mid row, in place."""
+        d = self._data
+        d[0] = np.arange(d.shape[1])
+        np.multiply(d[1], spread_bps / 10_000.0, out=d[4])
+        d[4] /= 2
+        np.subtract(d[1], d[4], out=d[2])
+        np.add(d[1], d[4], out=d[3])
+        np.maximum(d[3] - d[2], 0.0, out=d[4])
+        return self
+
+    @classmethod
+    def from_quotes(cls, quotes: Iterable[Quote]) -> "QuoteFrame":
+        flat = np.fromiter(chain.from_iterable((q.i, q.mid, q.bid, q.ask) for q in quotes), dtype=np.float64)
+        cols = flat.reshape(-1, 4)
+        return cls.from_arrays(cols[:, 1], cols[:, 2], cols[:, 3], i=cols[:, 0])
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, float]]) -> "QuoteFrame":
+        """Build from {"mid", "bid", "ask"} dicts (e.g. orderbook_sim) without an intermediate list."""
+        flat = np.fromiter(chain.from_iterable((r["mid"], r["bid"], r["ask"]) for r in records), dtype=np.float64)
+        cols = flat.reshape(-1, 3)
+        return cls.from_arrays(cols[:, 0], cols[:, 1], cols[:, 2])
+
+    # ---------- columns ----------
+
+    @property
+    def data(self) -> np.ndarray:
+        return self._data
+
+    @property
+    def i(self) -> np.ndarray:
+        return self._data[0]
+
+    @property
+    def mid(self) -> np.ndarray:
+        return self._data[1]
+
+    @property
+    def bid(self) -> np.ndarray:
+        return self._data[2]
+
+    @property
+    def ask(self) -> np.ndarray:
+        return self._data[3]
+
+    @property
+    def spread(self) -> np.ndarray:
+        return self._data[4]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._data.nbytes)
+
+    # ---------- sequence protocol ----------
+
+    def __len__(self) -> int:
+        return self._data.shape[1]
+
+    @overload
+    def __getitem__(self, key: int) -> Quote: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> "QuoteFrame": ...
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return QuoteFrame(self._data[:, key])
+        d = self._data[:, key]
+        return Quote(i=int(d[0]), mid=float(d[1]), bid=float(d[2]), ask=float(d[3]))
+
+    def __iter__(self) -> Iterator[Quote]:
+        for j in range(len(self)):
+            yield self[j]
+
+    def to_list(self) -> List[Quote]:
+        return list(self)
+
+    def __repr__(self) -> str:
+        return f"QuoteFrame(n={len(self)})"
+
+
+QuoteSeq = Union[QuoteFrame, Sequence[Quote]]
+
+# a quote stream item: a Quote, an orderbook_sim-style dict, or a QuoteFrame chunk
+QuoteStreamItem = Union[Quote, Dict[str, float], QuoteFrame]
+
+
+class QuoteWindow:
+    """
+    Bounded look-back over a quote stream.
+
+    Keeps the last `size` quotes in a (5, 2*size) buffer and exposes them as
+    a QuoteFrame view; the live region is shifted back to the front once the
+    buffer fills, so appends are amortized O(1) and memory is constant.
+    """
+
+    __slots__ = ("size", "_buf", "_end")
+
+    def __init__(self, size: int):
+        if size <= 0:
+            raise ValueError("size must be > 0")
+        self.size = size
+        self._buf = np.zeros((len(QuoteFrame.FIELDS), 2 * size), dtype=np.float64)
+        self._end = 0
+
+    def append(self, i: float, mid: float, bid: float, ask: float) -> None:
+        buf = self._buf
+        if self._end == buf.shape[1]:
+            keep = self.size - 1
+            buf[:, :keep] = buf[:, self._end - keep : self._end]
+            self._end = keep
+        col = buf[:, self._end]
+        col[0] = i
+        col[1] = mid
+        col[2] = bid
+        col[3] = ask
+        col[4] = max(0.0, ask - bid)
+        self._end += 1
+
+    def frame(self) -> QuoteFrame:
+        return QuoteFrame(self._buf[:, max(0, self._end - self.size) : self._end])
+
+    def __len__(self) -> int:
+        return min(self._end, self.size)
+
+
+def iter_quote_tuples(stream: Iterable[QuoteStreamItem]) -> Iterator[tuple]:
+    """
+    Flatten a quote stream into (i, mid, bid, ask) tuples. Dicts without an
+    "i" are numbered by stream position.
+    """
+    j = 0
+    for item in stream:
+        if isinstance(item, QuoteFrame):
+            d = item.data
+            yield from zip(d[0].tolist(), d[1].tolist(), d[2].tolist(), d[3].tolist())
+            j += len(item)
+        elif isinstance(item, Quote):
+            yield (item.i, item.mid, item.bid, item.ask)
+            j += 1
+        else:
+            yield (item.get("i", j), float(item["mid"]), float(item["bid"]), float(item["ask"]))
+            j += 1
+
+
+def iter_quote_frames(stream: Iterable[QuoteStreamItem], chunk: int = 4096) -> Iterator[QuoteFrame]:
+    """
+    Regroup a quote stream into QuoteFrame chunks. Frames pass through
+    as-is; runs of single quotes / dicts are batched into frames of up to
+    `chunk` rows, numbered like iter_quote_tuples.
+    """
+    pending: List[tuple] = []
+    j = 0
+    for item in stream:
+        if isinstance(item, QuoteFrame):
+            if pending:
+                yield _frame_from_tuples(pending)
+                pending = []
+            yield item
+            j += len(item)
+            continue
+        if isinstance(item, Quote):
+            pending.append((item.i, item.mid, item.bid, item.ask))
+        else:
+            pending.append((item.get("i", j), float(item["mid"]), float(item["bid"]), float(item["ask"])))
+        j += 1
+        if len(pending) >= chunk:
+            yield _frame_from_tuples(pending)
+            pending = []
+    if pending:
+        yield _frame_from_tuples(pending)
+
+
+def _frame_from_tuples(rows: List[tuple]) -> QuoteFrame:
+    a = np.asarray(rows, dtype=np.float64).T
+    return QuoteFrame.from_arrays(a[1], a[2], a[3], i=a[0])
+
+
+def as_quote_frame(quotes: QuoteSeq) -> QuoteFrame:
+    if isinstance(quotes, QuoteFrame):
+        return quotes
+    return QuoteFrame.from_quotes(quotes)
+
+
+def quotes_from_mid_prices(prices: Sequence[float], spread_bps: float = 5.0) -> QuoteFrame:
+    frame = QuoteFrame.empty(len(prices))
+    frame.data[1] = prices
+    return frame.fill_from_mid(spread_bps)
+
+
+def quotes_from_yahoo_df(df, price_col: str = "close", spread_bps: float = 5.0) -> QuoteFrame:
     # df expected to have a "close" column (lowercase from yahoo.py)
-    out: List[Quote] = []
-    pxs = df[price_col].tolist()
-    return quotes_from_mid_prices(pxs, spread_bps=spread_bps)
+    return quotes_from_mid_prices(np.asarray(df[price_col], dtype=np.float64), spread_bps=spread_bps)
@@ -1,29 +1,134 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple, Union
 
+import numpy as np
+
+from backend.services.metrics import MetricsAccumulator
 from backend.services.portfolio import PortfolioState
-from backend.backtest.data import Quote
+from backend.backtest.data import (
+    QuoteFrame,
+    QuoteSeq,
+    QuoteStreamItem,
+    QuoteWindow,
+    as_quote_frame,
+    iter_quote_frames,
+    iter_quote_tuples,
+)
+from backend.backtest.profiling import Profiler, current_profiler, stage_fn
+
+
+def _held_positions(target: np.ndarray, pos0: float = 0.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The loop's 1e-9 dead-band over a target path, starting from position
+    pos0: a bar trades when its target is more than 1e-9 away from the
+    position held, which then becomes the target. Returns (positions,
+    deltas, traded mask).
+
+    Targets that only step by 0 or by more than 1e-9 (e.g. 0/qty signals)
+    take the array path; sub-band steps can accumulate into a trade, so
+    those paths are scanned bar by bar over the bars where the target moved.
+    """
+    n = target.size
+    step = np.diff(target, prepend=pos0)
+    size = np.abs(step)
+    if np.any((size > 0) & (size <= 1e-9)):
+        moved = np.zeros(n, dtype=bool)
+        held = pos0
+        for t in np.flatnonzero(step).tolist():
+            if abs(target[t] - held) > 1e-9:
+                moved[t] = True
+                held = target[t]
+    else:
+        moved = size > 1e-9
+    last = np.maximum.accumulate(np.where(moved, np.arange(n), -1))
+    pos = np.where(last >= 0, target[np.maximum(last, 0)], pos0)
+    return pos, np.diff(pos, prepend=pos0), moved
 
 
 class BacktestEngine:
-    def __init__(self, symbol: str, strategy, cost_model):
+    """
+    Single-symbol backtester.
+
+    Two execution paths produce the same equity/trades (to float tolerance):
+      - loop: asks strategy.target_position(j, quotes) per bar and books fills
+        through PortfolioState (works for any strategy)
+      - vectorized: used when the strategy implements target_positions(quotes)
+        and the cost model implements fill_from_quotes; positions, fills, cash
+        and equity are computed with array ops. self.portfolio is not touched.
+
+    run_stream() is a third, constant-memory mode for quote iterators of any
+    length (see its docstring).
+
+    run() records strategy / cost / accounting / marking stages into
+    `profiler`, or the current profiler (backend.backtest.profiling) when
+    none is given; with neither it takes the uninstrumented path.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        strategy,
+        cost_model,
+        vectorized: bool = True,
+        profiler: Optional[Profiler] = None,
+    ):
         self.symbol = symbol
         self.strategy = strategy
         self.cost_model = cost_model
-        self.portfolio = PortfolioState()
-        self.portfolio.reset()
+        self.vectorized = vectorized
+        self.profiler = profiler
+        self.portfolio = PortfolioState(record_equity=False)
         self.trades: List[Dict[str, Any]] = []
 
-    def run(self, quotes: List[Quote]) -> Dict[str, Any]:
+    def can_vectorize(self) -> bool:
+        return (
+            self.vectorized
+            and hasattr(self.strategy, "target_positions")
+            and hasattr(self.cost_model, "fill_from_quotes")
+        )
+
+    def run(self, quotes: QuoteSeq, targets: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        targets: precomputed strategy.target_positions(quotes) (e.g. from a
+        signal cache); forces the vectorized path.
+        """
+        prof = self.profiler or current_profiler()
+        if prof is None:
+            return self._run(quotes, targets, None)
+        with prof.stage("engine"):
+            return self._run(quotes, targets, prof)
+
+    def _run(self, quotes: QuoteSeq, targets: Optional[np.ndarray], prof: Optional[Profiler]) -> Dict[str, Any]:
+        with stage_fn(prof)("data"):
+            frame = as_quote_frame(quotes)
+        if targets is not None or self.can_vectorize():
+            return self._run_vectorized(frame, targets, prof)
+        return self._run_loop(frame, prof)
+
+    def _run_loop(self, quotes: QuoteFrame, prof: Optional[Profiler] = None) -> Dict[str, Any]:
         equity: List[float] = []
 
+        set_mark = self.portfolio.set_mark
+        mark_to_market = self.portfolio.mark_to_market
+        on_fill = self.portfolio.on_fill
+        target_position = self.strategy.target_position
+        fill_from_quote = self.cost_model.fill_from_quote
+        if prof is not None:
+            # per-bar hooks: time and calls only
+            set_mark = prof.timed("marking", set_mark)
+            mark_to_market = prof.timed("marking", mark_to_market)
+            on_fill = prof.timed("accounting", on_fill)
+            target_position = prof.timed("strategy", target_position)
+            fill_from_quote = prof.timed("cost", fill_from_quote)
+
         for j, q in enumerate(quotes):
             # mark
-            self.portfolio.marks[self.symbol] = q.mid
+            set_mark(self.symbol, q.mid)
 
             # target position from strategy
-            target_qty = self.strategy.target_position(j, quotes)
+            target_qty = target_position(j, quotes)
 
             cur_pos = self.portfolio.positions.get(self.symbol)
             cur_qty = cur_pos.qty if cur_pos else 0.0
@@ -33,11 +138,11 @@ class BacktestEngine:
                 side = "BUY" if delta > 0 else "SELL"
                 qty = abs(delta)
 
-                fill_px, fee = self.cost_model.fill_from_quote(
+                fill_px, fee = fill_from_quote(
                     side=side, qty=qty, bid=q.bid, ask=q.ask
                 )
 
-                self.portfolio.on_fill(self.symbol, side, qty, fill_px)
+                on_fill(self.symbol, side, qty, fill_px)
 
                 self.trades.append(
                     {
@@ -53,6 +158,251 @@ class BacktestEngine:
                     }
                 )
 
-            equity.append(self.portfolio.mark_to_market())
+            equity.append(mark_to_market())
 
         return {"equity": equity, "trades": self.trades}
+
+    def _run_vectorized(
+        self,
+        quotes: QuoteFrame,
+        targets: Optional[np.ndarray] = None,
+        prof: Optional[Profiler] = None,
+    ) -> Dict[str, Any]:
+        n = len(quotes)
+        if n == 0:
+            return {"equity": [], "trades": self.trades}
+
+        stage = stage_fn(prof)
+        idx, mid, bid, ask = quotes.i, quotes.mid, quotes.bid, quotes.ask
+
+        with stage("strategy"):
+            if targets is None:
+                targets = self.strategy.target_positions(quotes)
+            target = np.asarray(targets, dtype=float)
+        if target.shape != (n,):
+            raise ValueError(f"target_positions must return shape ({n},), got {target.shape}")
+
+        with stage("accounting"):
+            pos, delta, moved = _held_positions(target)
+            traded = np.flatnonzero(moved)
+
+        with stage("cost"):
+            fill_px = np.zeros(n)
+            fee = np.zeros(n)
+            if traded.size:
+                fill_px[traded], fee[traded] = self.cost_model.fill_from_quotes(
+                    delta=delta[traded], bid=bid[traded], ask=ask[traded]
+                )
+
+        with stage("marking"):
+            # BUY debits qty*px, SELL credits it: cash flow is -delta * px
+            cash = self.portfolio.cash - np.cumsum(delta * fill_px)
+            equity = cash + pos * mid
+
+        with stage("trade_log"):
+            for j in traded.tolist():
+                d = float(delta[j])
+                self.trades.append(
+                    {
+                        "i": int(idx[j]),
+                        "symbol": self.symbol,
+                        "side": "BUY" if d > 0 else "SELL",
+                        "qty": abs(d),
+                        "px": float(fill_px[j]),
+                        "mid": float(mid[j]),
+                        "bid": float(bid[j]),
+                        "ask": float(ask[j]),
+                        "fee": float(fee[j]),
+                    }
+                )
+
+        return {"equity": equity.tolist(), "trades": self.trades}
+
+    def run_stream(
+        self,
+        quotes: Iterable[QuoteStreamItem],
+        *,
+        window: Optional[int] = None,
+        equity_every: int = 1,
+        max_trades: Optional[int] = 1000,
+        chunked: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Backtest over any quote iterator in constant memory.
+
+        The strategy sees a bounded look-back: target_position(j, frame) is
+        called with a QuoteFrame of at most `window` recent quotes and j its
+        last index. window defaults to strategy.warmup + 1, which gives the
+        same positions as run() for strategies that only look back warmup bars.
+
+        Only rolling state is kept: equity is sampled every `equity_every`
+        bars (plus the final bar) and the trade log keeps the last
+        `max_trades` fills (None keeps all). Metrics are accumulated over
+        every bar, not just the samples. Cash/position accounting matches
+        the vectorized path.
+
+        chunked (default: can_vectorize()) processes the stream a QuoteFrame
+        chunk at a time with the vectorized path, carrying window - 1 rows of
+        context and the cash/position state across chunks, so per-bar cost
+        is array work rather than Python objects.
+        """
+        if window is None:
+            window = int(getattr(self.strategy, "warmup", 0)) + 1
+        if equity_every <= 0:
+            raise ValueError("equity_every must be > 0")
+        if chunked is None:
+            chunked = self.can_vectorize()
+        if chunked:
+            return self._run_stream_chunked(iter_quote_frames(quotes), window, equity_every, max_trades)
+
+        buf = QuoteWindow(window)
+        cost = self.cost_model
+        cash = self.portfolio.cash
+        pos = 0.0
+
+        equity: List[float] = []
+        trades: Union[List[Dict[str, Any]], Deque[Dict[str, Any]]] = (
+            [] if max_trades is None else deque(maxlen=max_trades)
+        )
+        trade_count = 0
+        fees = 0.0
+        eq = cash
+        n = 0
+        acc = MetricsAccumulator()
+
+        for i, mid, bid, ask in iter_quote_tuples(quotes):
+            buf.append(i, mid, bid, ask)
+            view = buf.frame()
+
+            target_qty = self.strategy.target_position(len(view) - 1, view)
+
+            delta = target_qty - pos
+            if abs(delta) > 1e-9:
+                side = "BUY" if delta > 0 else "SELL"
+                qty = abs(delta)
+
+                fill_px, fee = cost.fill_from_quote(side=side, qty=qty, bid=bid, ask=ask)
+
+                cash -= delta * fill_px
+                pos = target_qty
+                trade_count += 1
+                fees += fee
+
+                trades.append(
+                    {
+                        "i": int(i),
+                        "symbol": self.symbol,
+                        "side": side,
+                        "qty": qty,
+                        "px": fill_px,
+                        "mid": mid,
+                        "bid": bid,
+                        "ask": ask,
+                        "fee": fee,
+                    }
+                )
+
+            eq = cash + pos * mid
+            acc.add(eq)
+            if n % equity_every == 0:
+                equity.append(eq)
+            n += 1
+
+        if n and (n - 1) % equity_every != 0:
+            equity.append(eq)
+
+        return {
+            "equity": equity,
+            "equity_every": equity_every,
+            "trades": list(trades),
+            "bars": n,
+            "trade_count": trade_count,
+            "fees": fees,
+            "final_equity": eq,
+            "metrics": acc.snapshot().model_dump(),
+        }
+
+    def _run_stream_chunked(
+        self,
+        frames: Iterable[QuoteFrame],
+        window: int,
+        equity_every: int,
+        max_trades: Optional[int],
+    ) -> Dict[str, Any]:
+        keep = window - 1
+        ctx: Optional[np.ndarray] = None  # trailing rows the strategy still needs
+        cash = self.portfolio.cash
+        pos = 0.0
+
+        equity: List[float] = []
+        trades: Union[List[Dict[str, Any]], Deque[Dict[str, Any]]] = (
+            [] if max_trades is None else deque(maxlen=max_trades)
+        )
+        trade_count = 0
+        fees = 0.0
+        eq = cash
+        n = 0
+        acc = MetricsAccumulator()
+
+        for frame in frames:
+            m = len(frame)
+            if m == 0:
+                continue
+            full = frame if ctx is None else QuoteFrame(np.concatenate((ctx, frame.data), axis=1))
+            target = np.asarray(self.strategy.target_positions(full), dtype=float)[len(full) - m :]
+            # copy: producers may reuse or unmap the chunk's buffer
+            ctx = full.data[:, len(full) - keep :].copy() if keep > 0 else None
+
+            idx, mid, bid, ask = frame.i, frame.mid, frame.bid, frame.ask
+
+            # _run_vectorized with the previous chunk's position as the starting point
+            p, delta, moved = _held_positions(target, pos)
+
+            traded = np.flatnonzero(moved)
+            fill_px = np.zeros(m)
+            fee = np.zeros(m)
+            if traded.size:
+                fill_px[traded], fee[traded] = self.cost_model.fill_from_quotes(
+                    delta=delta[traded], bid=bid[traded], ask=ask[traded]
+                )
+
+            c = cash - np.cumsum(delta * fill_px)
+            e = c + p * mid
+            acc.add_many(e)
+            equity.extend(e[(-n) % equity_every :: equity_every].tolist())
+
+            keep_trades = traded if max_trades is None else traded[max(0, traded.size - max_trades) :]
+            for j in keep_trades.tolist():
+                d = float(delta[j])
+                trades.append(
+                    {
+                        "i": int(idx[j]),
+                        "symbol": self.symbol,
+                        "side": "BUY" if d > 0 else "SELL",
+                        "qty": abs(d),
+                        "px": float(fill_px[j]),
+                        "mid": float(mid[j]),
+                        "bid": float(bid[j]),
+                        "ask": float(ask[j]),
+                        "fee": float(fee[j]),
+                    }
+                )
+            trade_count += int(traded.size)
+            fees += float(fee.sum())
+
+            cash, pos, eq = float(c[-1]), float(p[-1]), float(e[-1])
+            n += m
+
+        if n and (n - 1) % equity_every != 0:
+            equity.append(eq)
+
+        return {
+            "equity": equity,
+            "equity_every": equity_every,
+            "trades": list(trades),
+            "bars": n,
+            "trade_count": trade_count,
+            "fees": fees,
+            "final_equity": eq,
+            "metrics": acc.snapshot().model_dump(),
+        }
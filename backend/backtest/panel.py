@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from backend.services.portfolio import PortfolioState
+
+
+def _ffill_index(valid: np.ndarray) -> np.ndarray:
+    """Per column, the row of the last valid cell at or before each row (0 if none yet)."""
+    rows = np.arange(valid.shape[0])[:, None]
+    return np.maximum.accumulate(np.where(valid, rows, 0), axis=0)
+
+
+class QuotePanel:
+    """
+    Aligned (time x symbols) quotes: mid / bid / ask are (T, S) float64
+    arrays, NaN where a symbol has no quote at that time (not listed yet,
+    halted, missing bar). ts is an optional (T,) int64 ns time index.
+    """
+
+    __slots__ = ("symbols", "mid", "bid", "ask", "ts")
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        mid: np.ndarray,
+        bid: np.ndarray,
+        ask: np.ndarray,
+        ts: Optional[np.ndarray] = None,
+    ):
+        self.symbols = list(symbols)
+        self.mid = np.asarray(mid, dtype=np.float64)
+        self.bid = np.asarray(bid, dtype=np.float64)
+        self.ask = np.asarray(ask, dtype=np.float64)
+        shape = (self.mid.shape[0] if self.mid.ndim == 2 else -1, len(self.symbols))
+        for name in ("mid", "bid", "ask"):
+            if getattr(self, name).shape != shape:
+                raise ValueError(f"QuotePanel {name} must be (T, {len(self.symbols)}), got {getattr(self, name).shape}")
+        self.ts = ts
+
+    @classmethod
+    def from_mid(
+        cls, symbols: Sequence[str], mid: np.ndarray, spread_bps: float = 5.0, ts: Optional[np.ndarray] = None
+    ) -> "QuotePanel":
+        mid = np.asarray(mid, dtype=np.float64)
+        half = mid * (spread_bps / 10_000.0 / 2)
+        return cls(symbols, mid, mid - half, mid + half, ts=ts)
+
+    @classmethod
+    def from_bars(cls, bars: Mapping[str, Any], price_col: str = "close", spread_bps: float = 5.0) -> "QuotePanel":
+        """
+        Align per-symbol bars (e.g. load_yahoo BarFrames: .ts plus columns)
+        on the union of their timestamps; symbols without a bar at a time get NaN.
+        """
+        symbols = list(bars)
+        ts = np.unique(np.concatenate([np.asarray(bars[s].ts, dtype=np.int64) for s in symbols])) if symbols else (
+            np.empty(0, dtype=np.int64)
+        )
+        mid = np.full((ts.size, len(symbols)), np.nan)
+        for k, s in enumerate(symbols):
+            b = bars[s]
+            mid[np.searchsorted(ts, np.asarray(b.ts, dtype=np.int64)), k] = b[price_col]
+        return cls.from_mid(symbols, mid, spread_bps, ts=ts)
+
+    @property
+    def shape(self):
+        return self.mid.shape
+
+    def __len__(self) -> int:
+        return self.mid.shape[0]
+
+    def __getitem__(self, key: slice) -> "QuotePanel":
+        """Time slice (views)."""
+        if not isinstance(key, slice):
+            raise TypeError("QuotePanel supports time slices only")
+        ts = None if self.ts is None else self.ts[key]
+        return QuotePanel(self.symbols, self.mid[key], self.bid[key], self.ask[key], ts=ts)
+
+    def __repr__(self) -> str:
+        return f"QuotePanel(T={self.mid.shape[0]}, symbols={len(self.symbols)})"
+
+
+class PanelBacktestEngine:
+    """
+    Cross-sectional backtester over a QuotePanel.
+
+    The strategy returns a (T, S) matrix from either
+      - target_qtys(panel): target quantities, processed fully with array
+        ops (the vectorized BacktestEngine logic, per column), or
+      - target_weights(panel): target fractions of equity; a symbol is
+        resized to weight * equity / mid when its weight changes (or on
+        every `rebalance_every`-th bar). One array step per bar, over all
+        symbols at once.
+    Targets only take effect on bars where the symbol has a quote; a change
+    made while it has none executes at its next quote. Accounting matches
+    BacktestEngine: fills at bid/ask via cost_model.fill_from_quotes, fees
+    are reported, marks are the last known mid.
+    """
+
+    def __init__(self, strategy, cost_model, rebalance_every: Optional[int] = None):
+        self.strategy = strategy
+        self.cost_model = cost_model
+        self.rebalance_every = rebalance_every
+        self.portfolio = PortfolioState(record_equity=False)
+
+    def run(self, panel: QuotePanel, max_trades: Optional[int] = 1000) -> Dict[str, Any]:
+        T, S = panel.shape
+        if T == 0 or S == 0:
+            return self._result(panel, np.zeros(0), np.zeros(S), np.zeros(S), np.zeros(S), np.zeros(S, dtype=np.int64), [], 0.0)
+
+        valid = np.isfinite(panel.mid) & np.isfinite(panel.bid) & np.isfinite(panel.ask)
+        fwd = _ffill_index(valid)
+        seen = np.logical_or.accumulate(valid, axis=0)
+        mark = np.where(seen, np.take_along_axis(panel.mid, fwd, axis=0), 0.0)
+
+        if hasattr(self.strategy, "target_weights"):
+            w = self._targets(self.strategy.target_weights(panel), T, S, valid, fwd, seen)
+            return self._run_weights(panel, w, valid, mark, max_trades)
+        q = self._targets(self.strategy.target_qtys(panel), T, S, valid, fwd, seen)
+        return self._run_qtys(panel, q, mark, max_trades)
+
+    @staticmethod
+    def _targets(raw, T: int, S: int, valid, fwd, seen) -> np.ndarray:
+        target = np.asarray(raw, dtype=np.float64)
+        if target.shape != (T, S):
+            raise ValueError(f"strategy targets must have shape ({T}, {S}), got {target.shape}")
+        # hold the last target seen on a quoted bar; unquoted bars cannot change it
+        target = np.where(valid, np.nan_to_num(target), 0.0)
+        return np.where(seen, np.take_along_axis(target, fwd, axis=0), 0.0)
+
+    def _run_qtys(self, panel: QuotePanel, target: np.ndarray, mark: np.ndarray, max_trades) -> Dict[str, Any]:
+        T, S = target.shape
+        moved = np.abs(np.diff(target, axis=0, prepend=0.0)) > 1e-9
+        last = np.maximum.accumulate(np.where(moved, np.arange(T)[:, None], -1), axis=0)
+        pos = np.where(last >= 0, np.take_along_axis(target, np.maximum(last, 0), axis=0), 0.0)
+        delta = np.diff(pos, axis=0, prepend=0.0)
+
+        t_idx, s_idx = np.nonzero(moved)
+        d = delta[t_idx, s_idx]
+        px, fee = self.cost_model.fill_from_quotes(delta=d, bid=panel.bid[t_idx, s_idx], ask=panel.ask[t_idx, s_idx])
+
+        flow = np.zeros((T, S))
+        flow[t_idx, s_idx] = -d * px
+        cash = self.portfolio.cash + np.cumsum(flow.sum(axis=1))
+        equity = cash + np.einsum("ts,ts->t", pos, mark)
+
+        sym_flow = flow.sum(axis=0)
+        sym_fees = np.bincount(s_idx, weights=fee, minlength=S)
+        sym_trades = np.bincount(s_idx, minlength=S)
+        trades = self._trade_log(panel, t_idx, s_idx, d, px, fee, max_trades)
+        return self._result(panel, equity, pos[-1], mark[-1], sym_flow, sym_trades, trades, float(fee.sum()), sym_fees)
+
+    def _run_weights(self, panel: QuotePanel, w: np.ndarray, valid: np.ndarray, mark: np.ndarray, max_trades) -> Dict[str, Any]:
+        T, S = w.shape
+        cost = self.cost_model
+        every = self.rebalance_every
+        cash = float(self.portfolio.cash)
+        pos = np.zeros(S)
+        prev_w = np.zeros(S)
+        equity = np.empty(T)
+        sym_flow = np.zeros(S)
+        sym_fees = np.zeros(S)
+        sym_trades = np.zeros(S, dtype=np.int64)
+        log: Deque[tuple] = deque(maxlen=max_trades)  # per-bar arrays; trimmed to max_trades rows below
+        mids, bids, asks = panel.mid, panel.bid, panel.ask
+
+        for t in range(T):
+            wt = w[t]
+            m = mark[t]
+            if every and t % every == 0:
+                move = valid[t] & ((wt != 0.0) | (pos != 0.0))
+            else:
+                move = valid[t] & (np.abs(wt - prev_w) > 1e-9)
+            prev_w = wt
+            if move.any():
+                s = np.flatnonzero(move)
+                eq_pre = cash + pos @ m
+                d = wt[s] * eq_pre / mids[t, s] - pos[s]
+                live = np.abs(d) > 1e-9
+                s, d = s[live], d[live]
+                if s.size:
+                    px, fee = cost.fill_from_quotes(delta=d, bid=bids[t, s], ask=asks[t, s])
+                    f = -d * px
+                    cash += float(f.sum())
+                    pos[s] += d
+                    sym_flow[s] += f
+                    sym_fees[s] += fee
+                    sym_trades[s] += 1
+                    if max_trades is None or max_trades > 0:
+                        log.append((np.full(s.size, t), s, d, px, fee))
+            equity[t] = cash + pos @ m
+
+        if log:
+            t_idx, s_idx, d, px, fee = (np.concatenate(c) for c in zip(*log))
+        else:
+            t_idx = s_idx = np.zeros(0, dtype=np.int64)
+            d = px = fee = np.zeros(0)
+        trades = self._trade_log(panel, t_idx, s_idx, d, px, fee, max_trades)
+        return self._result(panel, equity, pos, mark[-1], sym_flow, sym_trades, trades, float(sym_fees.sum()), sym_fees)
+
+    @staticmethod
+    def _trade_log(panel: QuotePanel, t_idx, s_idx, d, px, fee, max_trades: Optional[int]) -> List[Dict[str, Any]]:
+        """Last max_trades fills (None keeps all), in time order."""
+        start = 0 if max_trades is None else max(0, len(t_idx) - max_trades)
+        out = []
+        for t, s, dd, p, f in zip(
+            t_idx[start:].tolist(), s_idx[start:].tolist(), d[start:].tolist(), px[start:].tolist(), fee[start:].tolist()
+        ):
+            out.append(
+                {
+                    "i": t,
+                    "symbol": panel.symbols[s],
+                    "side": "BUY" if dd > 0 else "SELL",
+                    "qty": abs(dd),
+                    "px": p,
+                    "mid": float(panel.mid[t, s]),
+                    "fee": f,
+                }
+            )
+        return out
+
+    def _result(
+        self,
+        panel: QuotePanel,
+        equity: np.ndarray,
+        final_pos: np.ndarray,
+        final_mark: np.ndarray,
+        sym_flow: np.ndarray,
+        sym_trades: np.ndarray,
+        trades: List[Dict[str, Any]],
+        fees: float,
+        sym_fees: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        pnl = sym_flow + final_pos * final_mark
+        if sym_fees is None:
+            sym_fees = np.zeros(len(panel.symbols))
+        by_symbol = {
+            sym: {"pnl": float(pnl[k]), "fees": float(sym_fees[k]), "trades": int(sym_trades[k]), "qty": float(final_pos[k])}
+            for k, sym in enumerate(panel.symbols)
+        }
+        return {
+            "equity": equity.tolist(),
+            "trades": trades,
+            "trade_count": int(sym_trades.sum()),
+            "fees": fees,
+            "by_symbol": by_symbol,
+        }
@@ -0,0 +1,178 @@
+"""
+Opt-in stage profiling for backtests.
+
+A Profiler accumulates, per named stage, the number of calls, total wall
+time and (for stage() blocks) the net change in allocated Python heap
+blocks. Code under test looks up the current profiler with
+current_profiler() and does nothing extra when there is none:
+
+    prof = Profiler()
+    with activate(prof):
+        engine.run(quotes)          # engine stages record into prof
+    prof.report()                   # {"stages": {"engine": {...}, "strategy": {...}}}
+
+Stages nest ("engine" includes "strategy", "cost", ...) and accumulate
+over every call, so the report reads like a flat cumulative profile.
+timed(name, fn) is the per-call hook for hot loops; it records time and
+calls only, since counting heap blocks costs microseconds per call.
+
+A Profiler is not thread-safe: give each thread or process its own and
+combine their reports with merge().
+"""
+from __future__ import annotations
+
+import cProfile
+import sys
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+_CURRENT: ContextVar[Optional["Profiler"]] = ContextVar("backtest_profiler", default=None)
+_NO_STAGE = nullcontext()
+
+
+def current_profiler() -> Optional["Profiler"]:
+    return _CURRENT.get()
+
+
+class _Stage:
+    __slots__ = ("_row", "_t0", "_b0")
+
+    def __init__(self, row: List[Any]):
+        self._row = row
+
+    def __enter__(self) -> None:
+        self._b0 = sys.getallocatedblocks()
+        self._t0 = time.perf_counter_ns()
+
+    def __exit__(self, *exc) -> None:
+        dt = time.perf_counter_ns() - self._t0
+        row = self._row
+        row[0] += 1
+        row[1] += dt
+        row[2] = (row[2] or 0) + sys.getallocatedblocks() - self._b0
+
+
+class _Activation:
+    __slots__ = ("_prof", "_token")
+
+    def __init__(self, prof: "Profiler"):
+        self._prof = prof
+
+    def __enter__(self) -> "Profiler":
+        self._token = _CURRENT.set(self._prof)
+        return self._prof
+
+    def __exit__(self, *exc) -> None:
+        _CURRENT.reset(self._token)
+
+
+class Profiler:
+    def __init__(self):
+        # name -> [calls, time_ns, allocs or None]
+        self._stages: Dict[str, List[Any]] = {}
+
+    def _row(self, name: str) -> List[Any]:
+        row = self._stages.get(name)
+        if row is None:
+            row = self._stages[name] = [0, 0, None]
+        return row
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return _Stage(self._row(name))
+
+    def timed(self, name: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """fn wrapped to add its calls and time to stage `name`."""
+        row = self._row(name)
+        clock = time.perf_counter_ns
+
+        @wraps(fn)
+        def call(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                row[0] += 1
+                row[1] += clock() - t0
+
+        return call
+
+    def merge(self, report: Optional[Dict[str, Any]]) -> None:
+        """Add another profiler's report() (e.g. from a worker process)."""
+        if not report:
+            return
+        for name, s in report.get("stages", {}).items():
+            row = self._row(name)
+            row[0] += int(s["calls"])
+            row[1] += int(round(s["time_s"] * 1e9))
+            if s.get("allocs") is not None:
+                row[2] = (row[2] or 0) + int(s["allocs"])
+
+    def report(self) -> Dict[str, Any]:
+        """
+        {"stages": {name: {"calls", "time_s", "allocs"}}} in first-seen
+        order; "allocs" is None for stages only recorded by timed().
+        """
+        stages = {
+            name: {"calls": calls, "time_s": ns / 1e9, "allocs": allocs}
+            for name, (calls, ns, allocs) in self._stages.items()
+        }
+        return {"stages": stages}
+
+
+def activate(prof: Optional[Profiler]) -> ContextManager[Optional[Profiler]]:
+    """Make prof current for the block (no-op for None)."""
+    if prof is None:
+        return _NO_STAGE
+    return _Activation(prof)
+
+
+def stage_fn(prof: Optional[Profiler]) -> Callable[[str], ContextManager[None]]:
+    """prof.stage, or a factory of no-op contexts when profiling is off."""
+    if prof is None:
+        return lambda name: _NO_STAGE
+    return prof.stage
+
+
+class PstatsDump:
+    """
+    cProfile the block and write <directory>/<label>-<utc time>-<id>.pstats
+    (load with pstats.Stats or snakeviz). Disabled, it does nothing. If
+    another profiler is already running, nothing is written and `error`
+    says why.
+    """
+
+    def __init__(self, directory: str, label: str, enabled: bool = True):
+        self.directory = directory
+        self.label = label
+        self.enabled = enabled
+        self.path: Optional[str] = None
+        self.error: Optional[str] = None
+        self._cp: Optional[cProfile.Profile] = None
+
+    def __enter__(self) -> "PstatsDump":
+        if self.enabled:
+            cp = cProfile.Profile()
+            try:
+                cp.enable()
+            except ValueError as e:
+                self.error = str(e)
+            else:
+                self._cp = cp
+        return self
+
+    def __exit__(self, *exc) -> None:
+        cp, self._cp = self._cp, None
+        if cp is None:
+            return
+        cp.disable()
+        out = Path(self.directory)
+        out.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        path = out / f"{self.label}-{stamp}-{uuid.uuid4().hex[:8]}.pstats"
+        cp.dump_stats(str(path))
+        self.path = str(path)
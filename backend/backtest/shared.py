@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.backtest.data import QuoteFrame
+
+
+class SharedFrameHandle(NamedTuple):
+    """Picklable pointer to a QuoteFrame living in shared memory."""
+    name: str
+    n: int
+
+
+class SharedQuoteFrame:
+    """
+    Owns a shared-memory copy of a QuoteFrame so pool workers can attach to
+    it by name instead of receiving a pickled copy per task.
+
+        with SharedQuoteFrame(frame) as shared:
+            pool.submit(fn, shared.handle, ...)
+    """
+
+    def __init__(self, frame: QuoteFrame):
+        data = frame.data
+        self._shm: Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(
+            create=True, size=max(1, data.nbytes)
+        )
+        view = np.ndarray(data.shape, dtype=np.float64, buffer=self._shm.buf)
+        view[:] = data
+        del view
+        self.handle = SharedFrameHandle(name=self._shm.name, n=data.shape[1])
+
+    def close(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> "SharedQuoteFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_quote_frame(handle: SharedFrameHandle) -> Tuple[QuoteFrame, shared_memory.SharedMemory]:
+    """
+    Map a shared frame into this process. Keep the returned SharedMemory
+    referenced for as long as the frame is in use.
+    """
+    shm = shared_memory.SharedMemory(name=handle.name)
+    data = np.ndarray((len(QuoteFrame.FIELDS), handle.n), dtype=np.float64, buffer=shm.buf)
+    return QuoteFrame(data), shm
@@ -1,35 +1,150 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Literal
 import numpy as np
 
+# Resamples are drawn in chunks whose working arrays fit this budget, so memory does
+# not grow with n * len(x); `workers` chunks are in flight at once. Chunk c draws
+# from SeedSequence(seed).spawn(...)[c]: a fixed (seed, n, budget) gives the same
+# result for any worker count.
+DEFAULT_MEM_BUDGET_MB = 64.0
+
+# working bytes per resampled element: int64 index + gathered float64
+_IID_BYTES = 16
+# stationary block: new-block draw, starts, block-start positions, index, gathered values
+_BLOCK_BYTES = 40
 
-def bootstrap_mean_ci(x: List[float], n: int = 2000, alpha: float = 0.05, seed: int | None = None) -> Dict[str, float]:
-    rng = np.random.default_rng(seed)
-    arr = np.array(x, dtype=float)
-    if arr.size == 0:
-        return {"mean": 0.0, "lo": 0.0, "hi": 0.0}
 
-    samples = rng.choice(arr, size=(n, arr.size), replace=True)
-    means = samples.mean(axis=1)
+def _resample_stats(
+    n: int,
+    size: int,
+    bytes_per_elem: int,
+    fn: Callable[[np.random.Generator, int], np.ndarray],
+    seed: int | None,
+    mem_budget_mb: float,
+    workers: int,
+) -> np.ndarray:
+    """Run fn(rng, m) -> (m,) statistics over chunks of m resamples; returns all n."""
+    workers = max(1, workers)
+    # chunking (and so the seed mapping) depends on the budget only; workers just run chunks concurrently
+    per_chunk = int(mem_budget_mb * 2**20) // max(1, size * bytes_per_elem)
+    per_chunk = max(1, min(n, per_chunk))
+    sizes = [min(per_chunk, n - k) for k in range(0, n, per_chunk)]
+    rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(len(sizes))]
+
+    if workers == 1 or len(sizes) == 1:
+        parts = [fn(rng, m) for rng, m in zip(rngs, sizes)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(fn, rngs, sizes))
+    return np.concatenate(parts)
+
+
+def _ci(arr: np.ndarray, means: np.ndarray, alpha: float) -> Dict[str, float]:
     lo = float(np.quantile(means, alpha / 2))
     hi = float(np.quantile(means, 1 - alpha / 2))
     return {"mean": float(arr.mean()), "lo": lo, "hi": hi}
 
 
-def permutation_test_mean_gt_zero(x: List[float], n: int = 5000, seed: int | None = None) -> Dict[str, float]:
+def bootstrap_mean_ci(
+    x: List[float],
+    n: int = 2000,
+    alpha: float = 0.05,
+    seed: int | None = None,
+    *,
+    mem_budget_mb: float = DEFAULT_MEM_BUDGET_MB,
+    workers: int = 1,
+) -> Dict[str, float]:
+    arr = np.array(x, dtype=float)
+    if arr.size == 0:
+        return {"mean": 0.0, "lo": 0.0, "hi": 0.0}
+
+    def chunk(rng: np.random.Generator, m: int) -> np.ndarray:
+        return arr[rng.integers(0, arr.size, size=(m, arr.size))].mean(axis=1)
+
+    means = _resample_stats(n, arr.size, _IID_BYTES, chunk, seed, mem_budget_mb, workers)
+    return _ci(arr, means, alpha)
+
+
+def block_bootstrap_mean_ci(
+    x: List[float],
+    n: int = 2000,
+    alpha: float = 0.05,
+    seed: int | None = None,
+    *,
+    block: float | None = None,
+    kind: Literal["stationary", "circular"] = "stationary",
+    mem_budget_mb: float = DEFAULT_MEM_BUDGET_MB,
+    workers: int = 1,
+) -> Dict[str, float]:
+    """
+    Bootstrap CI of the mean for autocorrelated series: resamples are built
+    from blocks of consecutive values, wrapping around the end.
+    "circular" uses fixed-length blocks; "stationary" (Politis-Romano) uses
+    geometric lengths with mean `block`. block defaults to len(x) ** (1/3).
+    """
+    arr = np.array(x, dtype=float)
+    if arr.size == 0:
+        return {"mean": 0.0, "lo": 0.0, "hi": 0.0, "block": 0.0}
+    size = arr.size
+    L = float(block) if block else float(round(size ** (1 / 3)))
+    L = min(max(1.0, L), float(size))
+
+    if kind == "circular":
+        Li = int(round(L))
+        k = -(-size // Li)
+        offsets = np.arange(Li)
+
+        def chunk(rng: np.random.Generator, m: int) -> np.ndarray:
+            starts = rng.integers(0, size, size=(m, k, 1))
+            idx = ((starts + offsets) % size).reshape(m, k * Li)[:, :size]
+            return arr[idx].mean(axis=1)
+
+    elif kind == "stationary":
+        p = 1.0 / L
+        pos = np.arange(size)
+
+        def chunk(rng: np.random.Generator, m: int) -> np.ndarray:
+            new = rng.random((m, size)) < p
+            new[:, 0] = True
+            # position where the block covering each t began
+            began = np.maximum.accumulate(np.where(new, pos, 0), axis=1)
+            starts = np.take_along_axis(rng.integers(0, size, size=(m, size)), began, axis=1)
+            return arr[(starts + (pos - began)) % size].mean(axis=1)
+
+    else:
+        raise ValueError(f"unknown block bootstrap kind {kind!r}")
+
+    means = _resample_stats(n, size, _BLOCK_BYTES, chunk, seed, mem_budget_mb, workers)
+    return {**_ci(arr, means, alpha), "block": L}
+
+
+def permutation_test_mean_gt_zero(
+    x: List[float],
+    n: int = 5000,
+    seed: int | None = None,
+    *,
+    mem_budget_mb: float = DEFAULT_MEM_BUDGET_MB,
+    workers: int = 1,
+) -> Dict[str, float]:
     """
     Sign-flip permutation test (null: mean == 0).
     Returns p-value for mean > 0.
     """
-    rng = np.random.default_rng(seed)
     arr = np.array(x, dtype=float)
     if arr.size == 0:
         return {"mean": 0.0, "p_value": 1.0}
 
     observed = float(arr.mean())
-    # sign flip
-    signs = rng.choice([-1.0, 1.0], size=(n, arr.size), replace=True)
-    perm_means = (arr * signs).mean(axis=1)
+
+    # sign flip: mean of arr * s = (sum(arr) - 2 * sum(arr[flipped])) / size
+    total = float(arr.sum())
+
+    def chunk(rng: np.random.Generator, m: int) -> np.ndarray:
+        flipped = rng.integers(0, 2, size=(m, arr.size), dtype=np.int8).astype(np.float64)
+        return (total - 2.0 * (flipped @ arr)) / arr.size
+
+    perm_means = _resample_stats(n, arr.size, _IID_BYTES, chunk, seed, mem_budget_mb, workers)
     p = float((perm_means >= observed).mean())
     return {"mean": observed, "p_value": p}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class CrossSectionalMomentumStrategy:
+    """
+    Ranks symbols by trailing `lookback`-bar return each rebalance bar and
+    holds the top `top_k` (plus the bottom `top_k` short if long_short) at
+    equal weight. `gross` is the total absolute weight; symbols without a
+    quote at either end of the lookback are not ranked.
+    """
+
+    lookback: int = 20
+    top_k: int = 10
+    long_short: bool = False
+    gross: float = 1.0
+    rebalance_every: int = 1
+
+    @property
+    def warmup(self) -> int:
+        return self.lookback
+
+    def target_weights(self, panel) -> np.ndarray:
+        mids = panel.mid
+        T, S = mids.shape
+        w = np.zeros((T, S))
+        lb = self.lookback
+        if lb >= T or S == 0:
+            return w
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ret = mids[lb:] / mids[:-lb] - 1.0
+        ok = np.isfinite(ret)
+        n_ok = ok.sum(axis=1)
+
+        # rank 0 = best trailing return; unrankable symbols sort last
+        order = np.argsort(np.where(ok, -ret, np.inf), axis=1, kind="stable")
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(S)[None, :], axis=1)
+
+        k = np.minimum(self.top_k, n_ok // 2 if self.long_short else n_ok)[:, None]
+        longs = ok & (rank < k)
+        side_gross = self.gross / 2 if self.long_short else self.gross
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per = np.where(k > 0, side_gross / k, 0.0)
+        out = longs * per
+        if self.long_short:
+            shorts = ok & (rank >= n_ok[:, None] - k)
+            out = out - shorts * per
+        w[lb:] = out
+
+        every = max(1, int(self.rebalance_every))
+        if every > 1:
+            # hold each rebalance bar's weights until the next one
+            rows = np.arange(T)
+            held = np.maximum(lb, lb + (rows - lb) // every * every)
+            w = np.where((rows >= lb)[:, None], w[held], 0.0)
+        return w
+
@@ -2,16 +2,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, List, Optional
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.linear_model import LogisticRegression
 
-from backend.backtest.data import Quote
+from backend.backtest.data import QuoteSeq, as_quote_frame
 
 
-def _safe_log(x: float) -> float:
-    return float(np.log(max(x, 1e-12)))
+def _safe_log(x: np.ndarray) -> np.ndarray:
+    return np.log(np.clip(x, 1e-12, None))
 
 
 @dataclass
@@ -27,7 +28,13 @@ class MLMomentumStrategy:
     model: Optional[LogisticRegression] = None
     is_fit: bool = False
 
-    def fit(self, quotes: List[Quote]) -> None:
+    # scored positions for the last quote series seen by target_position(s)
+    _pos_src: Any = field(default=None, repr=False, compare=False)
+    _pos: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    def fit(self, quotes: QuoteSeq) -> None:
+        self._pos_src = self._pos = None
+
         if len(quotes) < max(self.lookbacks) + 5:
             # not enough data to train
             self.model = None
@@ -46,60 +53,75 @@ class MLMomentumStrategy:
         self.model = m
         self.is_fit = True
 
-    def target_position(self, idx: int, quotes: List[Quote]) -> float:
-        # If not trained, do nothing
-        if not self.is_fit or self.model is None:
-            return 0.0
+    def target_positions(self, quotes: QuoteSeq) -> np.ndarray:
+        if quotes is self._pos_src and self._pos is not None:
+            return self._pos
+
+        out = np.zeros(len(quotes))
+        needed = self._needed()
+
+        # If not trained or not enough history, do nothing
+        if self.is_fit and self.model is not None and len(quotes) > needed:
+            X = self.feature_matrix(quotes)[needed:]
+            p_up = self.model.predict_proba(X)[:, 1]
 
-        # Need enough history for features
-        needed = max(self.lookbacks + [self.vol_window])
-        if idx < needed:
-            return 0.0
+            # threshold can be tuned later / made a parameter
+            out[needed:] = np.where(p_up >= 0.55, float(self.qty), 0.0)
 
-        x = self._features_at(idx, quotes).reshape(1, -1)
-        p_up = float(self.model.predict_proba(x)[0, 1])
+        self._pos_src, self._pos = quotes, out
+        return out
 
-        # threshold can be tuned later / made a parameter
-        return float(self.qty) if p_up >= 0.55 else 0.0
+    def target_position(self, idx: int, quotes: QuoteSeq) -> float:
+        # scores the whole series once, then serves bars from the cache
+        return float(self.target_positions(quotes)[idx])
+
+    @property
+    def warmup(self) -> int:
+        # bars of history the features look back over
+        return self._needed()
 
     # ---------- internals ----------
 
-    def _features_at(self, idx: int, quotes: List[Quote]) -> np.ndarray:
-        mids = np.array([q.mid for q in quotes], dtype=float)
+    def _needed(self) -> int:
+        return max(self.lookbacks + [self.vol_window])
+
+    def feature_matrix(self, quotes: QuoteSeq) -> np.ndarray:
+        """
+        Features for every bar in one pass, shape (n, len(lookbacks) + 3).
+        Rows before _needed() lack history and are left as NaN.
+        """
+        frame = as_quote_frame(quotes)
+        mids = frame.mid
+        n = mids.size
+        logm = _safe_log(mids)
 
-        feats = []
+        X = np.full((n, len(self.lookbacks) + 3), np.nan)
 
         # multi-horizon returns
-        for lb in self.lookbacks:
-            r = _safe_log(mids[idx]) - _safe_log(mids[idx - lb])
-            feats.append(r)
+        for col, lb in enumerate(self.lookbacks):
+            if lb < n:
+                X[lb:, col] = logm[lb:] - logm[:-lb]
 
-        # rolling mean return + volatility
+        # rolling mean return + volatility over the last vol_window returns
         w = self.vol_window
-        rets = np.diff(np.log(np.clip(mids[idx - w : idx + 1], 1e-12, None)))
-        feats.append(float(np.mean(rets)))
-        feats.append(float(np.std(rets) + 1e-12))
+        rets = np.diff(logm)
+        if rets.size >= w:
+            win = sliding_window_view(rets, w)
+            X[w:, -3] = win.mean(axis=1)
+            X[w:, -2] = win.std(axis=1) + 1e-12
 
         # spread feature (microstructure-ish)
-        feats.append(float(quotes[idx].spread / max(quotes[idx].mid, 1e-12)))
+        X[:, -1] = frame.spread / np.maximum(mids, 1e-12)
 
-        return np.array(feats, dtype=float)
+        return X
 
-    def _make_dataset(self, quotes: List[Quote]):
-        mids = np.array([q.mid for q in quotes], dtype=float)
-        n = len(quotes)
-
-        needed = max(self.lookbacks + [self.vol_window])
-        X = []
-        y = []
+    def _make_dataset(self, quotes: QuoteSeq):
+        X_all = self.feature_matrix(quotes)
+        logm = _safe_log(as_quote_frame(quotes).mid)
 
         # predict next-step direction
-        for i in range(needed, n - 1):
-            x = self._features_at(i, quotes)
-            next_ret = _safe_log(mids[i + 1]) - _safe_log(mids[i])
-            label = 1 if next_ret > 0 else 0
-
-            X.append(x)
-            y.append(label)
+        needed = self._needed()
+        X = X_all[needed:-1]
+        y = (np.diff(logm)[needed:] > 0).astype(int)
 
-        return np.vstack(X), np.array(y, dtype=int)
+        return X, y
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List
-from backend.backtest.data import Quote
+
+import numpy as np
+
+from backend.backtest.data import QuoteSeq, as_quote_frame
 
 @dataclass
 class MomentumStrategy:
@@ -10,7 +12,12 @@ class MomentumStrategy:
     lookback: int = 10
     qty: float = 1.0
 
-    def target_position(self, idx: int, quotes: List[Quote]) -> float:
+    @property
+    def warmup(self) -> int:
+        # bars of history target_position looks back over
+        return self.lookback
+
+    def target_position(self, idx: int, quotes: QuoteSeq) -> float:
         # idx is LOCAL index within the quotes list passed to the engine
         if idx < self.lookback:
             return 0.0
@@ -19,3 +26,21 @@ class MomentumStrategy:
             return float(self.qty)
         else:
             return 0.0
+
+    def target_positions(self, quotes: QuoteSeq) -> np.ndarray:
+        # whole-series version of target_position, used by the vectorized engine
+        mids = as_quote_frame(quotes).mid
+        out = np.zeros(mids.size)
+        lb = self.lookback
+        if lb < mids.size:
+            out[lb:] = np.where(mids[lb:] > mids[:-lb], float(self.qty), 0.0)
+        return out
+
+    def target_qtys(self, panel) -> np.ndarray:
+        # per-symbol time-series momentum over a QuotePanel's (T, S) mids; NaN compares False
+        mids = panel.mid
+        out = np.zeros(mids.shape)
+        lb = self.lookback
+        if lb < mids.shape[0]:
+            out[lb:] = np.where(mids[lb:] > mids[:-lb], float(self.qty), 0.0)
+        return out
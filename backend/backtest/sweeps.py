@@ -1,6 +1,65 @@
 from __future__ import annotations
 
-from typing import Dict, List, Any, Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+
+
+def iter_param_grid(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """All combinations, first key varying slowest (the order grid_sweep has always used)."""
+    keys = list(param_grid.keys())
+    return [dict(zip(keys, values)) for values in product(*(param_grid[k] for k in keys))]
+
+
+def rank_results(results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    # sort None to bottom; ties keep grid order so ranking never depends on completion order
+    ranked = sorted(
+        results,
+        key=lambda r: (r["score"] is None, -(r["score"] or -1e18), r.get("seq", 0)),
+    )
+    return ranked[:top_k]
+
+
+def iter_sweep(
+    *,
+    param_grid: Dict[str, List[Any]],
+    runner: Callable[[Dict[str, Any]], Dict[str, Any]],
+    score_key: str = "sharpe",
+    workers: int = 1,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = (),
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one result per grid point as soon as it finishes.
+
+    workers > 1 fans combinations out to a process pool; runner (and
+    initializer) must then be picklable, i.e. module-level functions or
+    functools.partial of them. initializer runs once per worker, or once
+    in-process when serial. Each result carries "seq", its position in
+    grid order.
+    """
+    combos = iter_param_grid(param_grid)
+
+    def _result(seq: int, params: Dict[str, Any], out: Dict[str, Any]) -> Dict[str, Any]:
+        score = out.get("metrics", {}).get(score_key)
+        return {"seq": seq, "params": dict(params), "score": score, **out}
+
+    if workers <= 1 or len(combos) <= 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for seq, params in enumerate(combos):
+            yield _result(seq, params, runner(params))
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(combos)),
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        futures = {pool.submit(runner, params): (seq, params) for seq, params in enumerate(combos)}
+        for fut in as_completed(futures):
+            seq, params = futures[fut]
+            yield _result(seq, params, fut.result())
 
 
 def grid_sweep(
@@ -9,27 +68,29 @@ def grid_sweep(
     runner: Callable[[Dict[str, Any]], Dict[str, Any]],
     score_key: str = "sharpe",
     top_k: int = 10,
+    workers: int = 1,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = (),
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
 ) -> List[Dict[str, Any]]:
     """
     runner(params) -> {"metrics": {...}, "equity": [...], "trades": [...]}
     score_key is looked up in metrics.
+
+    Same ranking for any worker count; on_result sees partial results in
+    completion order.
     """
-    keys = list(param_grid.keys())
     results: List[Dict[str, Any]] = []
+    for r in iter_sweep(
+        param_grid=param_grid,
+        runner=runner,
+        score_key=score_key,
+        workers=workers,
+        initializer=initializer,
+        initargs=initargs,
+    ):
+        results.append(r)
+        if on_result is not None:
+            on_result(r)
 
-    def rec(i: int, cur: Dict[str, Any]):
-        if i == len(keys):
-            out = runner(cur)
-            score = out.get("metrics", {}).get(score_key)
-            results.append({"params": dict(cur), "score": score, **out})
-            return
-        k = keys[i]
-        for v in param_grid[k]:
-            cur[k] = v
-            rec(i + 1, cur)
-        cur.pop(k, None)
-
-    rec(0, {})
-    # sort None to bottom
-    results.sort(key=lambda r: (r["score"] is None, -(r["score"] or -1e18)))
-    return results[:top_k]
+    return rank_results(results, top_k)
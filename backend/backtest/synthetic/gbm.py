@@ -1,25 +1,102 @@
 from __future__ import annotations
 
-import math
-import random
-from typing import List, Optional
+from typing import Optional
 
+import numpy as np
 
-def generate_gbm_prices(*, steps: int, start: float, mu: float, sigma: float, seed: Optional[int] = None) -> List[float]:
+from backend.backtest.data import QuoteFrame
+from backend.backtest.panel import QuotePanel
+
+
+def _rng(seed: Optional[int], rng: Optional[np.random.Generator]) -> np.random.Generator:
+    # every call gets its own generator; the global RNG is never touched
+    return rng if rng is not None else np.random.default_rng(seed)
+
+
+def generate_gbm_paths(
+    *,
+    n_paths: int,
+    steps: int,
+    start: float,
+    mu: float,
+    sigma: float,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Batch GBM: returns (n_paths, steps) prices, each row starting at `start`.
+    mu: drift per step
+    sigma: vol per step
+    out: optional (n_paths, steps) float64 array to fill in place
+    """
+    if out is None:
+        out = np.empty((n_paths, steps), dtype=np.float64)
+    if steps == 0:
+        return out
+
+    # log-returns, accumulated in place (column 0 is the start point)
+    _rng(seed, rng).standard_normal(out=out)
+    out *= sigma
+    out += mu - 0.5 * sigma * sigma
+    out[:, 0] = 0.0
+    np.cumsum(out, axis=1, out=out)
+    np.exp(out, out=out)
+    out *= float(start)
+    np.maximum(out, 1e-9, out=out)
+    return out
+
+
+def generate_gbm_prices(
+    *,
+    steps: int,
+    start: float,
+    mu: float,
+    sigma: float,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
     """
     Very small GBM-ish synthetic generator for stress tests & dev.
     steps: number of points
     mu: drift per step
     sigma: vol per step
     """
-    if seed is not None:
-        random.seed(seed)
-
-    prices = [float(start)]
-    for _ in range(steps - 1):
-        z = random.gauss(0.0, 1.0)
-        # log-return
-        r = (mu - 0.5 * sigma * sigma) + sigma * z
-        nxt = prices[-1] * math.exp(r)
-        prices.append(max(1e-9, nxt))
-    return prices
+    return generate_gbm_paths(n_paths=1, steps=steps, start=start, mu=mu, sigma=sigma, seed=seed, rng=rng)[0]
+
+
+def gbm_quote_frame(
+    *,
+    steps: int,
+    start: float,
+    mu: float,
+    sigma: float,
+    spread_bps: float = 5.0,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> QuoteFrame:
+    """GBM mids generated straight into a QuoteFrame, bid/ask from spread_bps."""
+    frame = QuoteFrame.empty(steps)
+    generate_gbm_paths(
+        n_paths=1, steps=steps, start=start, mu=mu, sigma=sigma, seed=seed, rng=rng,
+        out=frame.data[1:2],
+    )
+    frame.fill_from_mid(spread_bps)
+    return frame
+
+
+def gbm_quote_panel(
+    *,
+    n_symbols: int,
+    steps: int,
+    start: float,
+    mu: float,
+    sigma: float,
+    spread_bps: float = 5.0,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> QuotePanel:
+    """Independent GBM paths as a (steps x n_symbols) QuotePanel, symbols S000, S001, ..."""
+    paths = generate_gbm_paths(n_paths=n_symbols, steps=steps, start=start, mu=mu, sigma=sigma, seed=seed, rng=rng)
+    symbols = [f"S{k:03d}" for k in range(n_symbols)]
+    return QuotePanel.from_mid(symbols, np.ascontiguousarray(paths.T), spread_bps)
@@ -1,31 +1,102 @@
 from __future__ import annotations
 
-import random
-from typing import Iterator, Dict
+from typing import Iterator, Dict, Optional
 
+import numpy as np
 
-def orderbook_sim(
+from backend.backtest.data import QuoteFrame
+
+
+def orderbook_paths(
     *,
+    n_paths: int,
     steps: int,
     mid_start: float,
-    spread_bps: float = 5.0,
     vol_bps: float = 10.0,
-    seed: int | None = None,
-) -> Iterator[Dict[str, float]]:
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
     """
-    Microstructure-ish stream: mid random-walk + bid/ask from spread.
+    Batch mid random-walks, (n_paths, steps). Like the streaming sim, the
+    first shock is applied before the first point.
     """
-    if seed is not None:
-        random.seed(seed)
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    if out is None:
+        out = np.empty((n_paths, steps), dtype=np.float64)
+
+    rng.standard_normal(out=out)
+    out *= vol_bps / 10_000.0
+    out += 1.0
+    np.cumprod(out, axis=1, out=out)
+    out *= float(mid_start)
+    return out
+
 
+def orderbook_frame(
+    *,
+    steps: int,
+    mid_start: float,
+    spread_bps: float = 5.0,
+    vol_bps: float = 10.0,
+    seed: Optional[int] = None,
+    rng: Optional[np.random.Generator] = None,
+) -> QuoteFrame:
+    """Whole orderbook_sim series generated straight into a QuoteFrame."""
+    frame = QuoteFrame.empty(steps)
+    orderbook_paths(
+        n_paths=1, steps=steps, mid_start=mid_start, vol_bps=vol_bps, seed=seed, rng=rng,
+        out=frame.data[1:2],
+    )
+    frame.fill_from_mid(spread_bps)
+    return frame
+
+
+def orderbook_chunks(
+    *,
+    steps: int,
+    mid_start: float,
+    spread_bps: float = 5.0,
+    vol_bps: float = 10.0,
+    seed: Optional[int] = None,
+    chunk_size: int = 65_536,
+) -> Iterator[QuoteFrame]:
+    """
+    Same series as orderbook_frame, produced as QuoteFrame chunks so streams
+    of any length run in constant memory.
+    """
+    rng = np.random.default_rng(seed)
     mid = float(mid_start)
+    done = 0
 
-    for _ in range(steps):
-        shock = random.gauss(0.0, vol_bps / 10_000.0)
-        mid *= (1.0 + shock)
+    while done < steps:
+        k = min(chunk_size, steps - done)
+        frame = QuoteFrame.empty(k)
+        d = frame.data
+        orderbook_paths(n_paths=1, steps=k, mid_start=mid, vol_bps=vol_bps, rng=rng, out=d[1:2])
+        frame.fill_from_mid(spread_bps)
+        d[0] += done
 
-        spread = mid * (spread_bps / 10_000.0)
-        bid = mid - spread / 2
-        ask = mid + spread / 2
+        mid = float(d[1, -1])
+        done += k
+        yield frame
 
-        yield {"mid": mid, "bid": bid, "ask": ask}
+
+def orderbook_sim(
+    *,
+    steps: int,
+    mid_start: float,
+    spread_bps: float = 5.0,
+    vol_bps: float = 10.0,
+    seed: int | None = None,
+) -> Iterator[Dict[str, float]]:
+    """
+    Microstructure-ish stream: mid random-walk + bid/ask from spread.
+    """
+    for frame in orderbook_chunks(
+        steps=steps, mid_start=mid_start, spread_bps=spread_bps, vol_bps=vol_bps, seed=seed
+    ):
+        d = frame.data
+        for mid, bid, ask in zip(d[1].tolist(), d[2].tolist(), d[3].tolist()):
+            yield {"mid": mid, "bid": bid, "ask": ask}
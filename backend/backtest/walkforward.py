@@ -1,16 +1,113 @@
 from __future__ import annotations
 
-from typing import Callable, List, Dict, Any
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, List, Dict, Any, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.backtest.batched import PositionPaths
+from backend.backtest.data import QuoteFrame
+from backend.backtest.engine import BacktestEngine
+from backend.backtest.profiling import Profiler, activate, current_profiler, stage_fn
+from backend.backtest.shared import SharedQuoteFrame, SharedFrameHandle, attach_quote_frame
+
+
+def fold_bounds(n: int, train_size: int, test_size: int) -> List[Tuple[int, int, int]]:
+    """(train_start, test_start, test_end) per fold; test windows tile the series."""
+    out: List[Tuple[int, int, int]] = []
+    i = 0
+    while i + train_size + test_size <= n:
+        out.append((i, i + train_size, i + train_size + test_size))
+        i += test_size
+    return out
+
+
+def _run_fold(
+    strategy_factory: Callable[[Sequence[Any]], Any],
+    backtest_runner: Callable[[Any, Sequence[Any]], Dict[str, Any]],
+    data: Sequence[Any],
+    bounds: Tuple[int, int, int],
+    profile: bool = False,
+) -> Dict[str, Any]:
+    i, start, end = bounds
+    train = data[i:start]
+    test = data[start:end]
+
+    if profile:
+        # one profiler per fold: folds may run on other threads or processes
+        prof = Profiler()
+        with activate(prof):
+            with prof.stage("fit"):
+                strategy = strategy_factory(train)
+            with prof.stage("backtest"):
+                out = backtest_runner(strategy, test) or {}
+    else:
+        prof = None
+        strategy = strategy_factory(train)
+        out = backtest_runner(strategy, test) or {}
+    equity = out.get("equity")
+
+    # Defensive checks to avoid 500s
+    if equity is None:
+        raise ValueError(
+            f"backtest_runner must return dict with key 'equity'. Got keys={list(out.keys())}"
+        )
+
+    # Make sure equity is JSON-serializable floats
+    equity = [float(x) for x in equity]
+
+    chunk = {
+        "start": start,   # start of test segment
+        "end": end,       # end of test segment
+        "equity": equity,
+        "trades": out.get("trades", []),
+    }
+    if prof is not None:
+        chunk["profile"] = prof.report()
+    return chunk
+
+
+# frames attached by process-pool workers, keyed by shared-memory name
+_ATTACHED: Dict[str, Any] = {}
+
+
+def _run_fold_shared(
+    strategy_factory: Callable[[Sequence[Any]], Any],
+    backtest_runner: Callable[[Any, Sequence[Any]], Dict[str, Any]],
+    handle: SharedFrameHandle,
+    bounds: Tuple[int, int, int],
+    profile: bool = False,
+) -> Dict[str, Any]:
+    if handle.name not in _ATTACHED:
+        _ATTACHED[handle.name] = attach_quote_frame(handle)
+    frame, _shm = _ATTACHED[handle.name]
+    return _run_fold(strategy_factory, backtest_runner, frame, bounds, profile)
 
 
 def walk_forward(
     *,
-    data: List[Any],
+    data: Sequence[Any],
     train_size: int,
     test_size: int,
-    strategy_factory: Callable[[List[Any]], Any],
-    backtest_runner: Callable[[Any, List[Any]], Dict[str, Any]],
+    strategy_factory: Callable[[Sequence[Any]], Any],
+    backtest_runner: Callable[[Any, Sequence[Any]], Dict[str, Any]],
+    workers: int = 1,
+    executor: Literal["thread", "process"] = "thread",
+    on_fold: Optional[Callable[[int, int, Dict[str, Any]], None]] = None,
+    profile: bool = False,
 ) -> Dict[str, Any]:
+    """
+    Folds are independent, so with workers > 1 they run concurrently and are
+    reassembled in series order. "thread" hands each fold zero-copy slices of
+    data; "process" requires data to be a QuoteFrame (it is placed in shared
+    memory) and picklable strategy_factory/backtest_runner.
+
+    on_fold(done, total, chunk) is called as each fold finishes.
+
+    profile=True profiles each fold ("fit" = strategy_factory, "backtest"
+    = backtest_runner, plus any stages they record) wherever it runs and
+    returns the merged report as "profile"; times are summed over folds.
+    """
     if train_size <= 0 or test_size <= 0:
         raise ValueError("train_size and test_size must be > 0")
 
@@ -18,37 +115,132 @@ def walk_forward(
     if n < (train_size + test_size):
         return {"chunks": [], "chunk_metrics": []}
 
-    chunks: List[Dict[str, Any]] = []
-    i = 0
+    bounds = fold_bounds(n, train_size, test_size)
+    total = len(bounds)
+    chunks: List[Optional[Dict[str, Any]]] = [None] * total
 
-    while i + train_size + test_size <= n:
-        train = data[i : i + train_size]
-        test = data[i + train_size : i + train_size + test_size]
+    if workers <= 1 or total <= 1:
+        for k, b in enumerate(bounds):
+            chunks[k] = _run_fold(strategy_factory, backtest_runner, data, b, profile)
+            if on_fold is not None:
+                on_fold(k + 1, total, chunks[k])
+    else:
+        shared: Optional[SharedQuoteFrame] = None
+        pool: Executor
+        if executor == "process":
+            if not isinstance(data, QuoteFrame):
+                raise ValueError("process executor requires data to be a QuoteFrame")
+            shared = SharedQuoteFrame(data)
+            pool = ProcessPoolExecutor(max_workers=min(workers, total))
+        else:
+            pool = ThreadPoolExecutor(max_workers=min(workers, total))
 
-        strategy = strategy_factory(train)
+        try:
+            with pool:
+                if shared is not None:
+                    futures = {
+                        pool.submit(_run_fold_shared, strategy_factory, backtest_runner, shared.handle, b, profile): k
+                        for k, b in enumerate(bounds)
+                    }
+                else:
+                    futures = {
+                        pool.submit(_run_fold, strategy_factory, backtest_runner, data, b, profile): k
+                        for k, b in enumerate(bounds)
+                    }
+                for done, fut in enumerate(as_completed(futures), start=1):
+                    k = futures[fut]
+                    chunks[k] = fut.result()
+                    if on_fold is not None:
+                        on_fold(done, total, chunks[k])
+        finally:
+            if shared is not None:
+                shared.close()
 
-        out = backtest_runner(strategy, test) or {}
-        equity = out.get("equity")
+    if profile:
+        prof = Profiler()
+        for c in chunks:
+            prof.merge(c.pop("profile", None))
+        return {"chunks": chunks, "chunk_metrics": [], "profile": prof.report()}
+
+    # Optional: compute per-chunk metrics later; return empty list for now
+    return {"chunks": chunks, "chunk_metrics": []}
+
+
+def walk_forward_incremental(
+    *,
+    data: QuoteFrame,
+    train_size: int,
+    test_size: int,
+    candidate_targets: np.ndarray,
+    symbol: str,
+    cost_model,
+    bar_score: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+) -> Dict[str, Any]:
+    """
+    Walk-forward selection over fixed candidates without per-fold refits.
+
+    candidate_targets is a (K, T) target-position matrix over the whole
+    series (e.g. momentum_target_matrix). Candidate equity and per-bar PnL
+    are computed once. Each fold's training score is the mean of
+    bar_score(pnl) over its window, read from prefix sums (default: share of
+    winning bars). The best candidate trades the fold's test window.
+
+    Test windows run as one continuous portfolio: the position and cash
+    carry across folds, and a lookback switch trades at the boundary. Unlike
+    walk_forward(), signals see history from before each window. Cost is
+    O(K * T) plus O(K) per fold. Chunks carry the chosen "candidate".
+    Scoring and the stitched run record "fit" / "backtest" stages into the
+    current profiler, if any.
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size and test_size must be > 0")
+    n = len(data)
+    if n < (train_size + test_size):
+        return {"chunks": [], "chunk_metrics": []}
+
+    targets = np.atleast_2d(np.asarray(candidate_targets, dtype=float))
+    if targets.shape[1] != n:
+        raise ValueError(f"candidate_targets must have {n} columns, got {targets.shape[1]}")
 
-        # Defensive checks to avoid 500s
-        if equity is None:
-            raise ValueError(
-                f"backtest_runner must return dict with key 'equity'. Got keys={list(out.keys())}"
-            )
+    stage = stage_fn(current_profiler())
+    bounds = fold_bounds(n, train_size, test_size)
+    chosen: List[int] = []
+    stitched = np.zeros(n)
+    with stage("fit"):
+        eq = PositionPaths(data, targets).equity(getattr(cost_model, "slippage_bps", 0.0))
+        pnl = np.diff(eq, axis=1)
+        score = (pnl > 0) if bar_score is None else bar_score(pnl)
+        prefix = np.zeros((targets.shape[0], n))
+        np.cumsum(score, axis=1, out=prefix[:, 1:])
 
-        # Make sure equity is JSON-serializable floats
-        equity = [float(x) for x in equity]
+        for i, start, end in bounds:
+            # bar-to-bar PnL inside the training slice [i, start)
+            window = (prefix[:, start - 1] - prefix[:, i]) / max(1, start - 1 - i)
+            k = int(np.argmax(window))
+            chosen.append(k)
+            stitched[start:end] = targets[k, start:end]
 
+    first, last = bounds[0][1], bounds[-1][2]
+    test = data[first:last]
+    with stage("backtest"):
+        out = BacktestEngine(symbol=symbol, strategy=None, cost_model=cost_model).run(
+            test, targets=stitched[first:last]
+        )
+    equity = np.asarray(out["equity"])
+    trade_i = np.array([t["i"] for t in out["trades"]])
+    idx = data.i
+
+    chunks: List[Dict[str, Any]] = []
+    for (i, start, end), k in zip(bounds, chosen):
+        a = int(np.searchsorted(trade_i, idx[start], side="left"))
+        b = int(np.searchsorted(trade_i, idx[end - 1], side="right"))
         chunks.append(
             {
-                "start": i + train_size,             # start of test segment
-                "end": i + train_size + test_size,   # end of test segment
-                "equity": equity,
-                "trades": out.get("trades", []),
+                "start": start,
+                "end": end,
+                "equity": equity[start - first : end - first].tolist(),
+                "trades": out["trades"][a:b],
+                "candidate": k,
             }
         )
-
-        i += test_size
-
-    # Optional: compute per-chunk metrics later; return empty list for now
     return {"chunks": chunks, "chunk_metrics": []}
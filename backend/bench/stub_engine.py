@@ -0,0 +1,40 @@
+# backend/bench/stub_engine.py
+"""
+Stand-in engine for bridge benchmarks: NDJSON only, every order is acked
+and filled in full at its limit price. No matching, no book, no build step.
+
+    AsyncEngineBridge([sys.executable, "-m", "backend.bench.stub_engine"], protocol="ndjson")
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+
+
+def main() -> None:
+    out = sys.stdout
+    out.write(json.dumps({"type": "engine_status", "status": "ready", "ts_ms": int(time.time() * 1000)}) + "\n")
+    out.flush()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            continue
+        if msg.get("type") == "hello":
+            continue  # binary protocol not supported: the bridge falls back to ndjson
+        ids = {"order_id": msg.get("order_id", ""), "symbol": msg.get("symbol", "")}
+        ts = int(time.time() * 1000)
+        if msg.get("type") == "cancel":
+            out.write(json.dumps({"type": "cancelled", **ids, "leaves_qty": 0.0, "ts_ms": ts}) + "\n")
+        else:
+            out.write(json.dumps({"type": "ack", **ids, "ts_ms": ts}) + "\n")
+            fill = {"type": "fill", **ids, "side": msg.get("side"), "qty": msg.get("qty"), "px": msg.get("px")}
+            out.write(json.dumps({**fill, "leaves_qty": 0.0, "ts_ms": ts}) + "\n")
+        out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+# backend/bench/suite.py
+"""
+Reproducible benchmark suite with baseline comparison.
+
+    python -m backend.bench.suite                       # run all, write results JSON
+    python -m backend.bench.suite -k engine --repeat 7  # names containing "engine"
+    python -m backend.bench.suite --save-baseline bench_results/baseline.json
+    python -m backend.bench.suite --baseline bench_results/baseline.json --threshold 0.15 \\
+        --threshold-for engine_bridge_rtt=0.5
+    python -m backend.bench.suite -k engine_ --engine      # + the built engine, ndjson and bin1
+
+Inputs are seeded, so every run does the same work. Each benchmark runs
+once to warm up, then `repeat` times; the median is compared. Results go
+to OUT/<machine_id>/<commit>.json. With --baseline, any benchmark whose
+median is slower than baseline * (1 + threshold) is listed and the exit
+status is 1. Timings are only comparable on the same machine, so a
+machine_id mismatch is reported.
+
+The bridge benchmarks run against the stub engine (backend.bench.stub_engine)
+so they need no build; --engine [PATH] adds engine_ndjson_* and engine_bin1_*
+against a real engine (default: the one found by default_engine_path()).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from backend.api.engine_bridge import EngineCommand
+
+SCHEMA = 1
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # setup() -> fn; fn() does `ops` units of work and is what gets timed
+    setup: Callable[[], Callable[[], Any]]
+    ops: int = 1
+    teardown: Optional[Callable[[], None]] = None
+
+
+# ---------- benchmarks ----------
+
+def _frame(steps: int, seed: int = 7):
+    from backend.backtest.synthetic.gbm import gbm_quote_frame
+
+    return gbm_quote_frame(steps=steps, start=30_000.0, mu=0.0, sigma=0.02, spread_bps=5.0, seed=seed)
+
+
+def _engine(vectorized: bool = True, lookback: int = 10):
+    from backend.backtest.costs import BpsCostModel
+    from backend.backtest.engine import BacktestEngine
+    from backend.backtest.strategies.momentum import MomentumStrategy
+
+    strat = MomentumStrategy(symbol="BTCUSDT", lookback=lookback)
+    return BacktestEngine("BTCUSDT", strat, BpsCostModel(fee_bps=1.0, slippage_bps=2.0), vectorized=vectorized)
+
+
+def _setup_engine_run(steps: int, vectorized: bool = True):
+    def setup():
+        q = _frame(steps)
+        return lambda: _engine(vectorized).run(q)
+
+    return setup
+
+
+def _setup_compute_metrics(n: int):
+    def setup():
+        from backend.services.metrics import compute_metrics
+
+        eq = (1e6 + np.cumsum(np.random.default_rng(1).normal(0, 100, n))).tolist()
+        pnls = [eq[i] - eq[i - 1] for i in range(1, len(eq))]
+        return lambda: compute_metrics(eq, pnls)
+
+    return setup
+
+
+def _setup_bootstrap(n: int, resamples: int):
+    def setup():
+        from backend.backtest.stats import bootstrap_mean_ci
+
+        x = np.random.default_rng(2).normal(0.01, 1, n).tolist()
+        return lambda: bootstrap_mean_ci(x, n=resamples, seed=3)
+
+    return setup
+
+
+def _setup_grid_sweep(steps: int):
+    def setup():
+        from backend.backtest.costs import BpsCostModel
+        from backend.backtest.engine import BacktestEngine
+        from backend.backtest.strategies.momentum import MomentumStrategy
+        from backend.backtest.sweeps import grid_sweep
+        from backend.services.metrics import compute_metrics
+
+        q = _frame(steps)
+
+        def runner(p: Dict[str, Any]) -> Dict[str, Any]:
+            strat = MomentumStrategy(symbol="BTCUSDT", lookback=p["lookback"])
+            cost = BpsCostModel(fee_bps=p["fee_bps"], slippage_bps=p["slippage_bps"])
+            eq = BacktestEngine("BTCUSDT", strat, cost).run(q)["equity"]
+            return {"metrics": compute_metrics(eq, np.diff(eq).tolist()).model_dump(), "equity": eq}
+
+        grid = {"lookback": [5, 10, 20, 40], "fee_bps": [0.0, 1.0, 2.0], "slippage_bps": [0.0, 2.0, 5.0]}
+        return lambda: grid_sweep(param_grid=grid, runner=runner, top_k=10)
+
+    return setup
+
+
+def _setup_walk_forward(steps: int):
+    def setup():
+        from backend.api.backtest_api import WalkForwardRequest, _wf_factory, _wf_runner
+        from backend.backtest.walkforward import walk_forward
+
+        req = WalkForwardRequest(steps=steps, seed=5)
+        q = _frame(steps, seed=5)
+        return lambda: walk_forward(
+            data=q,
+            train_size=req.train_size,
+            test_size=req.test_size,
+            strategy_factory=partial(_wf_factory, req),
+            backtest_runner=partial(_wf_runner, req),
+        )
+
+    return setup
+
+
+def _setup_ml_fit(steps: int):
+    def setup():
+        from backend.backtest.strategies.ml_momentum import MLMomentumStrategy
+
+        q = _frame(steps, seed=11)
+        return lambda: MLMomentumStrategy(symbol="BTCUSDT").fit(q)
+
+    return setup
+
+
+def _setup_on_fill(n: int):
+    def setup():
+        from backend.services.portfolio import PortfolioState
+
+        syms = [f"SYM{k}" for k in range(4)]
+
+        def fn():
+            p = PortfolioState(record_equity=False)
+            for j in range(n):
+                p.on_fill(syms[j % 4], "BUY" if (j // 4) % 3 else "SELL", 1.0, 100.0 + (j % 11))
+
+        return fn
+
+    return setup
+
+
+def _setup_mark(n: int, symbols: int = 50):
+    def setup():
+        from backend.services.portfolio import PortfolioState
+
+        p = PortfolioState(record_equity=False)
+        syms = [f"SYM{k}" for k in range(symbols)]
+        for s in syms:
+            p.on_fill(s, "BUY", 1.0, 100.0)
+
+        def fn():
+            for j in range(n):
+                p.set_mark(syms[j % symbols], 100.0 + (j % 13))
+                p.mark_to_market()
+
+        return fn
+
+    return setup
+
+
+def _order(k: int) -> Dict[str, Any]:
+    # prices straddle 100 so, on a real engine, some orders cross and others rest on the book
+    side = "BUY" if k % 2 else "SELL"
+    px = 100.0 + ((k * 7) % 5 - 2) * 0.01
+    return {"order_id": f"b{k}", "symbol": "BTCUSDT", "side": side, "qty": float(1 + k % 3), "px": px}
+
+
+STUB_ENGINE = [sys.executable, "-m", "backend.bench.stub_engine"]
+
+
+class _BridgeBench:
+    """
+    AsyncEngineBridge against one engine process and event loop, kept
+    across repeats: `n` sequential submits (round trip) or one
+    submit_many of `n` orders (batch).
+    """
+
+    def __init__(self, engine: EngineCommand, protocol: str, n: int, batch: bool = False):
+        self.engine = engine
+        self.protocol = protocol
+        self.n = n
+        self.batch = batch
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._bridge = None
+
+    def setup(self) -> Callable[[], Any]:
+        from backend.api.engine_bridge import AsyncEngineBridge
+
+        loop = self._loop = asyncio.new_event_loop()
+        bridge = self._bridge = AsyncEngineBridge(self.engine, protocol=self.protocol, timeout=10.0)
+        loop.run_until_complete(bridge.start())
+        seq = iter(range(1 << 62))  # fresh order ids across repeats
+
+        async def roundtrips():
+            for _ in range(self.n):
+                await bridge.submit(_order(next(seq)))
+
+        async def batch():
+            await bridge.submit_many([_order(next(seq)) for _ in range(self.n)])
+
+        fn = batch if self.batch else roundtrips
+        return lambda: loop.run_until_complete(fn())
+
+    def teardown(self) -> None:
+        loop, bridge, self._loop, self._bridge = self._loop, self._bridge, None, None
+        if loop is not None:
+            if bridge is not None:
+                loop.run_until_complete(bridge.stop())
+            loop.close()
+
+
+def _bridge_benchmarks(prefix: str, engine: EngineCommand, protocol: str, n: int, batch: int) -> List[Benchmark]:
+    rtt = _BridgeBench(engine, protocol, n)
+    many = _BridgeBench(engine, protocol, batch, batch=True)
+    return [
+        Benchmark(f"{prefix}_rtt", rtt.setup, ops=n, teardown=rtt.teardown),
+        Benchmark(f"{prefix}_batch", many.setup, ops=batch, teardown=many.teardown),
+    ]
+
+
+def benchmarks(quick: bool = False, engine: Optional[str] = None) -> List[Benchmark]:
+    """
+    quick shrinks the inputs (smoke runs); results are not comparable with
+    full runs. engine: also benchmark that engine binary over ndjson and bin1.
+    """
+    s = 10 if quick else 1
+    out = [
+        Benchmark("engine_run_vec_1k", _setup_engine_run(1_000)),
+        Benchmark("engine_run_vec_100k", _setup_engine_run(100_000 // s)),
+        Benchmark("engine_run_vec_1m", _setup_engine_run(1_000_000 // s)),
+        Benchmark("engine_run_loop_10k", _setup_engine_run(10_000 // s, vectorized=False)),
+        Benchmark("compute_metrics_20k", _setup_compute_metrics(20_000 // s)),
+        Benchmark("bootstrap_mean_ci_20k", _setup_bootstrap(20_000 // s, 2000)),
+        Benchmark("grid_sweep_36x2k", _setup_grid_sweep(2_000)),
+        Benchmark("walk_forward_5k", _setup_walk_forward(5_000 // s)),
+        Benchmark("ml_momentum_fit_5k", _setup_ml_fit(5_000 // s)),
+        Benchmark("portfolio_on_fill", _setup_on_fill(100_000 // s), ops=100_000 // s),
+        Benchmark("portfolio_mark_to_market", _setup_mark(100_000 // s), ops=100_000 // s),
+    ]
+    # the stub engine isolates bridge cost: no matching, no build step
+    out += _bridge_benchmarks("engine_bridge", STUB_ENGINE, "ndjson", 1_000 // s, 5_000 // s)
+    if engine:
+        for protocol in ("ndjson", "bin1"):
+            out += _bridge_benchmarks(f"engine_{protocol}", engine, protocol, 2_000 // s, 5_000 // s)
+    return out
+
+
+# ---------- running ----------
+
+def run_benchmark(b: Benchmark, repeat: int) -> Dict[str, Any]:
+    fn = b.setup()
+    try:
+        fn()  # warm-up: imports, caches, first-touch allocations
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    finally:
+        if b.teardown is not None:
+            b.teardown()
+    med = statistics.median(times)
+    return {
+        "median_s": med,
+        "min_s": min(times),
+        "max_s": max(times),
+        "repeat": repeat,
+        "ops": b.ops,
+        "per_op_us": med / b.ops * 1e6,
+    }
+
+
+def commit_id() -> Tuple[str, bool]:
+    """(HEAD sha or "unknown", working tree dirty)."""
+    root = Path(__file__).resolve().parents[2]
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(
+            subprocess.run(
+                ["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True
+            ).stdout.strip()
+        )
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def machine_info() -> Dict[str, Any]:
+    info = {
+        "node": platform.node(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+    key = json.dumps({k: info[k] for k in ("node", "system", "machine", "processor", "cpus", "python")}, sort_keys=True)
+    info["machine_id"] = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return info
+
+
+def run_suite(
+    select: Optional[str] = None,
+    repeat: int = 5,
+    quick: bool = False,
+    engine: Optional[str] = None,
+    log=print,
+) -> Dict[str, Any]:
+    sha, dirty = commit_id()
+    results: Dict[str, Any] = {}
+    for b in benchmarks(quick, engine):
+        if select and select not in b.name:
+            continue
+        res = results[b.name] = run_benchmark(b, repeat)
+        log(f"{b.name:>28}: {res['median_s'] * 1e3:10.3f} ms  ({res['per_op_us']:,.2f} us/op)")
+    return {
+        "schema": SCHEMA,
+        "commit": sha,
+        "dirty": dirty,
+        "quick": quick,
+        "engine": engine,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "machine": machine_info(),
+        "results": results,
+    }
+
+
+def compare(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.10,
+    per_bench: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    """
+    Median ratio current / baseline per shared benchmark. A benchmark
+    regresses when the ratio exceeds 1 + its threshold.
+    """
+    per_bench = per_bench or {}
+    rows = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        limit = per_bench.get(name, threshold)
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        rows.append({"name": name, "baseline_s": base["median_s"], "current_s": cur["median_s"],
+                     "ratio": ratio, "threshold": limit, "regressed": ratio > 1.0 + limit})
+    warnings = []
+    if current["machine"]["machine_id"] != baseline["machine"]["machine_id"]:
+        warnings.append(
+            f"baseline is from machine {baseline['machine']['machine_id']}, this is "
+            f"{current['machine']['machine_id']}; timings may not be comparable"
+        )
+    if current.get("quick") != baseline.get("quick"):
+        warnings.append("quick and full runs use different input sizes")
+    return {
+        "rows": rows,
+        "regressions": [r for r in rows if r["regressed"]],
+        "missing": sorted(set(baseline["results"]) - set(current["results"])),
+        "warnings": warnings,
+    }
+
+
+def _format_comparison(cmp: Dict[str, Any]) -> str:
+    lines = [f"{'benchmark':>28}  {'baseline':>11}  {'current':>11}  {'ratio':>6}"]
+    for r in cmp["rows"]:
+        flag = f"  REGRESSION (> +{r['threshold']:.0%})" if r["regressed"] else ""
+        lines.append(
+            f"{r['name']:>28}  {r['baseline_s'] * 1e3:9.3f}ms  {r['current_s'] * 1e3:9.3f}ms  {r['ratio']:6.2f}{flag}"
+        )
+    lines.extend(f"warning: {w}" for w in cmp["warnings"])
+    return "\n".join(lines)
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m backend.bench.suite")
+    ap.add_argument("-k", "--select", help="only benchmarks whose name contains this")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--quick", action="store_true", help="smaller inputs, for smoke runs")
+    ap.add_argument("--engine", nargs="?", const="", metavar="PATH",
+                    help="also benchmark a built engine over ndjson and bin1 (default path: build-engine/)")
+    ap.add_argument("--out", default="bench_results", help="results directory (OUT/<machine_id>/<commit>.json)")
+    ap.add_argument("--baseline", help="compare against this results JSON")
+    ap.add_argument("--save-baseline", help="also write the results to this path")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown, 0.10 = 10%%")
+    ap.add_argument("--threshold-for", action="append", default=[], metavar="NAME=FRACTION",
+                    help="per-benchmark threshold, repeatable")
+    args = ap.parse_args(argv)
+
+    per_bench: Dict[str, float] = {}
+    for item in args.threshold_for:
+        name, _, value = item.partition("=")
+        if not value:
+            ap.error(f"--threshold-for expects NAME=FRACTION, got {item!r}")
+        per_bench[name] = float(value)
+
+    engine = args.engine
+    if engine == "":
+        from backend.api.engine_bridge import default_engine_path
+
+        try:
+            engine = default_engine_path()
+        except FileNotFoundError as e:
+            ap.error(str(e))
+
+    res = run_suite(args.select, repeat=args.repeat, quick=args.quick, engine=engine)
+    if not res["results"]:
+        print(f"no benchmark matches {args.select!r}", file=sys.stderr)
+        return 2
+
+    sha = res["commit"][:12] + ("-dirty" if res["dirty"] else "")
+    path = Path(args.out) / res["machine"]["machine_id"] / f"{sha}.json"
+    _write_json(path, res)
+    print(f"results: {path}")
+    if args.save_baseline:
+        _write_json(Path(args.save_baseline), res)
+        print(f"baseline: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        cmp = compare(res, base, args.threshold, per_bench)
+        print()
+        print(_format_comparison(cmp))
+        if cmp["regressions"]:
+            names = ", ".join(r["name"] for r in cmp["regressions"])
+            print(f"\nFAIL: {len(cmp['regressions'])} regression(s) vs {args.baseline}: {names}", file=sys.stderr)
+            return 1
+        print(f"\nOK: no regressions vs {args.baseline} ({base['commit'][:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
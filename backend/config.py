@@ -1,6 +1,7 @@
 # backend/config.py
 from __future__ import annotations
 from pydantic import BaseModel
+from typing import Optional
 import os
 
 
@@ -14,15 +15,58 @@ class Settings(BaseModel):
     per_trade_notional_cap: float = 50_000.0
     max_session_drawdown_pct: float = 10.0
 
-    # Market data
+    # Market data; binance_symbols defaults to [binance_symbol]. binance_ws_url can
+    # point at a local stand-in (backend/data/replay_server.py)
     binance_symbol: str = "BTCUSDT"
+    binance_symbols: list[str] = []
+    binance_ws_url: str = "wss://stream.binance.com:9443"
+    mark_conflate_sec: float = 0.1
 
-    # WebSocket streaming interval
+    # Tick store (backend/data/ticks.py): record_ticks appends every bookTicker
+    # message under tick_dir; the "ticks" backtest data_source reads it back
+    tick_dir: str = "data/ticks"
+    record_ticks: bool = False
+
+    # Historical bar store (backend/data/yahoo.py); bar_fetch=False serves only stored bars
+    bar_dir: str = "data/bars"
+    bar_fetch: bool = True
+
+    # WebSocket streaming interval; fills buffered per slow client before dropping
     metrics_ws_interval_sec: float = 1.0
+    ws_max_pending_fills: int = 1_000
+
+    # Live history bounds: raw equity points, per-second/per-minute buckets, fills kept
+    equity_raw_capacity: int = 100_000
+    equity_1s_buckets: int = 86_400
+    equity_1m_buckets: int = 43_200
+    max_session_fills: int = 10_000
+
+    # Backtest caches (quote series / strategy signals); cache_dir enables the on-disk quote tier
+    quote_cache_mb: float = 256.0
+    signal_cache_mb: float = 64.0
+    cache_dir: Optional[str] = None
+
+    # Engine wire protocol: "auto" negotiates bin1 and falls back to ndjson
+    engine_protocol: str = "auto"
+
+    # Per-stage order latency histograms (/debug/latency)
+    latency_enabled: bool = True
+
+    # cProfile dumps of backtest requests with profile_dump=true
+    profile_dir: str = "data/profiles"
 
 
 SETTINGS = Settings(
     # optionally override from environment
     allowed_origins=os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else ["http://localhost:3000", "http://localhost:5173"],
     binance_symbol=os.getenv("BINANCE_SYMBOL", "BTCUSDT"),
+    binance_symbols=[s.strip() for s in os.getenv("BINANCE_SYMBOLS", "").split(",") if s.strip()],
+    binance_ws_url=os.getenv("BINANCE_WS_URL", "wss://stream.binance.com:9443"),
+    cache_dir=os.getenv("NOVAQUANT_CACHE_DIR") or None,
+    tick_dir=os.getenv("NOVAQUANT_TICK_DIR", "data/ticks"),
+    record_ticks=os.getenv("NOVAQUANT_RECORD_TICKS", "").lower() in ("1", "true", "yes"),
+    bar_dir=os.getenv("NOVAQUANT_BAR_DIR", "data/bars"),
+    bar_fetch=os.getenv("NOVAQUANT_BAR_FETCH", "1").lower() not in ("0", "false", "no"),
+    engine_protocol=os.getenv("NOVAQUANT_ENGINE_PROTOCOL", "auto"),
+    profile_dir=os.getenv("NOVAQUANT_PROFILE_DIR", "data/profiles"),
 )
@@ -7,15 +7,34 @@ Requires:
 
 Binance stream docs: wss://stream.binance.com:9443/ws/{symbol_lower}@bookTicker
 Message includes best bid/ask.
+
+BookTickerIngestor subscribes to many symbols over one combined stream
+(/stream?streams=a@bookTicker/b@bookTicker) and conflates: only the latest
+quote per symbol survives each interval, delivered as one batch. An
+optional tick recorder (backend/data/ticks.py; a BackgroundTickRecorder
+keeps disk writes off the event loop) gets every message before
+conflation, stamped with the local receive time.
 """
 from __future__ import annotations
 
 import asyncio
 import json
-from typing import Callable, Optional
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import websockets
 
+if TYPE_CHECKING:
+    from backend.data.ticks import BackgroundTickRecorder, TickRecorder
+
+DEFAULT_WS_URL = "wss://stream.binance.com:9443"
+
+log = logging.getLogger(__name__)
+
+# symbol -> (mid, bid, ask)
+QuoteBatch = Dict[str, Tuple[float, float, float]]
+
 
 async def run_bookticker_loop(
     symbol: str,
@@ -38,4 +57,152 @@ async def run_bookticker_loop(
         except asyncio.CancelledError:
             raise
         except Exception:
-            await asyncio.sleep(reconnect_delay_sec)
+            pass
+        # dropped or closed by the server: back off either way
+        await asyncio.sleep(reconnect_delay_sec)
+
+
+class IngestStats:
+    __slots__ = (
+        "messages", "quotes_out", "batches", "reconnects", "errors", "batch_errors", "started",
+        "window_sec", "_win_t", "_win_msgs", "_rate",
+    )
+
+    def __init__(self, window_sec: float = 1.0):
+        self.messages = 0  # bookTicker messages received
+        self.quotes_out = 0  # per-symbol quotes delivered after conflation
+        self.batches = 0
+        self.reconnects = 0
+        self.errors = 0  # unparseable messages
+        self.batch_errors = 0  # on_batch calls that raised
+        self.started = time.monotonic()
+        self.window_sec = window_sec
+        self._win_t = self.started
+        self._win_msgs = 0
+        self._rate = 0.0
+
+    def advance(self, now: Optional[float] = None) -> None:
+        """Close the rate window once window_sec has passed (called by the flush loop)."""
+        now = time.monotonic() if now is None else now
+        dt = now - self._win_t
+        if dt >= self.window_sec:
+            self._rate = (self.messages - self._win_msgs) / dt
+            self._win_t, self._win_msgs = now, self.messages
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus rates; messages_per_sec is over the last completed window, so reading it changes nothing."""
+        now = time.monotonic()
+        return {
+            "messages": self.messages,
+            "quotes_out": self.quotes_out,
+            "batches": self.batches,
+            "reconnects": self.reconnects,
+            "errors": self.errors,
+            "batch_errors": self.batch_errors,
+            "messages_per_sec": self._rate,
+            "avg_messages_per_sec": self.messages / max(now - self.started, 1e-9),
+            # share of messages superseded by a newer quote for the same symbol
+            "conflated_ratio": (1.0 - self.quotes_out / self.messages) if self.messages else 0.0,
+        }
+
+
+class BookTickerIngestor:
+    """
+    Combined-stream bookTicker ingestion for many symbols.
+
+    The receive loop only records the latest raw (bid, ask) per symbol; a
+    flush loop every `conflate_sec` converts those and calls
+    on_batch({symbol: (mid, bid, ask)}) once. Symbols are upper-case in the
+    batch, as Binance reports them.
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        on_batch: Callable[[QuoteBatch], None],
+        *,
+        conflate_sec: float = 0.1,
+        url: str = DEFAULT_WS_URL,
+        reconnect_delay_sec: float = 2.0,
+        recorder: Optional[Union["BackgroundTickRecorder", "TickRecorder"]] = None,
+    ):
+        self.symbols: List[str] = [s.upper() for s in symbols]
+        if not self.symbols:
+            raise ValueError("need at least one symbol")
+        self.on_batch = on_batch
+        self.conflate_sec = conflate_sec
+        self.url = url.rstrip("/")
+        self.reconnect_delay_sec = reconnect_delay_sec
+        self.recorder = recorder
+        self.stats = IngestStats()
+        self._latest: Dict[str, Tuple[str, str]] = {}
+
+    @property
+    def stream_url(self) -> str:
+        streams = "/".join(f"{s.lower()}@bookTicker" for s in self.symbols)
+        return f"{self.url}/stream?streams={streams}"
+
+    async def run(self) -> None:
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await self._recv_loop()
+        finally:
+            flusher.cancel()
+            self.flush()
+            if self.recorder is not None:
+                self.recorder.flush()
+
+    def flush(self) -> None:
+        """Deliver the conflated quotes collected since the last flush."""
+        if not self._latest:
+            return
+        latest, self._latest = self._latest, {}
+        batch: QuoteBatch = {}
+        for sym, (b, a) in latest.items():
+            bid, ask = float(b), float(a)
+            batch[sym] = ((bid + ask) / 2.0, bid, ask)
+        self.stats.quotes_out += len(batch)
+        self.stats.batches += 1
+        self.on_batch(batch)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.conflate_sec)
+            self.stats.advance()
+            try:
+                self.flush()
+            except Exception:
+                # that batch is lost; the next interval delivers newer quotes
+                self.stats.batch_errors += 1
+                log.exception("market data batch handler failed")
+
+    async def _recv_loop(self) -> None:
+        stats = self.stats
+        recorder = self.recorder
+        first = True
+        while True:
+            if not first:
+                stats.reconnects += 1
+            first = False
+            try:
+                # short close_timeout: shutdown should not wait on a busy server
+                async with websockets.connect(
+                    self.stream_url, ping_interval=20, ping_timeout=20, close_timeout=1
+                ) as ws:
+                    async for raw in ws:
+                        stats.messages += 1
+                        try:
+                            msg = json.loads(raw)
+                            data = msg.get("data", msg)  # combined stream wraps the payload
+                            # floats are parsed at flush, only for the surviving quote
+                            self._latest[data["s"]] = (data["b"], data["a"])
+                            if recorder is not None:
+                                recorder.record(time.time_ns(), data["s"], float(data["b"]), float(data["a"]))
+                        except (ValueError, KeyError, TypeError, AttributeError):
+                            stats.errors += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            # dropped, or closed cleanly by the server: back off either way
+            await asyncio.sleep(self.reconnect_delay_sec)
@@ -0,0 +1,134 @@
+# backend/data/replay_server.py
+"""
+Local stand-in for the Binance combined stream, for tests and load runs.
+
+Replays recorded bookTicker messages (one raw JSON message per line, as
+written by record_bookticker) to every client that connects, at a fixed
+rate. Point BookTickerIngestor / BINANCE_WS_URL at ws://127.0.0.1:<port>.
+
+    python -m backend.data.replay_server recorded.ndjson --port 9001 --rate 5000 --loop
+    python -m backend.data.replay_server --synthetic BTCUSDT,ETHUSDT --port 9001
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Iterator, List, Sequence
+
+import websockets
+
+from backend.data.binance_ws import DEFAULT_WS_URL
+
+
+def load_messages(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def synthetic_messages(symbols: Sequence[str], n: int, *, seed: int = 0) -> Iterator[str]:
+    """Combined-stream bookTicker messages with random-walk quotes."""
+    rng = random.Random(seed)
+    mids = {s.upper(): 100.0 * (k + 1) for k, s in enumerate(symbols)}
+    syms = list(mids)
+    for u in range(n):
+        sym = syms[rng.randrange(len(syms))]
+        mid = mids[sym] = mids[sym] * (1.0 + rng.gauss(0.0, 1e-4))
+        half = mid * 1e-5
+        data = {"u": u, "s": sym, "b": f"{mid - half:.8f}", "B": "1.0", "a": f"{mid + half:.8f}", "A": "1.0"}
+        yield json.dumps({"stream": f"{sym.lower()}@bookTicker", "data": data}, separators=(",", ":"))
+
+
+async def record_bookticker(symbols: Sequence[str], path: str, *, seconds: float, url: str = DEFAULT_WS_URL) -> int:
+    """Record raw combined-stream messages from `url` for `seconds`; returns the count."""
+    streams = "/".join(f"{s.lower()}@bookTicker" for s in symbols)
+    n = 0
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    with open(path, "w", encoding="utf-8") as out:
+        async with websockets.connect(f"{url.rstrip('/')}/stream?streams={streams}") as ws:
+            while loop.time() < deadline:
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                out.write(raw if isinstance(raw, str) else raw.decode("utf-8"))
+                out.write("\n")
+                n += 1
+    return n
+
+
+class ReplayServer:
+    """
+    Serves `messages` to each client at `rate` messages/sec (0 = as fast as
+    possible), in bursts of `burst`. loop=True replays forever; otherwise
+    the connection is closed after the last message.
+    """
+
+    def __init__(self, messages: Sequence[str], *, rate: float = 0.0, burst: int = 100, loop: bool = False):
+        if not messages:
+            raise ValueError("nothing to replay")
+        self.messages = list(messages)
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.loop = loop
+        self.connections = 0
+        self.sent = 0
+        self._server = None
+
+    async def _handler(self, ws) -> None:
+        self.connections += 1
+        msgs = self.messages
+        pause = self.burst / self.rate if self.rate > 0 else 0.0
+        try:
+            while True:
+                for k in range(0, len(msgs), self.burst):
+                    for raw in msgs[k : k + self.burst]:
+                        await ws.send(raw)
+                    self.sent += min(self.burst, len(msgs) - k)
+                    await asyncio.sleep(pause)
+                if not self.loop:
+                    break
+        except websockets.ConnectionClosed:
+            pass
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start listening; returns the base ws:// URL (port 0 picks a free port)."""
+        self._server = await websockets.serve(self._handler, host, port)
+        sock = next(iter(self._server.sockets))
+        return f"ws://{host}:{sock.getsockname()[1]}"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _main(args: argparse.Namespace) -> None:
+    if args.synthetic:
+        messages = list(synthetic_messages(args.synthetic.split(","), args.count))
+    elif args.path:
+        messages = load_messages(args.path)
+    else:
+        raise SystemExit("give a recorded file or --synthetic SYMBOLS")
+    server = ReplayServer(messages, rate=args.rate, loop=args.loop)
+    url = await server.start(args.host, args.port)
+    print(f"replaying {len(messages)} messages on {url}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("path", nargs="?")
+    ap.add_argument("--synthetic", help="comma-separated symbols instead of a recorded file")
+    ap.add_argument("--count", type=int, default=100_000)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9001)
+    ap.add_argument("--rate", type=float, default=0.0)
+    ap.add_argument("--loop", action="store_true")
+    try:
+        asyncio.run(_main(ap.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,388 @@
+# backend/data/ticks.py
+"""
+Append-only columnar tick store (timestamp, bid, ask per symbol).
+
+Layout under `root`:
+
+    SYMBOL/YYYYMMDD/000000.ts    int64 ns since epoch (UTC), non-decreasing
+    SYMBOL/YYYYMMDD/000000.bid   float64
+    SYMBOL/YYYYMMDD/000000.ask   float64
+    SYMBOL/YYYYMMDD/index.json   {"chunks": [{"name", "rows", "t0", "t1"}, ...]}
+
+Columns are raw little-endian arrays, so a chunk is read with np.memmap
+and never parsed. A day is split into chunks of at most `chunk_rows`;
+index.json lists sealed chunks with their time range (the chunk being
+written is found from the directory and sized from its files). Readers
+slice each chunk by time with a binary search on the mapped ts column.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import numbers
+import os
+import queue
+import threading
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.backtest.data import QuoteFrame
+
+COLUMNS = (("ts", np.int64, "q"), ("bid", np.float64, "d"), ("ask", np.float64, "d"))
+_ITEM = 8  # every column is 8 bytes per row
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+
+TimeLike = Union[int, np.integer, float, str, datetime, None]
+
+log = logging.getLogger(__name__)
+
+
+def to_ns(t: TimeLike) -> Optional[int]:
+    """
+    int or numpy integer (ns), float (unix seconds), ISO date/datetime
+    string or datetime -> ns; naive means UTC.
+    """
+    if t is None:
+        return None
+    if isinstance(t, numbers.Integral):
+        return int(t)
+    if isinstance(t, numbers.Real):
+        return round(float(t) * 1e9)
+    if isinstance(t, str):
+        t = datetime.fromisoformat(t)
+    if t.tzinfo is None:
+        t = t.replace(tzinfo=timezone.utc)
+    return int(t.timestamp()) * 1_000_000_000 + t.microsecond * 1000
+
+
+def _day_of(ts_ns: int) -> str:
+    return datetime.fromtimestamp(ts_ns // 1_000_000_000, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _day_start_ns(day: str) -> int:
+    return to_ns(datetime.strptime(day, "%Y%m%d").replace(tzinfo=timezone.utc))
+
+
+def _read_index(day_dir: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(day_dir / "index.json", "r", encoding="utf-8") as f:
+            return {c["name"]: c for c in json.load(f)["chunks"]}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _write_index(day_dir: Path, chunks: Dict[str, Dict[str, Any]]) -> None:
+    tmp = day_dir / "index.json.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"chunks": [chunks[k] for k in sorted(chunks)]}, f)
+    os.replace(tmp, day_dir / "index.json")
+
+
+def _chunk_rows(day_dir: Path, name: str) -> int:
+    """Complete rows on disk (a torn append leaves the columns at different lengths)."""
+    sizes = []
+    for col, _, _ in COLUMNS:
+        try:
+            sizes.append((day_dir / f"{name}.{col}").stat().st_size)
+        except OSError:
+            return 0
+    return min(sizes) // _ITEM
+
+
+# ---------- writer ----------
+
+class _SymbolWriter:
+    __slots__ = ("dir", "day", "day_dir", "chunk", "rows", "files", "buf", "last_ts", "t0")
+
+    def __init__(self, root: Path, symbol: str):
+        self.dir = root / symbol
+        self.day: Optional[str] = None
+        self.day_dir: Optional[Path] = None
+        self.chunk = -1
+        self.rows = 0  # rows in the open chunk, on disk + buffered
+        self.files: List[Any] = []
+        self.buf = tuple(array(code) for _, _, code in COLUMNS)
+        self.last_ts = 0
+        self.t0 = 0
+
+
+class TickRecorder:
+    """
+    Buffers ticks per symbol and appends them column-wise. Data is written
+    every `flush_rows` ticks or `flush_sec` of tick time, whichever first.
+    Timestamps must not go backwards per symbol; earlier ones are clamped
+    to the last written time so the ts column stays sorted.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        *,
+        chunk_rows: int = 1 << 20,
+        flush_rows: int = 8192,
+        flush_sec: float = 1.0,
+    ):
+        self.root = Path(root)
+        self.chunk_rows = chunk_rows
+        self.flush_rows = flush_rows
+        self.flush_ns = int(flush_sec * 1e9)
+        self.recorded = 0
+        self._writers: Dict[str, _SymbolWriter] = {}
+        self._last_flush = 0
+
+    def record(self, ts_ns: int, symbol: str, bid: float, ask: float) -> None:
+        w = self._writers.get(symbol)
+        if w is None:
+            w = self._writers[symbol] = _SymbolWriter(self.root, symbol)
+        if ts_ns < w.last_ts:
+            ts_ns = w.last_ts
+
+        if w.day is None or ts_ns >= w.t0 + NS_PER_DAY or w.rows >= self.chunk_rows:
+            self._rotate(w, ts_ns)
+
+        ts, bids, asks = w.buf
+        ts.append(ts_ns)
+        bids.append(bid)
+        asks.append(ask)
+        w.last_ts = ts_ns
+        w.rows += 1
+        self.recorded += 1
+
+        if len(ts) >= self.flush_rows or ts_ns - self._last_flush >= self.flush_ns:
+            self.flush()
+            self._last_flush = ts_ns
+
+    def flush(self) -> None:
+        for w in self._writers.values():
+            self._flush_writer(w)
+
+    def close(self) -> None:
+        for w in self._writers.values():
+            self._flush_writer(w)
+            self._seal(w)
+        self._writers.clear()
+
+    # ---------- internals ----------
+
+    def _flush_writer(self, w: _SymbolWriter) -> None:
+        if not w.buf[0]:
+            return
+        for f, b in zip(w.files, w.buf):
+            f.write(b.tobytes())
+            f.flush()
+            del b[:]
+
+    def _seal(self, w: _SymbolWriter) -> None:
+        """Record the open chunk's row count and time range in index.json."""
+        for f in w.files:
+            f.close()
+        w.files = []
+        if w.day_dir is None or w.chunk < 0:
+            return
+        name = f"{w.chunk:06d}"
+        rows = _chunk_rows(w.day_dir, name)
+        if rows == 0:
+            return
+        ts = np.memmap(w.day_dir / f"{name}.ts", dtype=np.int64, mode="r", shape=(rows,))
+        index = _read_index(w.day_dir)
+        index[name] = {"name": name, "rows": rows, "t0": int(ts[0]), "t1": int(ts[-1])}
+        del ts
+        _write_index(w.day_dir, index)
+
+    def _rotate(self, w: _SymbolWriter, ts_ns: int) -> None:
+        self._flush_writer(w)
+        self._seal(w)
+
+        day = _day_of(ts_ns)
+        if day != w.day:
+            w.day = day
+            w.day_dir = w.dir / day
+            w.day_dir.mkdir(parents=True, exist_ok=True)
+            w.t0 = _day_start_ns(day)
+            # resume after the last existing chunk (recorder restarts mid-day)
+            existing = sorted(p.stem for p in w.day_dir.glob("*.ts"))
+            w.chunk = int(existing[-1]) + 1 if existing else 0
+        else:
+            w.chunk += 1
+
+        assert w.day_dir is not None
+        name = f"{w.chunk:06d}"
+        w.files = [open(w.day_dir / f"{name}.{col}", "ab") for col, _, _ in COLUMNS]
+        w.rows = 0
+
+
+_FLUSH = object()
+_STOP = object()
+
+
+class BackgroundTickRecorder:
+    """
+    Runs a TickRecorder on a writer thread so record() never touches the
+    disk: it only queues the row (ingestion calls it on the event loop).
+    The queue holds at most `max_pending` rows; beyond that rows are
+    dropped and counted. An OSError (disk full, permissions) stops
+    recording: the error is logged and kept in `error`, and later rows are
+    counted as dropped. Buffers are also flushed whenever the queue has
+    been idle for flush_sec.
+    """
+
+    def __init__(self, recorder: TickRecorder, *, max_pending: int = 1 << 20, flush_sec: float = 1.0):
+        self.recorder = recorder
+        self.max_pending = max_pending
+        self.flush_sec = flush_sec
+        self.error: Optional[str] = None
+        # each counter has a single writer: record() and the writer thread
+        self._rejected = 0
+        self._discarded = 0
+        self._q: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="tick-recorder", daemon=True)
+        self._thread.start()
+
+    @property
+    def recorded(self) -> int:
+        return self.recorder.recorded
+
+    @property
+    def dropped(self) -> int:
+        return self._rejected + self._discarded
+
+    def record(self, ts_ns: int, symbol: str, bid: float, ask: float) -> None:
+        if self.error is not None or self._q.qsize() >= self.max_pending:
+            self._rejected += 1
+            return
+        self._q.put((ts_ns, symbol, bid, ask))
+
+    def flush(self) -> None:
+        self._q.put(_FLUSH)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._q.put(_STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        rec = self.recorder
+        while True:
+            try:
+                item = self._q.get(timeout=self.flush_sec)
+            except queue.Empty:
+                item = _FLUSH
+            if item is _STOP:
+                self._guard(rec.close)
+                return
+            if item is _FLUSH:
+                if self.error is None:
+                    self._guard(rec.flush)
+            elif self.error is not None or not self._guard(rec.record, *item):
+                self._discarded += 1  # the failing row, and rows queued before the failure
+
+    def _guard(self, fn, *args) -> bool:
+        try:
+            fn(*args)
+            return True
+        except OSError as e:
+            if self.error is None:
+                self.error = str(e)
+                log.error("tick recording stopped: %s", e)
+            return False
+
+
+# ---------- reader ----------
+
+class TickStore:
+    """Memory-mapped reads over a TickRecorder root."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def symbols(self) -> List[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def days(self, symbol: str) -> List[str]:
+        d = self.root / symbol
+        if not d.exists():
+            return []
+        return sorted(p.name for p in d.iterdir() if p.is_dir() and p.name.isdigit())
+
+    def chunks(
+        self, symbol: str, start: TimeLike = None, end: TimeLike = None
+    ) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """(ts, bid, ask) memmap slices with start <= ts < end, in time order."""
+        lo_ns, hi_ns = to_ns(start), to_ns(end)
+        for day in self.days(symbol):
+            day0 = _day_start_ns(day)
+            if (hi_ns is not None and day0 >= hi_ns) or (lo_ns is not None and day0 + NS_PER_DAY <= lo_ns):
+                continue
+            day_dir = self.root / symbol / day
+            index = _read_index(day_dir)
+            for name in sorted(p.stem for p in day_dir.glob("*.ts")):
+                meta = index.get(name)
+                if meta is not None and (
+                    (hi_ns is not None and meta["t0"] >= hi_ns) or (lo_ns is not None and meta["t1"] < lo_ns)
+                ):
+                    continue
+                rows = _chunk_rows(day_dir, name)
+                if rows == 0:
+                    continue
+                cols = [
+                    np.memmap(day_dir / f"{name}.{col}", dtype=dtype, mode="r", shape=(rows,))
+                    for col, dtype, _ in COLUMNS
+                ]
+                ts = cols[0]
+                a = 0 if lo_ns is None else int(np.searchsorted(ts, lo_ns, side="left"))
+                b = rows if hi_ns is None else int(np.searchsorted(ts, hi_ns, side="left"))
+                if b > a:
+                    yield ts[a:b], cols[1][a:b], cols[2][a:b]
+
+    def iter_frames(
+        self,
+        symbol: str,
+        start: TimeLike = None,
+        end: TimeLike = None,
+        *,
+        rows: int = 1 << 16,
+        max_rows: Optional[int] = None,
+    ) -> Iterator[QuoteFrame]:
+        """
+        QuoteFrame chunks of up to `rows` ticks; i counts ticks from 0 over
+        the range. Only one chunk is resident at a time.
+        """
+        done = 0
+        for ts, bid, ask in self.chunks(symbol, start, end):
+            for a in range(0, len(ts), rows):
+                b = min(a + rows, len(ts))
+                if max_rows is not None:
+                    b = min(b, a + max_rows - done)
+                frame = QuoteFrame.empty(b - a)
+                d = frame.data
+                d[0] = np.arange(done, done + b - a)
+                d[2] = bid[a:b]
+                d[3] = ask[a:b]
+                np.add(d[2], d[3], out=d[1])
+                d[1] *= 0.5
+                np.maximum(d[3] - d[2], 0.0, out=d[4])
+                yield frame
+                done += b - a
+                if max_rows is not None and done >= max_rows:
+                    return
+
+    def load_frame(
+        self, symbol: str, start: TimeLike = None, end: TimeLike = None, *, max_rows: Optional[int] = None
+    ) -> QuoteFrame:
+        """Whole range as one QuoteFrame (materialized; prefer iter_frames for long ranges)."""
+        frames = [f.data for f in self.iter_frames(symbol, start, end, max_rows=max_rows)]
+        if not frames:
+            return QuoteFrame.empty(0)
+        return QuoteFrame(np.concatenate(frames, axis=1))
+
+    def timestamps(self, symbol: str, start: TimeLike = None, end: TimeLike = None) -> np.ndarray:
+        """ns timestamps matching load_frame's rows."""
+        parts = [np.asarray(ts) for ts, _, _ in self.chunks(symbol, start, end)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
@@ -0,0 +1,398 @@
+# backend/data/yahoo.py
+"""
+Local historical bar store behind the "yahoo" backtest data source.
+
+Bars are imported once (CSV / Parquet / a fetched DataFrame) into
+per-symbol, per-interval column files:
+
+    ROOT/SYMBOL/INTERVAL/meta.json       {"gen", "rows", "columns", "covered"}
+    ROOT/SYMBOL/INTERVAL/g000003/ts      int64 ns (UTC), sorted, unique: the date index
+    ROOT/SYMBOL/INTERVAL/g000003/close   float64 (open, high, low, adj_close, volume likewise)
+
+load_yahoo() maps the current generation read-only and returns a BarFrame
+slice (a binary search on ts, no copy). "covered" lists the [start, end)
+ranges known to be complete, so weekends and holidays are not refetched;
+only gaps in it go to the fetcher (yfinance by default, if installed).
+A write builds a new generation directory and then swaps meta.json, so
+readers never see a half-written store.
+
+    python -m backend.data.yahoo import SPY spy.csv --interval 1d
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.config import SETTINGS
+from backend.data.ticks import TimeLike, to_ns
+
+BAR_COLUMNS = ("open", "high", "low", "close", "adj_close", "volume")
+
+_MIN = 60 * 1_000_000_000
+_DAY = 1440 * _MIN
+# nominal bar length per yfinance interval, used to avoid marking a still-forming bar as covered
+INTERVAL_NS: Dict[str, int] = {
+    "1m": _MIN, "2m": 2 * _MIN, "5m": 5 * _MIN, "15m": 15 * _MIN, "30m": 30 * _MIN,
+    "60m": 60 * _MIN, "90m": 90 * _MIN, "1h": 60 * _MIN,
+    "1d": _DAY, "5d": 5 * _DAY, "1wk": 7 * _DAY, "1mo": 31 * _DAY, "3mo": 92 * _DAY,
+}
+
+# longest closure (a long weekend) an empty fetch is trusted to mean "no bars";
+# longer empty results are more likely failed fetches and stay uncovered
+_QUIET_NS = 4 * _DAY
+
+Columns = Dict[str, np.ndarray]  # "ts" (int64 ns) plus float64 bar columns, equal length
+Fetcher = Callable[[str, int, int, str], Optional[Columns]]
+Range = Tuple[int, int]
+
+
+class BarFrame:
+    """
+    Read-only bar columns over one time range. df["close"] / df.close give
+    zero-copy views of the mapped files; `index` is the datetime64[ns] view
+    of ts. Use to_pandas() when a real DataFrame is needed.
+    """
+
+    __slots__ = ("_ts", "_cols")
+
+    def __init__(self, ts: np.ndarray, cols: Dict[str, np.ndarray]):
+        self._ts = ts
+        self._cols = cols
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._cols)
+
+    @property
+    def index(self) -> np.ndarray:
+        return self._ts.view("datetime64[ns]")
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._ts
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self._cols[name]
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self._cols[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._cols
+
+    def __len__(self) -> int:
+        return len(self._ts)
+
+    @property
+    def empty(self) -> bool:
+        return len(self._ts) == 0
+
+    def to_pandas(self):
+        import pandas as pd
+
+        return pd.DataFrame({k: np.asarray(v) for k, v in self._cols.items()}, index=pd.DatetimeIndex(self.index))
+
+
+# ---------- coverage ranges ----------
+
+def _merge_ranges(ranges: Iterable[Range]) -> List[Range]:
+    out: List[Range] = []
+    for a, b in sorted(ranges):
+        if b <= a:
+            continue
+        if out and a <= out[-1][1]:
+            out[-1] = (out[-1][0], max(out[-1][1], b))
+        else:
+            out.append((a, b))
+    return out
+
+
+def _missing(covered: Sequence[Range], start: int, end: int) -> List[Range]:
+    """Parts of [start, end) not in `covered` (merged, sorted)."""
+    out: List[Range] = []
+    cur = start
+    for a, b in covered:
+        if b <= cur:
+            continue
+        if a >= end:
+            break
+        if a > cur:
+            out.append((cur, a))
+        cur = max(cur, b)
+    if cur < end:
+        out.append((cur, end))
+    return out
+
+
+# ---------- store ----------
+
+class BarStore:
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        # (symbol, interval) -> (meta.json stamp, meta, mapped columns)
+        self._open: Dict[Tuple[str, str], Tuple[Tuple[int, int], Dict[str, Any], Dict[str, np.ndarray]]] = {}
+
+    def _dir(self, symbol: str, interval: str) -> Path:
+        return self.root / symbol.upper() / interval
+
+    def meta(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
+        return self._mapped(symbol, interval)[0]
+
+    def _mapped(self, symbol: str, interval: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, np.ndarray]]:
+        d = self._dir(symbol, interval)
+        key = (symbol.upper(), interval)
+        for _ in range(3):
+            try:
+                st = (d / "meta.json").stat()
+            except OSError:
+                return None, {}
+            # meta.json is replaced, never rewritten in place: a new inode means a new generation
+            stamp = (st.st_ino, st.st_mtime_ns)
+            hit = self._open.get(key)
+            if hit is not None and hit[0] == stamp:
+                return hit[1], hit[2]
+            try:
+                meta, cols = self._map(d)
+            except FileNotFoundError:
+                continue  # a writer swapped generations under us; re-read meta.json
+            self._open[key] = (stamp, meta, cols)
+            return meta, cols
+        raise RuntimeError(f"bar store {d} keeps changing while being read")
+
+    @staticmethod
+    def _map(d: Path) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        with open(d / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        cols: Dict[str, np.ndarray] = {}
+        rows = meta["rows"]
+        if rows:
+            gen = d / f"g{meta['gen']:06d}"
+            cols["ts"] = np.memmap(gen / "ts", dtype=np.int64, mode="r", shape=(rows,))
+            for c in meta["columns"]:
+                cols[c] = np.memmap(gen / c, dtype=np.float64, mode="r", shape=(rows,))
+        return meta, cols
+
+    def read(self, symbol: str, interval: str, start: TimeLike = None, end: TimeLike = None) -> BarFrame:
+        """Bars with start <= ts < end as views of the mapped columns."""
+        meta, cols = self._mapped(symbol, interval)
+        if not cols:
+            names = (meta and meta["columns"]) or ["close"]
+            return BarFrame(np.empty(0, dtype=np.int64), {c: np.empty(0) for c in names})
+        ts = cols["ts"]
+        lo, hi = to_ns(start), to_ns(end)
+        a = 0 if lo is None else int(np.searchsorted(ts, lo, side="left"))
+        b = len(ts) if hi is None else int(np.searchsorted(ts, hi, side="left"))
+        return BarFrame(ts[a:b], {c: cols[c][a:b] for c in meta["columns"]})
+
+    def write(self, symbol: str, interval: str, new: Columns, covered: Iterable[Range] = ()) -> int:
+        """
+        Merge bars into the store (new rows win on equal timestamps) and
+        extend the covered ranges. Returns the stored row count.
+        """
+        with self._lock:
+            return self._write(symbol, interval, new, covered)
+
+    def _write(self, symbol: str, interval: str, new: Columns, covered: Iterable[Range]) -> int:
+        d = self._dir(symbol, interval)
+        meta, cols = self._mapped(symbol, interval)
+        old_cov = [tuple(r) for r in meta["covered"]] if meta else []
+        covered = _merge_ranges(old_cov + list(covered))
+
+        new_ts = np.asarray(new.get("ts", np.empty(0)), dtype=np.int64)
+        if len(new_ts) == 0 and meta is not None:
+            if covered != old_cov:
+                self._swap_meta(d, {**meta, "covered": covered})
+            return meta["rows"]
+
+        names = [c for c in BAR_COLUMNS if c in new or (meta and c in meta["columns"])]
+        old_ts = cols.get("ts", np.empty(0, dtype=np.int64))
+        keep = ~np.isin(old_ts, new_ts)
+        ts = np.concatenate([old_ts[keep], new_ts])
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        # duplicates inside `new` itself: keep the last one
+        last = np.append(ts[1:] != ts[:-1], True) if len(ts) else np.zeros(0, dtype=bool)
+        order, ts = order[last], ts[last]
+
+        gen = (meta["gen"] + 1) if meta else 0
+        gen_dir = d / f"g{gen:06d}"
+        gen_dir.mkdir(parents=True, exist_ok=True)
+        ts.tofile(gen_dir / "ts")
+        nan_new = np.full(len(new_ts), np.nan)
+        for c in names:
+            old_c = np.asarray(cols[c])[keep] if c in cols else np.full(int(keep.sum()), np.nan)
+            merged = np.concatenate([old_c, np.asarray(new.get(c, nan_new), dtype=np.float64)])
+            merged[order].tofile(gen_dir / c)
+
+        self._swap_meta(d, {"gen": gen, "rows": int(len(ts)), "columns": names, "covered": covered})
+        if meta is not None:
+            # open memmaps keep the old files alive until released
+            shutil.rmtree(d / f"g{meta['gen']:06d}", ignore_errors=True)
+        return int(len(ts))
+
+    @staticmethod
+    def _swap_meta(d: Path, meta: Dict[str, Any]) -> None:
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / "meta.json.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**meta, "covered": [list(r) for r in meta["covered"]]}, f)
+        os.replace(tmp, d / "meta.json")
+
+    def missing(self, symbol: str, interval: str, start: int, end: int) -> List[Range]:
+        meta = self.meta(symbol, interval)
+        covered = [tuple(r) for r in meta["covered"]] if meta else []
+        return _missing(covered, start, end)
+
+
+_STORES: Dict[str, BarStore] = {}
+
+
+def bar_store(root: Optional[Union[str, Path]] = None) -> BarStore:
+    """Shared BarStore per root (default SETTINGS.bar_dir), so mapped files are reused across calls."""
+    key = str(root or SETTINGS.bar_dir)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = BarStore(key)
+    return store
+
+
+# ---------- import / fetch ----------
+
+def columns_from_df(df) -> Columns:
+    """pandas OHLCV DataFrame (DatetimeIndex, yfinance or lower-case columns) -> Columns."""
+    if df is None or len(df) == 0:
+        return {"ts": np.empty(0, dtype=np.int64)}
+    names = df.columns
+    if getattr(names, "nlevels", 1) > 1:  # yfinance: (field, ticker)
+        names = names.get_level_values(0)
+    idx = df.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    out: Columns = {"ts": np.asarray(idx, dtype="datetime64[ns]").astype(np.int64)}
+    for k, name in enumerate(names):
+        col = str(name).strip().lower().replace(" ", "_")
+        if col in BAR_COLUMNS:
+            out[col] = np.asarray(df.iloc[:, k], dtype=np.float64)
+    return out
+
+
+def read_csv_bars(path: Union[str, Path]) -> Columns:
+    """CSV with a date column (Date / Datetime / Timestamp, else the first) and OHLCV columns."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower().replace(" ", "_") for h in next(reader)]
+        rows = [r for r in reader if r]
+    date_col = next((k for k, h in enumerate(header) if h in ("date", "datetime", "timestamp")), 0)
+    out: Columns = {"ts": np.array([to_ns(r[date_col].strip()) for r in rows], dtype=np.int64)}
+    for k, h in enumerate(header):
+        if h in BAR_COLUMNS:
+            out[h] = np.array([float(r[k]) if r[k].strip() else np.nan for r in rows], dtype=np.float64)
+    return out
+
+
+def import_bars(
+    symbol: str,
+    source: Union[str, Path, Any],
+    *,
+    interval: str = "1d",
+    root: Optional[Union[str, Path]] = None,
+) -> int:
+    """
+    Import bars from a CSV / Parquet path or a DataFrame and mark their
+    span as covered. Returns the stored row count.
+    """
+    if isinstance(source, (str, Path)):
+        if str(source).endswith((".parquet", ".pq")):
+            import pandas as pd
+
+            cols = columns_from_df(pd.read_parquet(source))
+        else:
+            cols = read_csv_bars(source)
+    else:
+        cols = columns_from_df(source)
+    if "close" not in cols:
+        raise ValueError(f"no close column in {source if isinstance(source, (str, Path)) else 'DataFrame'}")
+    covered = [(int(cols["ts"].min()), int(cols["ts"].max()) + 1)] if len(cols["ts"]) else []
+    return bar_store(root).write(symbol, interval, cols, covered)
+
+
+def yfinance_fetch(symbol: str, start_ns: int, end_ns: int, interval: str) -> Optional[Columns]:
+    """None if yfinance is not installed or the download failed (it reports errors as an empty frame)."""
+    try:
+        import yfinance as yf
+    except ImportError:
+        return None
+    df = yf.download(
+        symbol,
+        start=datetime.fromtimestamp(start_ns / 1e9, tz=timezone.utc),
+        end=datetime.fromtimestamp(end_ns / 1e9, tz=timezone.utc),
+        interval=interval,
+        auto_adjust=False,
+        progress=False,
+    )
+    if df is None or len(df) == 0:
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+        if errors.get(symbol.upper()) or errors.get(symbol):
+            return None
+    return columns_from_df(df)
+
+
+def load_yahoo(
+    symbol: str,
+    start: TimeLike = None,
+    end: TimeLike = None,
+    interval: str = "1d",
+    *,
+    root: Optional[Union[str, Path]] = None,
+    fetcher: Optional[Fetcher] = yfinance_fetch,
+) -> BarFrame:
+    """
+    Bars for [start, end) from the local store. Parts of the range not yet
+    covered are fetched first (fetcher=None or SETTINGS.bar_fetch=False
+    serves only what is stored); a fully covered range does no network or
+    parse work. A gap becomes covered only if its fetch returned bars or it
+    is too short to be more than a market closure; anything else is
+    retried on the next call.
+    """
+    store = bar_store(root)
+    lo, hi = to_ns(start), to_ns(end)
+    if fetcher is not None and SETTINGS.bar_fetch and lo is not None and hi is not None:
+        # the newest bar may still be forming; leave it uncovered so it is refetched
+        horizon = time.time_ns() - INTERVAL_NS.get(interval, _DAY)
+        gaps = store.missing(symbol, interval, lo, hi)
+        for a, b in gaps:
+            cols = fetcher(symbol, a, b, interval)
+            if cols is None:
+                break  # no fetcher backend available, or the fetch failed
+            got = len(cols.get("ts", ())) > 0
+            done = [(a, min(b, horizon))] if a < horizon and (got or b - a <= _QUIET_NS) else []
+            if got or done:
+                store.write(symbol, interval, cols, done)
+    return store.read(symbol, interval, lo, hi)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="import a CSV / Parquet file")
+    imp.add_argument("symbol")
+    imp.add_argument("path")
+    imp.add_argument("--interval", default="1d")
+    imp.add_argument("--root", default=None)
+    args = ap.parse_args()
+    n = import_bars(args.symbol, args.path, interval=args.interval, root=args.root)
+    print(f"{args.symbol.upper()} {args.interval}: {n} bars in {bar_store(args.root).root}")
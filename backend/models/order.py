@@ -1,7 +1,24 @@
 # backend/models/order.py
 from enum import Enum
-from pydantic import BaseModel, Field
-from typing import Annotated
+from pydantic import AfterValidator, BaseModel, Field
+from typing import Annotated, List
+
+# widest ids every engine protocol can carry (bin1 has fixed-width UTF-8 fields)
+ORDER_ID_MAX_BYTES = 32
+SYMBOL_MAX_BYTES = 16
+
+
+def _fits_bytes(limit: int):
+    def check(v: str) -> str:
+        if len(v.encode("utf-8")) > limit:
+            raise ValueError(f"must be at most {limit} bytes as UTF-8")
+        return v
+
+    return AfterValidator(check)
+
+
+OrderId = Annotated[str, Field(min_length=1, max_length=ORDER_ID_MAX_BYTES), _fits_bytes(ORDER_ID_MAX_BYTES)]
+Symbol = Annotated[str, Field(min_length=1, max_length=SYMBOL_MAX_BYTES), _fits_bytes(SYMBOL_MAX_BYTES)]
 
 
 class Side(str, Enum):
@@ -10,8 +27,17 @@ class Side(str, Enum):
 
 
 class Order(BaseModel):
-    order_id: Annotated[str, Field(min_length=1)]
-    symbol: Annotated[str, Field(min_length=1)]
+    order_id: OrderId
+    symbol: Symbol
     side: Side
     qty: Annotated[int, Field(gt=0)]
     px: Annotated[float, Field(gt=0)]
+
+
+class OrderBatch(BaseModel):
+    orders: Annotated[List[Order], Field(min_length=1, max_length=10_000)]
+
+
+class CancelRequest(BaseModel):
+    order_id: OrderId
+    symbol: Symbol
@@ -0,0 +1,175 @@
+# backend/services/broadcast.py
+"""
+One publisher, many WebSocket subscribers.
+
+The publisher computes each topic once per interval and offers the frame
+to every subscriber. Each subscriber has its own bounded buffer, merged by
+topic kind, so a slow client never holds up the others or grows memory:
+
+- "latest": snapshot topics (metrics); only the newest frame is kept
+- "merge":  keyed deltas (portfolio positions); pending deltas fold together
+- "append": event deltas (fills); a bounded backlog, overflow is counted in
+  "dropped" so the client knows to refetch
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+TOPIC_KINDS: Dict[str, str] = {"metrics": "latest", "portfolio": "merge", "fills": "append"}
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    __slots__ = ("topics", "_latest", "_merged", "_events", "_dropped", "_ready")
+
+    def __init__(self, topics: Iterable[str], max_events: int):
+        self.topics = frozenset(topics)
+        self._latest: Dict[str, Any] = {}
+        self._merged: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, Deque[Any]] = {t: deque(maxlen=max_events) for t in self.topics}
+        self._dropped: Dict[str, int] = {}
+        self._ready = asyncio.Event()
+
+    def offer(self, topic: str, frame: Any) -> None:
+        if topic not in self.topics:
+            return
+        kind = TOPIC_KINDS[topic]
+        if kind == "latest":
+            self._latest[topic] = frame
+        elif kind == "merge":
+            pending = self._merged.get(topic)
+            self._merged[topic] = frame if pending is None else merge_portfolio_delta(pending, frame)
+        else:
+            buf = self._events[topic]
+            overflow = len(buf) + len(frame) - buf.maxlen
+            if overflow > 0:
+                self._dropped[topic] = self._dropped.get(topic, 0) + overflow
+            buf.extend(frame)
+        self._ready.set()
+
+    def note_dropped(self, topic: str, n: int) -> None:
+        """Events lost upstream (before the publisher saw them)."""
+        if n and topic in self.topics:
+            self._dropped[topic] = self._dropped.get(topic, 0) + n
+            self._ready.set()
+
+    async def get(self) -> List[Tuple[str, Any]]:
+        """Wait for pending frames and take all of them."""
+        await self._ready.wait()
+        self._ready.clear()
+
+        out: List[Tuple[str, Any]] = list(self._latest.items())
+        self._latest = {}
+        out.extend(self._merged.items())
+        self._merged = {}
+        for topic, buf in self._events.items():
+            dropped = self._dropped.pop(topic, 0)
+            if buf or dropped:
+                out.append((topic, {"events": list(buf), "dropped": dropped}))
+                buf.clear()
+        return out
+
+
+def portfolio_delta(prev: Optional[Dict[str, Any]], snap: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Changes between two PortfolioState.snapshot() dicts: cash/equity plus
+    changed positions (by symbol). prev=None gives a full frame. None if
+    nothing changed.
+    """
+    positions = {p["symbol"]: p for p in snap["positions"]}
+    if prev is None:
+        return {"full": True, "cash": snap["cash"], "equity": snap["equity"], "positions": positions, "removed": []}
+
+    old = {p["symbol"]: p for p in prev["positions"]}
+    changed = {sym: p for sym, p in positions.items() if old.get(sym) != p}
+    removed = [sym for sym in old if sym not in positions]
+    if not changed and not removed and prev["cash"] == snap["cash"] and prev["equity"] == snap["equity"]:
+        return None
+    return {"full": False, "cash": snap["cash"], "equity": snap["equity"], "positions": changed, "removed": removed}
+
+
+def merge_portfolio_delta(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold two consecutive portfolio deltas into one equivalent delta."""
+    if newer["full"]:
+        return newer
+    positions = {sym: p for sym, p in older["positions"].items() if sym not in newer["removed"]}
+    positions.update(newer["positions"])
+    removed = [s for s in older["removed"] if s not in newer["positions"]]
+    removed += [s for s in newer["removed"] if s not in removed]
+    return {**newer, "full": older["full"], "positions": positions, "removed": [] if older["full"] else removed}
+
+
+class Broadcaster:
+    """
+    Fan-out of per-interval frames. Producers are called once per tick and
+    only for topics somebody subscribed to (append topics always, so their
+    cursor keeps moving and a new subscriber gets no stale backlog); they
+    return None when there is nothing new. A producer that raises is logged
+    and counted in `errors`; the other topics and later ticks still run.
+    """
+
+    def __init__(self, interval: float, max_events: int = 1000):
+        self.interval = interval
+        self.max_events = max_events
+        self._subs: List[Subscription] = []
+        self._producers: Dict[str, Callable[[], Any]] = {}
+        self.ticks = 0
+        self.frames = 0
+        self.errors = 0
+
+    def add_producer(self, topic: str, fn: Callable[[], Any]) -> None:
+        if topic not in TOPIC_KINDS:
+            raise ValueError(f"unknown topic {topic!r}; expected one of {sorted(TOPIC_KINDS)}")
+        self._producers[topic] = fn
+
+    def subscribe(self, topics: Iterable[str]) -> Subscription:
+        topics = list(topics)
+        unknown = [t for t in topics if t not in TOPIC_KINDS]
+        if unknown:
+            raise ValueError(f"unknown topic(s) {unknown}; expected some of {sorted(TOPIC_KINDS)}")
+        sub = Subscription(topics, self.max_events)
+        self._subs.append(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        try:
+            self._subs.remove(sub)
+        except ValueError:
+            pass
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subs)
+
+    def note_dropped(self, topic: str, n: int) -> None:
+        for sub in self._subs:
+            sub.note_dropped(topic, n)
+
+    def publish(self, topic: str, frame: Any) -> None:
+        for sub in self._subs:
+            sub.offer(topic, frame)
+        self.frames += 1
+
+    def tick(self) -> None:
+        """Run every producer that has a subscriber once and fan out the results."""
+        self.ticks += 1
+        wanted = set().union(*(s.topics for s in self._subs))
+        for topic, fn in self._producers.items():
+            if topic in wanted or TOPIC_KINDS[topic] == "append":
+                try:
+                    frame = fn()
+                except Exception:
+                    self.errors += 1
+                    log.exception("broadcast producer %r failed", topic)
+                    continue
+                if frame is not None and topic in wanted:
+                    self.publish(topic, frame)
+
+    async def run(self) -> None:
+        while True:
+            self.tick()
+            await asyncio.sleep(self.interval)
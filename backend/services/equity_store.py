@@ -0,0 +1,180 @@
+# backend/services/equity_store.py
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import SETTINGS
+
+
+class _Ring:
+    """
+    Fixed-capacity ring of float64 rows. Storage starts small and doubles up
+    to `capacity`, so short-lived stores stay cheap.
+    """
+
+    __slots__ = ("capacity", "_buf", "_head", "_size")
+
+    def __init__(self, capacity: int, cols: int):
+        self.capacity = capacity
+        self._buf = np.empty((min(capacity, 1024), cols), dtype=np.float64)
+        self._head = 0  # next write slot once full
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, row: Tuple[float, ...]) -> None:
+        buf = self._buf
+        if self._size < buf.shape[0]:
+            buf[self._size] = row
+            self._size += 1
+            return
+        if buf.shape[0] < self.capacity:
+            grown = np.empty((min(self.capacity, 2 * buf.shape[0]), buf.shape[1]), dtype=np.float64)
+            grown[: self._size] = buf
+            self._buf = grown
+            grown[self._size] = row
+            self._size += 1
+            return
+        buf[self._head] = row
+        self._head = (self._head + 1) % buf.shape[0]
+
+    def rows(self) -> np.ndarray:
+        """Chronological copy of the stored rows."""
+        if self._size < self._buf.shape[0] or self._head == 0:
+            return self._buf[: self._size].copy()
+        return np.concatenate((self._buf[self._head :], self._buf[: self._head]))
+
+
+class _Tier:
+    """Downsampled tier: one (bucket_ts, min, max, last) row per `width` seconds."""
+
+    __slots__ = ("width", "ring", "_key", "_row")
+
+    def __init__(self, width: float, capacity: int):
+        self.width = width
+        self.ring = _Ring(capacity, 4)
+        self._key: Optional[int] = None
+        self._row: List[float] = [0.0, 0.0, 0.0, 0.0]
+
+    def add(self, ts: float, v: float) -> None:
+        key = math.floor(ts / self.width)
+        row = self._row
+        if key != self._key:
+            if self._key is not None:
+                self.ring.append(tuple(row))
+            self._key = key
+            row[0], row[1], row[2], row[3] = key * self.width, v, v, v
+            return
+        if v < row[1]:
+            row[1] = v
+        if v > row[2]:
+            row[2] = v
+        row[3] = v
+
+    def rows(self) -> np.ndarray:
+        closed = self.ring.rows()
+        if self._key is None:
+            return closed
+        return np.vstack((closed, np.asarray(self._row)[None, :]))
+
+
+class TieredEquityStore:
+    """
+    Bounded equity history for the live session.
+
+    - raw: the last `raw_capacity` (ts, value) points at full resolution
+    - tiers: per-bucket min/max/last, e.g. per second and per minute, each a
+      ring of `capacity` buckets
+
+    Memory is fixed by the capacities no matter how many ticks arrive.
+    """
+
+    def __init__(
+        self,
+        raw_capacity: int = 100_000,
+        tiers: Optional[Dict[str, Tuple[float, int]]] = None,
+    ):
+        if tiers is None:
+            tiers = {"1s": (1.0, 86_400), "1m": (60.0, 43_200)}
+        self.raw = _Ring(raw_capacity, 2)
+        self.tiers: Dict[str, _Tier] = {name: _Tier(w, cap) for name, (w, cap) in tiers.items()}
+        self.count = 0
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: float, ts: Optional[float] = None) -> None:
+        """
+        ts defaults to time.time(). A ts before the last appended one (e.g.
+        the wall clock stepped back) is clamped to it, so the raw ring and
+        the tiers stay sorted for query()'s binary search.
+        """
+        if ts is None:
+            ts = time.time()
+        if self.last_ts is not None and ts < self.last_ts:
+            ts = self.last_ts
+        self.last_ts = ts
+        v = float(value)
+        self.raw.append((ts, v))
+        for tier in self.tiers.values():
+            tier.add(ts, v)
+        if self.first is None:
+            self.first = v
+        self.last = v
+        self.count += 1
+
+    def extend(self, values: Iterable[float], ts: Optional[float] = None) -> None:
+        for v in values:
+            self.append(v, ts)
+
+    @property
+    def resolutions(self) -> List[str]:
+        return ["raw", *self.tiers.keys()]
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        resolution: str = "raw",
+    ) -> Dict[str, Any]:
+        """
+        Points with start <= ts <= end at the given resolution.
+        raw -> {"ts", "value"}; tiers -> {"ts", "min", "max", "last"}.
+        """
+        if resolution == "raw":
+            rows = self.raw.rows()
+            cols = ("ts", "value")
+        elif resolution in self.tiers:
+            rows = self.tiers[resolution].rows()
+            cols = ("ts", "min", "max", "last")
+        else:
+            raise ValueError(f"unknown resolution {resolution!r}; expected one of {self.resolutions}")
+
+        ts = rows[:, 0]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+        rows = rows[lo:hi]
+        return {"resolution": resolution, **{c: rows[:, k].tolist() for k, c in enumerate(cols)}}
+
+    def values(self) -> np.ndarray:
+        """Raw-resolution values currently retained (most recent raw_capacity points)."""
+        return self.raw.rows()[:, 1]
+
+
+def make_equity_store() -> TieredEquityStore:
+    """Store sized from SETTINGS (raw ring, 1s and 1m tiers)."""
+    return TieredEquityStore(
+        raw_capacity=SETTINGS.equity_raw_capacity,
+        tiers={
+            "1s": (1.0, SETTINGS.equity_1s_buckets),
+            "1m": (60.0, SETTINGS.equity_1m_buckets),
+        },
+    )
@@ -0,0 +1,157 @@
+# backend/services/latency.py
+"""
+Low-overhead latency histograms for the order path.
+
+Values are recorded in nanoseconds into HDR-style log-linear buckets:
+exact below 2**SUB_BITS, then 2**SUB_BITS linear sub-buckets per power of
+two (~3% worst-case relative error with SUB_BITS=5). Recording is an int
+bit_length, a shift and a list increment; percentiles walk the buckets
+only when queried.
+"""
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUB_BITS = 5
+_SUB = 1 << SUB_BITS
+# top bucket covers values up to ~2**45 ns (~10 hours); larger values clamp into it
+_MAX_EXP = 40
+_N_BUCKETS = _SUB + (_MAX_EXP + 1) * _SUB
+_SHIFT = SUB_BITS + 1
+_NO_MIN = 1 << 62
+
+QUANTILES: Tuple[float, ...] = (0.5, 0.99, 0.999)
+
+
+def _bucket(v: int) -> int:
+    if v < _SUB:
+        return v
+    e = v.bit_length() - _SHIFT
+    if e > _MAX_EXP:
+        return _N_BUCKETS - 1
+    return _SUB + e * _SUB + ((v >> e) - _SUB)
+
+
+def _bucket_value(idx: int) -> float:
+    """Midpoint of the bucket's value range."""
+    if idx < _SUB:
+        return float(idx)
+    k = idx - _SUB
+    e, m = divmod(k, _SUB)
+    lo = (_SUB + m) << e
+    return lo + ((1 << e) - 1) / 2.0
+
+
+class LatencyHistogram:
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: List[int] = [0] * _N_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = _NO_MIN
+        self.max = 0
+
+    def record(self, ns: int) -> None:
+        # _bucket() inlined: this runs several times per order
+        if ns < _SUB:
+            if ns < 0:
+                ns = 0
+            idx = ns
+        else:
+            e = ns.bit_length() - _SHIFT
+            idx = _N_BUCKETS - 1 if e > _MAX_EXP else _SUB + e * _SUB + ((ns >> e) - _SUB)
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += ns
+        if ns < self.min:
+            self.min = ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentiles(self, quantiles: Iterable[float] = QUANTILES) -> Dict[float, Optional[float]]:
+        """Value (ns) at each quantile, clamped to the observed min/max."""
+        qs = sorted(quantiles)
+        out: Dict[float, Optional[float]] = {q: None for q in qs}
+        if not self.count:
+            return out
+        # rank of each quantile (round() keeps 0.99 * 100 from becoming 100)
+        targets = [max(1, math.ceil(round(q * self.count, 9))) for q in qs]
+        k = 0
+        seen = 0
+        for idx, c in enumerate(self.counts):
+            if not c:
+                continue
+            seen += c
+            while k < len(qs) and seen >= targets[k]:
+                out[qs[k]] = min(max(_bucket_value(idx), float(self.min)), float(self.max))
+                k += 1
+            if k == len(qs):
+                break
+        return out
+
+    def summary(self, quantiles: Iterable[float] = QUANTILES) -> Dict[str, Any]:
+        """count / min / mean / max and quantiles, in microseconds."""
+        if not self.count:
+            return {"count": 0}
+        res: Dict[str, Any] = {
+            "count": self.count,
+            "min_us": self.min / 1e3,
+            "mean_us": self.total / self.count / 1e3,
+            "max_us": self.max / 1e3,
+        }
+        for q, v in self.percentiles(quantiles).items():
+            res[f"p{_qname(q)}_us"] = None if v is None else v / 1e3
+        return res
+
+
+def _qname(q: float) -> str:
+    # 0.5 -> "50", 0.99 -> "99", 0.999 -> "999"
+    digits = f"{q:.6f}".split(".")[1].rstrip("0")
+    return digits if len(digits) > 1 else digits + "0"
+
+
+class LatencyRecorder:
+    """
+    Histograms keyed by (stage, symbol). Every record also lands in the
+    stage's all-symbols histogram. Not locked: all recording happens on the
+    API event loop.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._by_symbol: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def record(self, stage: str, ns: int, symbol: Optional[str] = None) -> None:
+        """Record an int duration in nanoseconds (e.g. a perf_counter_ns() delta)."""
+        if not self.enabled:
+            return
+        h = self._stages.get(stage)
+        if h is None:
+            h = self._stages[stage] = LatencyHistogram()
+        h.record(ns)
+        if symbol:
+            key = (stage, symbol)
+            h = self._by_symbol.get(key)
+            if h is None:
+                h = self._by_symbol[key] = LatencyHistogram()
+            h.record(ns)
+
+    def reset(self) -> None:
+        self._stages.clear()
+        self._by_symbol.clear()
+
+    def snapshot(self, symbol: Optional[str] = None) -> Dict[str, Any]:
+        """{stage: {...summary, "by_symbol": {sym: summary}}}; symbol filters by_symbol."""
+        out: Dict[str, Any] = {}
+        for stage, h in self._stages.items():
+            out[stage] = {**h.summary(), "by_symbol": {}}
+        for (stage, sym), h in self._by_symbol.items():
+            if symbol is None or sym == symbol:
+                out[stage]["by_symbol"][sym] = h.summary()
+        return out
+
+
+LATENCY = LatencyRecorder()
@@ -2,6 +2,9 @@
 import math
 import statistics
 from typing import List
+
+import numpy as np
+
 from backend.models.metrics import MetricsResponse
 
 
@@ -58,3 +61,227 @@ def compute_metrics(equity: List[float], trade_pnls: List[float]) -> MetricsResp
         win_rate=win_rate,
         trades=len(trade_pnls),
     )
+
+
+def compute_metrics_batch(equity: np.ndarray) -> List[MetricsResponse]:
+    """
+    compute_metrics(row, diffs(row)) for every row of a (K, T) equity
+    matrix, with array ops (for sweeps that produce many equity paths).
+    """
+    eq = np.atleast_2d(np.asarray(equity, dtype=float))
+    K, T = eq.shape
+    if T == 0:
+        return [compute_metrics([], []) for _ in range(K)]
+
+    pnl = np.diff(eq, axis=1)
+    prev = eq[:, :-1]
+    ok = prev != 0
+    r = np.divide(pnl, prev, out=np.zeros_like(pnl), where=ok)
+    n = ok.sum(axis=1)
+    n_safe = np.maximum(n, 1)
+    mean_r = r.sum(axis=1) / n_safe
+    std_r = np.sqrt((((r - mean_r[:, None]) ** 2) * ok).sum(axis=1) / n_safe)
+
+    down = ok & (r < 0)
+    n_down = down.sum(axis=1)
+    mean_down = np.where(down, r, 0.0).sum(axis=1) / np.maximum(n_down, 1)
+    std_down = np.sqrt((((r - mean_down[:, None]) ** 2) * down).sum(axis=1) / np.maximum(n_down, 1))
+    # a single negative return: compute_metrics uses its magnitude
+    std_down = np.where(n_down == 1, np.abs(mean_down), std_down)
+
+    peak = np.maximum.accumulate(eq, axis=1)
+    dd = np.divide((peak - eq) * 100, peak, out=np.zeros_like(eq), where=peak > 0)
+    max_dd = dd.max(axis=1)
+
+    wins = np.where(pnl > 0, pnl, 0.0)
+    losses = np.where(pnl < 0, pnl, 0.0)
+    n_win = (pnl > 0).sum(axis=1)
+    n_loss = (pnl < 0).sum(axis=1)
+    sum_win = wins.sum(axis=1)
+    sum_loss = losses.sum(axis=1)
+
+    out: List[MetricsResponse] = []
+    for k in range(K):
+        sharpe = sortino = None
+        if n[k]:
+            scale = math.sqrt(int(n[k]))
+            sharpe = float(mean_r[k]) * scale / (float(std_r[k]) or 1e-12)
+            sortino = float(mean_r[k]) * scale / ((float(std_down[k]) if n_down[k] else 0.0) or 1e-12)
+        out.append(
+            MetricsResponse(
+                sharpe=sharpe,
+                sortino=sortino,
+                max_drawdown_pct=float(max_dd[k]),
+                profit_factor=(float(sum_win[k]) / abs(float(sum_loss[k]))) if n_loss[k] else None,
+                win_rate=(int(n_win[k]) / (T - 1)) if T > 1 else None,
+                trades=T - 1,
+            )
+        )
+    return out
+
+
+class MetricsAccumulator:
+    """
+    Streaming version of compute_metrics(equity, diffs(equity)).
+
+    add() is O(1): running mean/variance of returns (Welford) for Sharpe,
+    the same over negative returns for Sortino, running peak/max drawdown,
+    and win/loss sums over equity changes. snapshot() is O(1) too.
+    """
+
+    __slots__ = (
+        "count", "first", "last", "peak", "max_dd",
+        "n_ret", "mean_ret", "m2_ret",
+        "n_down", "mean_down", "m2_down",
+        "n_pnl", "n_win", "sum_win", "n_loss", "sum_loss",
+    )
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.first = 0.0
+        self.last = 0.0
+        self.peak = 0.0
+        self.max_dd = 0.0
+
+        self.n_ret = 0
+        self.mean_ret = 0.0
+        self.m2_ret = 0.0
+
+        self.n_down = 0
+        self.mean_down = 0.0
+        self.m2_down = 0.0
+
+        self.n_pnl = 0
+        self.n_win = 0
+        self.sum_win = 0.0
+        self.n_loss = 0
+        self.sum_loss = 0.0
+
+    def add(self, v: float) -> None:
+        if self.count == 0:
+            self.first = self.last = self.peak = v
+            self.count = 1
+            return
+
+        prev = self.last
+        self.count += 1
+        self.last = v
+
+        # pnl (equity change)
+        pnl = v - prev
+        self.n_pnl += 1
+        if pnl > 0:
+            self.n_win += 1
+            self.sum_win += pnl
+        elif pnl < 0:
+            self.n_loss += 1
+            self.sum_loss += pnl
+
+        # returns
+        if prev != 0:
+            r = pnl / prev
+            self.n_ret += 1
+            d = r - self.mean_ret
+            self.mean_ret += d / self.n_ret
+            self.m2_ret += d * (r - self.mean_ret)
+
+            if r < 0:
+                self.n_down += 1
+                d = r - self.mean_down
+                self.mean_down += d / self.n_down
+                self.m2_down += d * (r - self.mean_down)
+
+        # drawdown
+        if v > self.peak:
+            self.peak = v
+        dd = (self.peak - v) / self.peak * 100 if self.peak > 0 else 0.0
+        if dd > self.max_dd:
+            self.max_dd = dd
+
+    def add_many(self, values) -> None:
+        """Same result as add() for each value in order, with array ops."""
+        v = np.asarray(values, dtype=float).ravel()
+        if v.size == 0:
+            return
+        if self.count == 0:
+            self.add(float(v[0]))
+            v = v[1:]
+            if v.size == 0:
+                return
+
+        prev = np.empty_like(v)
+        prev[0] = self.last
+        prev[1:] = v[:-1]
+        pnl = v - prev
+
+        self.n_pnl += int(pnl.size)
+        wins = pnl[pnl > 0]
+        losses = pnl[pnl < 0]
+        self.n_win += int(wins.size)
+        self.sum_win += float(wins.sum())
+        self.n_loss += int(losses.size)
+        self.sum_loss += float(losses.sum())
+
+        nz = prev != 0
+        r = pnl[nz] / prev[nz]
+        self.n_ret, self.mean_ret, self.m2_ret = _merge_moments(self.n_ret, self.mean_ret, self.m2_ret, r)
+        down = r[r < 0]
+        self.n_down, self.mean_down, self.m2_down = _merge_moments(self.n_down, self.mean_down, self.m2_down, down)
+
+        peaks = np.maximum(np.maximum.accumulate(v), self.peak)
+        pos = peaks > 0
+        if pos.any():
+            dd = float(((peaks[pos] - v[pos]) / peaks[pos]).max()) * 100
+            if dd > self.max_dd:
+                self.max_dd = dd
+
+        self.peak = float(peaks[-1])
+        self.last = float(v[-1])
+        self.count += int(v.size)
+
+    @property
+    def drawdown_pct(self) -> float:
+        """Current drawdown from the running peak."""
+        return ((self.peak - self.last) / self.peak * 100) if self.peak > 0 else 0.0
+
+    def snapshot(self) -> MetricsResponse:
+        sharpe = sortino = None
+
+        if self.n_ret:
+            scale = math.sqrt(self.n_ret)
+            std_r = math.sqrt(max(self.m2_ret / self.n_ret, 0.0)) or 1e-12
+            sharpe = self.mean_ret * scale / std_r
+
+            if self.n_down > 1:
+                std_down = math.sqrt(max(self.m2_down / self.n_down, 0.0))
+            elif self.n_down == 1:
+                std_down = abs(self.mean_down)
+            else:
+                std_down = 0.0
+            sortino = self.mean_ret * scale / (std_down or 1e-12)
+
+        return MetricsResponse(
+            sharpe=sharpe,
+            sortino=sortino,
+            max_drawdown_pct=self.max_dd if self.count else None,
+            profit_factor=(self.sum_win / abs(self.sum_loss)) if self.n_loss else None,
+            win_rate=(self.n_win / self.n_pnl) if self.n_pnl else None,
+            trades=self.n_pnl,
+        )
+
+
+def _merge_moments(n: int, mean: float, m2: float, x: np.ndarray):
+    """Combine running (count, mean, M2) with a batch (Chan et al. parallel update)."""
+    nb = int(x.size)
+    if nb == 0:
+        return n, mean, m2
+    mean_b = float(x.mean())
+    m2_b = float(((x - mean_b) ** 2).sum())
+    if n == 0:
+        return nb, mean_b, m2_b
+    tot = n + nb
+    d = mean_b - mean
+    return tot, mean + d * nb / tot, m2 + m2_b + d * d * n * nb / tot
@@ -1,34 +1,100 @@
 # backend/services/portfolio.py
-from collections import defaultdict
 from pydantic import BaseModel
 from typing import List, Dict, Any
 
+from backend.services.equity_store import make_equity_store
+
 
 class Position(BaseModel):
+    """API view of a position (see PortfolioState.snapshot)."""
     symbol: str
     qty: float = 0.0
     avg_px: float = 0.0
+    mark: float = 0.0
+    unrealized_pnl: float = 0.0
     realized_pnl: float = 0.0
 
 
+class PositionRow:
+    """Hot-path position record; plain attributes, no validation."""
+
+    __slots__ = ("symbol", "qty", "avg_px", "realized_pnl")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.qty = 0.0
+        self.avg_px = 0.0
+        self.realized_pnl = 0.0
+
+
+class _Marks(dict):
+    """
+    Mark prices (default 100.0). Writes go through the owning portfolio so
+    its running position value stays in sync even for marks[sym] = px.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner: "PortfolioState"):
+        super().__init__()
+        self._owner = owner
+
+    def __missing__(self, symbol: str) -> float:
+        return 100.0
+
+    def __setitem__(self, symbol: str, px: float) -> None:
+        self._owner.set_mark(symbol, px)
+
+    def update(self, *args, **kwargs) -> None:
+        for symbol, px in dict(*args, **kwargs).items():
+            self._owner.set_mark(symbol, px)
+
+
 class PortfolioState:
-    def __init__(self):
+    # re-sum the running position value this often to shed float drift
+    RESYNC_EVERY = 4096
+
+    def __init__(self, record_equity: bool = True):
         self.cash: float = 1_000_000.0
-        self.positions: Dict[str, Position] = {}
-        self.marks: Dict[str, float] = defaultdict(lambda: 100.0)
-        self.equity_curve: List[float] = [self.cash]
+        self.positions: Dict[str, PositionRow] = {}
+        self.marks: Dict[str, float] = _Marks(self)
+        self.record_equity = record_equity
+
+        # sum(qty * mark) over positions, maintained on every fill / mark
+        self._pos_value: float = 0.0
+        self._updates: int = 0
+
+        # bounded history (ring + per-second/minute tiers), one point per fill
+        self.equity_curve = make_equity_store()
+        self.equity_curve.append(self.cash)
 
     def reset(self):
-        self.__init__()
+        self.__init__(record_equity=self.record_equity)
+
+    def _bump(self) -> None:
+        self._updates += 1
+        if self._updates >= self.RESYNC_EVERY:
+            self._updates = 0
+            marks = self.marks
+            self._pos_value = sum(p.qty * marks[sym] for sym, p in self.positions.items())
+
+    def set_mark(self, symbol: str, px: float) -> None:
+        pos = self.positions.get(symbol)
+        if pos is not None and pos.qty:
+            self._pos_value += pos.qty * (px - self.marks[symbol])
+            dict.__setitem__(self.marks, symbol, px)
+            self._bump()
+        else:
+            dict.__setitem__(self.marks, symbol, px)
 
     def mark_to_market(self) -> float:
-        pos_val = sum(p.qty * self.marks[sym] for sym, p in self.positions.items())
-        return self.cash + pos_val
+        return self.cash + self._pos_value
 
-    def _get_pos(self, symbol: str) -> Position:
-        if symbol not in self.positions:
-            self.positions[symbol] = Position(symbol=symbol)
-        return self.positions[symbol]
+    def _get_pos(self, symbol: str) -> PositionRow:
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = PositionRow(symbol)
+        return pos
 
     def on_fill(self, symbol: str, side: str, qty: float, px: float):
         if side == "BUY":
@@ -39,56 +105,61 @@ class PortfolioState:
 
 
         pos = self._get_pos(symbol)
-        new_qty = pos.qty + sign * qty
+        old_qty = pos.qty
+        new_qty = old_qty + sign * qty
 
         if sign > 0:  # BUY
-            if pos.qty < 0:  # covering a short
-                covered = min(qty, -pos.qty)
+            if old_qty < 0:  # covering a short
+                covered = min(qty, -old_qty)
                 pos.realized_pnl += covered * (pos.avg_px - px)
                 remaining = qty - covered
                 if remaining > 0:
                     # flipped to long
                     pos.avg_px = px
-            elif pos.qty == 0:
+            elif old_qty == 0:
                 pos.avg_px = px
             else:
                 # add to long
-                pos.avg_px = (pos.avg_px * pos.qty + px * qty) / new_qty
+                pos.avg_px = (pos.avg_px * old_qty + px * qty) / new_qty
 
         else:  # SELL
-            if pos.qty > 0:  # selling long
-                sold = min(qty, pos.qty)
+            if old_qty > 0:  # selling long
+                sold = min(qty, old_qty)
                 pos.realized_pnl += sold * (px - pos.avg_px)
                 remaining = qty - sold
                 if remaining > 0:
                     # flipped to short
                     pos.avg_px = px
-            elif pos.qty == 0:
+            elif old_qty == 0:
                 # opening short
                 pos.avg_px = px
             else:
                 # add to short (keep avg)
-                pos.avg_px = (pos.avg_px * abs(pos.qty) + px * qty) / abs(new_qty)
+                pos.avg_px = (pos.avg_px * abs(old_qty) + px * qty) / abs(new_qty)
 
         pos.qty = new_qty
         if pos.qty == 0:
             pos.avg_px = 0.0
 
-        self.equity_curve.append(self.mark_to_market())
+        self._pos_value += (new_qty - old_qty) * self.marks[symbol]
+        self._bump()
+
+        if self.record_equity:
+            self.equity_curve.append(self.mark_to_market())
 
     def snapshot(self) -> Dict[str, Any]:
-        positions = []
+        positions: List[Dict[str, Any]] = []
         for sym, p in self.positions.items():
             mark = self.marks[sym]
             positions.append(
-                {
-                    "symbol": sym,
-                    "qty": p.qty,
-                    "avg_px": p.avg_px,
-                    "mark": mark,
-                    "unrealized_pnl": (mark - p.avg_px) * p.qty,
-                    "realized_pnl": p.realized_pnl,
-                }
+                Position(
+                    symbol=sym,
+                    qty=p.qty,
+                    avg_px=p.avg_px,
+                    mark=mark,
+                    unrealized_pnl=(mark - p.avg_px) * p.qty,
+                    realized_pnl=p.realized_pnl,
+                ).model_dump()
             )
         return {"cash": self.cash, "equity": self.mark_to_market(), "positions": positions}
 
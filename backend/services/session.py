@@ -1,5 +1,10 @@
-from typing import List, Dict, Any
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Any, List, Tuple
 from backend.config import SETTINGS
+from backend.models.metrics import MetricsResponse
+from backend.services.equity_store import make_equity_store
+from backend.services.metrics import MetricsAccumulator
 
 
 class SessionState:
@@ -7,29 +12,55 @@ class SessionState:
         self.reset()
 
     def reset(self):
-        self.equity: List[float] = [1_000_000.0]
+        # bounded: ring buffer + downsampled tiers, see equity_store.py
+        self.equity = make_equity_store()
+        self.metrics = MetricsAccumulator()
         self.last_pnl: float = 0.0
         self.halt_trading: bool = False
 
-        # engine fill reports for UI/debug
-        self.fills: List[Dict[str, Any]] = []
+        # engine fill reports for UI/debug (most recent only)
+        self.fills: Deque[Dict[str, Any]] = deque(maxlen=SETTINGS.max_session_fills)
+        # total fills ever recorded; fills[-1] is number fill_seq
+        self.fill_seq: int = 0
+
+        self.record_equity(1_000_000.0)
+
+    def record_equity(self, value: float) -> None:
+        """Append an equity point; metrics and drawdown are updated in O(1)."""
+        self.equity.append(value)
+        self.metrics.add(value)
+
+    def record_fill(self, report: Dict[str, Any]) -> None:
+        self.fills.append(report)
+        self.fill_seq += 1
+
+    def fills_since(self, seq: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Fills recorded after `seq` that are still retained, and how many were already evicted."""
+        new = self.fill_seq - seq
+        if new <= 0:
+            return [], 0
+        kept = min(new, len(self.fills))
+        # walk from the right end: O(new fills), not O(retained fills)
+        return list(islice(reversed(self.fills), kept))[::-1], new - kept
+
+    def metrics_snapshot(self) -> MetricsResponse:
+        return self.metrics.snapshot()
 
     @property
     def start_equity(self) -> float:
-        return self.equity[0]
+        return self.metrics.first
 
     @property
     def current_equity(self) -> float:
-        return self.equity[-1]
+        return self.metrics.last
 
     @property
     def drawdown_pct(self) -> float:
-        peak = max(self.equity)
-        return ((peak - self.current_equity) / peak * 100) if peak > 0 else 0.0
+        return self.metrics.drawdown_pct
 
     def apply_fill(self, est_fill_pnl: float):
         self.last_pnl = est_fill_pnl
-        self.equity.append(self.current_equity + est_fill_pnl)
+        self.record_equity(self.current_equity + est_fill_pnl)
         if self.drawdown_pct >= SETTINGS.max_session_drawdown_pct:
             self.halt_trading = True
 
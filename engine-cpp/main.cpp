@@ -2,16 +2,37 @@
 #include <string>
 #include <chrono>
 #include <sstream>
+#include <cstdint>
+#include <cstring>
+#include <functional>
+#include <list>
+#include <map>
+#include <unordered_map>
 
-// Minimal NDJSON engine stub:
-// - reads one JSON object per line from stdin
-// - emits one JSON object per line to stdout
-// This is NOT a full matching engine; it's a "bridge-compatible" simulator.
+#ifdef _WIN32
+#include <fcntl.h>
+#include <io.h>
+#endif
 
-static std::string now_ms() {
+// Limit order book engine:
+// - one book per symbol, price-time priority, partial fills, cancels
+// - reads orders / cancels from stdin, writes reports to stdout
+// - NDJSON by default; a {"type":"hello","protocol":"bin1"} line switches both
+//   directions to length-prefixed binary frames (layouts:
+//   backend/api/engine_protocol.py)
+//
+// Reports per order: ack, then zero or more fills (leaves_qty counts down),
+// then "resting" if anything is left on the book. Resting orders get more
+// fills later (passive side) and may be cancelled ("cancelled"). Anything
+// invalid gets a "reject".
+
+static int64_t now_ms_i64() {
     using namespace std::chrono;
-    auto ms = duration_cast<milliseconds>(system_clock::now().time_since_epoch()).count();
-    return std::to_string(ms);
+    return duration_cast<milliseconds>(system_clock::now().time_since_epoch()).count();
+}
+
+static std::string now_ms() {
+    return std::to_string(now_ms_i64());
 }
 
 static std::string escape_json(const std::string& s) {
@@ -29,7 +50,7 @@ static std::string escape_json(const std::string& s) {
     return out.str();
 }
 
-// Extremely naive "field extractor" (for stub only).
+// Extremely naive "field extractor" (NDJSON mode only).
 // Assumes the input line contains: "key": <value> or "key":"value"
 static std::string get_string_field(const std::string& json, const std::string& key) {
     std::string pat = "\"" + key + "\"";
@@ -55,7 +76,8 @@ static double get_number_field(const std::string& json, const std::string& key,
     size_t start = colon + 1;
     while (start < json.size() && (json[start] == ' ')) start++;
     size_t end = start;
-    while (end < json.size() && (isdigit((unsigned char)json[end]) || json[end] == '.' || json[end] == '-')) end++;
+    while (end < json.size() && (isdigit((unsigned char)json[end]) || json[end] == '.' || json[end] == '-'
+                                 || json[end] == 'e' || json[end] == 'E' || json[end] == '+')) end++;
 
     try {
         return std::stod(json.substr(start, end - start));
@@ -64,7 +86,327 @@ static double get_number_field(const std::string& json, const std::string& key,
     }
 }
 
+// ---------- reports ----------
+// frame: uint32 LE length | payload; payload: u8 record type + fixed fields.
+// Little-endian hosts only (same as the Python side's "<" structs).
+
+static const size_t ORDER_ID_LEN = 32;
+static const size_t SYMBOL_LEN = 16;
+static const size_t REASON_LEN = 48;
+
+static const uint8_t REC_ORDER = 1;
+static const uint8_t REC_ACK = 2;
+static const uint8_t REC_FILL = 3;
+static const uint8_t REC_CANCEL = 4;
+static const uint8_t REC_RESTING = 5;
+static const uint8_t REC_CANCELLED = 6;
+static const uint8_t REC_REJECT = 7;
+
+static const size_t ORDER_SIZE = 1 + ORDER_ID_LEN + SYMBOL_LEN + 1 + 8 + 8;
+static const size_t CANCEL_SIZE = 1 + ORDER_ID_LEN + SYMBOL_LEN;
+
+enum Side : uint8_t { BUY = 0, SELL = 1 };
+
+static const char* side_name(Side s) { return s == BUY ? "BUY" : "SELL"; }
+
+class Reporter {
+public:
+    bool binary = false;
+
+    void ack(const std::string& oid, const std::string& sym) {
+        int64_t ts = now_ms_i64();
+        if (binary) {
+            begin(REC_ACK, oid, sym);
+            put(ts);
+            end();
+            return;
+        }
+        std::cout << "{\"type\":\"ack\"," << ids(oid, sym) << "\"ts_ms\":" << ts << "}\n";
+    }
+
+    void fill(const std::string& oid, const std::string& sym, Side side, double qty, double px, double leaves) {
+        int64_t ts = now_ms_i64();
+        if (binary) {
+            begin(REC_FILL, oid, sym);
+            put(static_cast<uint8_t>(side));
+            put(qty);
+            put(px);
+            put(leaves);
+            put(ts);
+            end();
+            return;
+        }
+        std::cout << "{\"type\":\"fill\"," << ids(oid, sym)
+                  << "\"side\":\"" << side_name(side) << "\","
+                  << "\"qty\":" << qty << ","
+                  << "\"px\":" << px << ","
+                  << "\"leaves_qty\":" << leaves << ","
+                  << "\"ts_ms\":" << ts << "}\n";
+    }
+
+    void resting(const std::string& oid, const std::string& sym, Side side, double leaves, double px) {
+        int64_t ts = now_ms_i64();
+        if (binary) {
+            begin(REC_RESTING, oid, sym);
+            put(static_cast<uint8_t>(side));
+            put(leaves);
+            put(px);
+            put(ts);
+            end();
+            return;
+        }
+        std::cout << "{\"type\":\"resting\"," << ids(oid, sym)
+                  << "\"side\":\"" << side_name(side) << "\","
+                  << "\"leaves_qty\":" << leaves << ","
+                  << "\"px\":" << px << ","
+                  << "\"ts_ms\":" << ts << "}\n";
+    }
+
+    void cancelled(const std::string& oid, const std::string& sym, double leaves) {
+        int64_t ts = now_ms_i64();
+        if (binary) {
+            begin(REC_CANCELLED, oid, sym);
+            put(leaves);
+            put(ts);
+            end();
+            return;
+        }
+        std::cout << "{\"type\":\"cancelled\"," << ids(oid, sym)
+                  << "\"leaves_qty\":" << leaves << ","
+                  << "\"ts_ms\":" << ts << "}\n";
+    }
+
+    void reject(const std::string& oid, const std::string& sym, const std::string& reason) {
+        int64_t ts = now_ms_i64();
+        if (binary) {
+            begin(REC_REJECT, oid, sym);
+            fixed(reason, REASON_LEN);
+            put(ts);
+            end();
+            return;
+        }
+        std::cout << "{\"type\":\"reject\"," << ids(oid, sym)
+                  << "\"reason\":\"" << escape_json(reason) << "\","
+                  << "\"ts_ms\":" << ts << "}\n";
+    }
+
+private:
+    char buf_[256];
+    size_t n_ = 0;
+
+    static std::string ids(const std::string& oid, const std::string& sym) {
+        return "\"order_id\":\"" + escape_json(oid) + "\",\"symbol\":\"" + escape_json(sym) + "\",";
+    }
+
+    void begin(uint8_t rec, const std::string& oid, const std::string& sym) {
+        n_ = 0;
+        put(rec);
+        fixed(oid, ORDER_ID_LEN);
+        fixed(sym, SYMBOL_LEN);
+    }
+
+    void fixed(const std::string& s, size_t width) {
+        size_t k = s.size() < width ? s.size() : width;
+        std::memcpy(buf_ + n_, s.data(), k);
+        std::memset(buf_ + n_ + k, 0, width - k);
+        n_ += width;
+    }
+
+    template <typename T>
+    void put(T v) {
+        std::memcpy(buf_ + n_, &v, sizeof(T));
+        n_ += sizeof(T);
+    }
+
+    void end() {
+        uint32_t n = static_cast<uint32_t>(n_);
+        std::cout.write(reinterpret_cast<const char*>(&n), sizeof(n));
+        std::cout.write(buf_, n_);
+    }
+};
+
+// ---------- book ----------
+
+struct Resting {
+    std::string order_id;
+    double leaves;
+};
+
+using Level = std::list<Resting>;
+
+struct Book {
+    // best price first on both sides
+    std::map<double, Level, std::greater<double>> bids;
+    std::map<double, Level> asks;
+};
+
+struct Locator {
+    std::string symbol;
+    Side side;
+    double px;
+    Level::iterator it;
+};
+
+class Engine {
+public:
+    explicit Engine(Reporter& out) : out_(out) {}
+
+    void submit(const std::string& oid, const std::string& sym, Side side, double qty, double px) {
+        if (oid.empty() || sym.empty()) {
+            out_.reject(oid, sym, "missing order_id or symbol");
+            return;
+        }
+        if (!(qty > 0.0) || !(px > 0.0)) {
+            out_.reject(oid, sym, "qty and px must be positive");
+            return;
+        }
+        if (live_.count(oid)) {
+            out_.reject(oid, sym, "duplicate order_id");
+            return;
+        }
+        out_.ack(oid, sym);
+
+        Book& book = books_[sym];
+        double leaves = side == BUY
+            ? match(oid, sym, side, qty, book.asks, [px](double level) { return level <= px; })
+            : match(oid, sym, side, qty, book.bids, [px](double level) { return level >= px; });
+
+        if (leaves > 0.0) {
+            Level& level = side == BUY ? book.bids[px] : book.asks[px];
+            level.push_back(Resting{oid, leaves});
+            live_[oid] = Locator{sym, side, px, std::prev(level.end())};
+            out_.resting(oid, sym, side, leaves, px);
+        }
+    }
+
+    void cancel(const std::string& oid, const std::string& sym) {
+        auto found = live_.find(oid);
+        if (found == live_.end()) {
+            out_.reject(oid, sym, "unknown order_id");
+            return;
+        }
+        Locator loc = found->second;
+        live_.erase(found);
+
+        Book& book = books_[loc.symbol];
+        double leaves = loc.it->leaves;
+        if (loc.side == BUY) {
+            erase_from(book.bids, loc);
+        } else {
+            erase_from(book.asks, loc);
+        }
+        out_.cancelled(oid, loc.symbol, leaves);
+    }
+
+    void reject(const std::string& oid, const std::string& sym, const std::string& reason) {
+        out_.reject(oid, sym, reason);
+    }
+
+private:
+    Reporter& out_;
+    std::unordered_map<std::string, Book> books_;
+    std::unordered_map<std::string, Locator> live_;
+
+    template <typename Levels, typename Crosses>
+    double match(const std::string& oid, const std::string& sym, Side side, double qty,
+                 Levels& opposite, Crosses crosses) {
+        Side passive_side = side == BUY ? SELL : BUY;
+        double leaves = qty;
+
+        while (leaves > 0.0 && !opposite.empty()) {
+            auto best = opposite.begin();
+            if (!crosses(best->first)) break;
+
+            Level& level = best->second;
+            while (leaves > 0.0 && !level.empty()) {
+                Resting& maker = level.front();
+                double traded = maker.leaves < leaves ? maker.leaves : leaves;
+                leaves -= traded;
+                maker.leaves -= traded;
+
+                // trades print at the resting order's price
+                out_.fill(oid, sym, side, traded, best->first, leaves);
+                out_.fill(maker.order_id, sym, passive_side, traded, best->first, maker.leaves);
+
+                if (maker.leaves <= 0.0) {
+                    live_.erase(maker.order_id);
+                    level.pop_front();
+                }
+            }
+            if (level.empty()) opposite.erase(best);
+        }
+        return leaves;
+    }
+
+    template <typename Levels>
+    static void erase_from(Levels& levels, const Locator& loc) {
+        auto level = levels.find(loc.px);
+        if (level == levels.end()) return;
+        level->second.erase(loc.it);
+        if (level->second.empty()) levels.erase(level);
+    }
+};
+
+// ---------- input loops ----------
+
+static std::string fixed_text(const char* p, size_t width) {
+    size_t k = 0;
+    while (k < width && p[k] != '\0') k++;
+    return std::string(p, k);
+}
+
+static void run_bin1(Engine& engine) {
+    char in[256];
+    uint32_t n = 0;
+
+    while (std::cin.read(reinterpret_cast<char*>(&n), sizeof(n))) {
+        if (n > sizeof(in)) {
+            // unknown/oversized record: skip it
+            std::cin.ignore(n);
+            continue;
+        }
+        if (n == 0) continue;
+        if (!std::cin.read(in, n)) break;
+
+        const char* p = in + 1;
+        std::string oid = fixed_text(p, ORDER_ID_LEN);
+        std::string sym = fixed_text(p + ORDER_ID_LEN, SYMBOL_LEN);
+        uint8_t rec = static_cast<uint8_t>(in[0]);
+
+        if (rec == REC_ORDER && n == ORDER_SIZE) {
+            const char* q = p + ORDER_ID_LEN + SYMBOL_LEN;
+            uint8_t side = static_cast<uint8_t>(q[0]);
+            double qty, px;
+            std::memcpy(&qty, q + 1, 8);
+            std::memcpy(&px, q + 9, 8);
+            if (side > SELL) {
+                engine.reject(oid, sym, "unknown side");
+            } else {
+                engine.submit(oid, sym, static_cast<Side>(side), qty, px);
+            }
+        } else if (rec == REC_CANCEL && n == CANCEL_SIZE) {
+            engine.cancel(oid, sym);
+        }
+
+        // flush only when no more input is already buffered (batched writes)
+        if (std::cin.rdbuf()->in_avail() <= 0) std::cout.flush();
+    }
+    std::cout.flush();
+}
+
 int main() {
+#ifdef _WIN32
+    _setmode(_fileno(stdin), _O_BINARY);
+    _setmode(_fileno(stdout), _O_BINARY);
+#endif
+    // lets in_avail() see buffered input
+    std::ios::sync_with_stdio(false);
+    // default 6 significant digits would round prices like 65432.17
+    std::cout.precision(15);
+
+    Reporter out;
+    Engine engine(out);
+
     // Announce ready (helps debugging)
     std::cout << "{\"type\":\"engine_status\",\"status\":\"ready\",\"ts_ms\":" << now_ms() << "}\n";
     std::cout.flush();
@@ -73,33 +415,36 @@ int main() {
     while (std::getline(std::cin, line)) {
         if (line.empty()) continue;
 
+        std::string type = get_string_field(line, "type");
+        if (type == "hello") {
+            if (get_string_field(line, "protocol") == "bin1") {
+                std::cout << "{\"type\":\"hello_ack\",\"protocol\":\"bin1\"}\n";
+                std::cout.flush();
+                out.binary = true;
+                run_bin1(engine);
+                return 0;
+            }
+            continue;
+        }
+
         // Parse minimal fields expected from Python Order model
         std::string order_id = get_string_field(line, "order_id");
         std::string symbol   = get_string_field(line, "symbol");
-        std::string side     = get_string_field(line, "side");
-        double qty           = get_number_field(line, "qty", 0.0);
-        double px            = get_number_field(line, "px", 0.0);
-
-        // Emit an ACK
-        std::cout
-            << "{\"type\":\"ack\","
-            << "\"order_id\":\"" << escape_json(order_id) << "\","
-            << "\"symbol\":\"" << escape_json(symbol) << "\","
-            << "\"ts_ms\":" << now_ms()
-            << "}\n";
-
-        // Emit a simulated FILL (instant)
-        std::cout
-            << "{\"type\":\"fill\","
-            << "\"order_id\":\"" << escape_json(order_id) << "\","
-            << "\"symbol\":\"" << escape_json(symbol) << "\","
-            << "\"side\":\"" << escape_json(side) << "\","
-            << "\"qty\":" << qty << ","
-            << "\"px\":" << px << ","
-            << "\"ts_ms\":" << now_ms()
-            << "}\n";
-
-        std::cout.flush();
+
+        if (type == "cancel") {
+            engine.cancel(order_id, symbol);
+        } else {
+            std::string side = get_string_field(line, "side");
+            double qty       = get_number_field(line, "qty", 0.0);
+            double px        = get_number_field(line, "px", 0.0);
+            if (side != "BUY" && side != "SELL") {
+                engine.reject(order_id, symbol, "unknown side");
+            } else {
+                engine.submit(order_id, symbol, side == "BUY" ? BUY : SELL, qty, px);
+            }
+        }
+
+        if (std::cin.rdbuf()->in_avail() <= 0) std::cout.flush();
     }
 
     return 0;
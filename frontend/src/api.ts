@@ -38,6 +38,16 @@ export const api = {
       method: "POST",
       body: JSON.stringify(order)
     }),
+  executeOrders: (orders: Order[]) =>
+    http<{ status: string; count: number; results: { order_id: string; reports: any[] }[] }>("/execute_orders", {
+      method: "POST",
+      body: JSON.stringify({ orders })
+    }),
+  cancelOrder: (order_id: string, symbol: string) =>
+    http<{ status: string; reports: any[] }>("/cancel_order", {
+      method: "POST",
+      body: JSON.stringify({ order_id, symbol })
+    }),
 
   // NEW
   runBacktest: (req: BacktestRequest) =>
@@ -0,0 +1,140 @@
+"""
+The fast paths must give the same results as the reference paths they
+replace:
+  - BacktestEngine vectorized run() == the per-bar loop, dead-band included
+  - run_stream() over chunks == run() over the whole series
+  - the batched momentum sweep == one engine run per grid point
+"""
+import numpy as np
+import pytest
+
+from backend.api.backtest_api import SweepRequest, run_sweep
+from backend.backtest.costs import BpsCostModel
+from backend.backtest.data import QuoteFrame
+from backend.backtest.engine import BacktestEngine
+from backend.backtest.strategies.momentum import MomentumStrategy
+from backend.backtest.synthetic.gbm import gbm_quote_frame
+from backend.backtest.synthetic.orderbook_sim import orderbook_chunks, orderbook_frame
+from backend.services.metrics import compute_metrics
+
+STEPS = 3_000
+CHUNK = 257  # not a divisor of STEPS, so the last chunk is short
+
+
+def _gbm() -> QuoteFrame:
+    return gbm_quote_frame(steps=STEPS, start=30_000.0, mu=0.0, sigma=0.02, spread_bps=5.0, seed=7)
+
+
+def _orderbook() -> QuoteFrame:
+    return orderbook_frame(steps=STEPS, mid_start=100.0, spread_bps=5.0, vol_bps=10.0, seed=3)
+
+
+def _chunks(frame: QuoteFrame):
+    for a in range(0, len(frame), CHUNK):
+        yield QuoteFrame(frame.data[:, a : a + CHUNK].copy())
+
+
+DATA = {"gbm": _gbm, "orderbook": _orderbook}
+
+
+def _engine(lookback: int, vectorized: bool = True) -> BacktestEngine:
+    strat = MomentumStrategy(symbol="BTCUSDT", lookback=lookback)
+    return BacktestEngine("BTCUSDT", strat, BpsCostModel(fee_bps=1.0, slippage_bps=2.0), vectorized=vectorized)
+
+
+def _assert_same_trades(got, want):
+    assert len(got) == len(want)
+    for g, w in zip(got, want):
+        assert (g["i"], g["side"]) == (w["i"], w["side"])
+        for k in ("qty", "px", "mid", "bid", "ask", "fee"):
+            assert g[k] == pytest.approx(w[k], rel=1e-12), k
+
+
+@pytest.mark.parametrize("data", sorted(DATA))
+@pytest.mark.parametrize("lookback", [3, 20])
+def test_vectorized_run_matches_loop(data, lookback):
+    quotes = DATA[data]()
+    vec = _engine(lookback).run(quotes)
+    loop = _engine(lookback, vectorized=False).run(quotes)
+
+    assert len(vec["trades"]) > 0
+    np.testing.assert_allclose(vec["equity"], loop["equity"], rtol=1e-12, atol=1e-6)
+    _assert_same_trades(vec["trades"], loop["trades"])
+
+
+def _drift(i):
+    # creeps by 4e-10 per bar (sub dead-band steps that add up to trades), jumps every 50 bars
+    i = np.asarray(i, dtype=np.int64)
+    return (i % 50) * 4e-10 + (i // 50) * 1e-3
+
+
+class _DriftStrategy:
+    warmup = 0
+
+    def target_positions(self, quotes):
+        return _drift(quotes.i)
+
+    def target_position(self, j, quotes):
+        return float(_drift(quotes.i[j]))
+
+
+def test_dead_band_matches_loop_for_drifting_targets():
+    quotes = _gbm()
+    cost = BpsCostModel(fee_bps=1.0, slippage_bps=2.0)
+    loop = BacktestEngine("BTCUSDT", _DriftStrategy(), cost, vectorized=False).run(quotes)
+    vec = BacktestEngine("BTCUSDT", _DriftStrategy(), cost).run(quotes)
+    stream = BacktestEngine("BTCUSDT", _DriftStrategy(), cost).run_stream(_chunks(quotes), max_trades=None)
+
+    assert len(loop["trades"]) > 2 * (STEPS // 50)  # the creep trades, not only the jumps
+    np.testing.assert_allclose(vec["equity"], loop["equity"], rtol=1e-12, atol=1e-6)
+    _assert_same_trades(vec["trades"], loop["trades"])
+    assert stream["final_equity"] == pytest.approx(loop["equity"][-1], rel=1e-12)
+    _assert_same_trades(stream["trades"], loop["trades"])
+
+
+@pytest.mark.parametrize("data", sorted(DATA))
+@pytest.mark.parametrize("chunked", [True, False])
+def test_run_stream_matches_run(data, chunked):
+    quotes = DATA[data]()
+    stream = orderbook_chunks(steps=STEPS, mid_start=100.0, spread_bps=5.0, vol_bps=10.0, seed=3, chunk_size=CHUNK)
+    if data == "gbm":
+        stream = _chunks(quotes)
+
+    ref = _engine(10).run(quotes)
+    eq = ref["equity"]
+    out = _engine(10).run_stream(stream, equity_every=7, max_trades=None, chunked=chunked)
+
+    assert out["bars"] == STEPS
+    assert out["trade_count"] == len(ref["trades"])
+    assert out["final_equity"] == pytest.approx(eq[-1], rel=1e-12)
+    assert out["fees"] == pytest.approx(sum(t["fee"] for t in ref["trades"]), rel=1e-9)
+    np.testing.assert_allclose(out["equity"], eq[::7] + [eq[-1]], rtol=1e-12, atol=1e-6)
+    _assert_same_trades(out["trades"], ref["trades"])
+
+    want = compute_metrics(eq, np.diff(eq).tolist()).model_dump()
+    for k, v in want.items():
+        assert out["metrics"][k] == pytest.approx(v, rel=1e-6, abs=1e-9), k
+
+
+@pytest.mark.parametrize("data", sorted(DATA))
+def test_batched_sweep_matches_per_point(data):
+    kw = dict(
+        data_source=data,
+        steps=STEPS,
+        seed=11,
+        lookbacks=[3, 5, 10, 20, 40],
+        fee_bps_list=[0.0, 1.0],
+        slippage_bps_list=[0.0, 2.0, 5.0],
+        top_k=30,
+    )
+    batched = run_sweep(SweepRequest(**kw, batched=True))["top"]
+    per_point = run_sweep(SweepRequest(**kw, batched=False))["top"]
+
+    assert len(batched) == len(per_point) == 30
+    assert [r["params"] for r in batched] == [r["params"] for r in per_point]
+    for b, p in zip(batched, per_point):
+        assert b["trades"] == p["trades"]
+        assert b["final_equity"] == pytest.approx(p["final_equity"], rel=1e-12)
+        assert b["score"] == pytest.approx(p["score"], rel=1e-9, abs=1e-12)
+        for k, v in p["metrics"].items():
+            assert b["metrics"][k] == pytest.approx(v, rel=1e-9, abs=1e-9), k